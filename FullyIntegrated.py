@@ -9,11 +9,11 @@ from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
 import math
 import keyboard
 # ----------------- Config -----------------
-wCam, hCam = 1280, 720
-minDist, maxDist = 35, 250      # distance range (pixels) mapped to 0..100% volume
-touch_thresh = 40               # threshold (pixels) for "touch" detection
+wCam, hCam = 1280, 720         # capture size only affects speed; thresholds below are relative
+minDist, maxDist = 0.027, 0.195 # distance range (fraction of frame width) mapped to 0..100% volume
+touch_thresh = 0.031            # threshold (fraction of frame width) for "touch" detection
 debounce_media = 0.7            # seconds cooldown for media actions
-minArea, maxArea = 500, 3000  # optional area filter for left hand bbox (tune for your setup)
+minArea, maxArea = 0.054, 0.326 # optional area filter for left hand bbox (fraction of frame area)
 # ------------------------------------------
 
 cap = cv2.VideoCapture(0)
@@ -45,6 +45,7 @@ def bbox_area(b):
 while True:
     success, img = cap.read()
     img = detector.findHands(img)
+    hImg, wImg = img.shape[:2]
 
     leftHandLmList, rightFingers = [], None
     volBar, volPer = 400, 0
@@ -69,15 +70,15 @@ while True:
     # --- Control Logic ---
     if leftHandLmList:  # Left hand detected
         xmin, ymin, xmax, ymax = leftBbox
-        area = (xmax - xmin) * (ymax - ymin)//100
+        area = (xmax - xmin) * (ymax - ymin) / (wImg * hImg)
 
         if minArea < area < maxArea:   # ✅ Only process gestures if left hand is in range
             if rightFingers and rightFingers[1] == 1:
                 # ---------------- Volume Control Mode ----------------
                 length, img, lineinfo = detector.findDistance(4, 8, img, lmList=leftHandLmList)
 
-                volBar = np.interp(length, [35, 250], [400, 150])
-                volPer = np.interp(length, [35, 250], [0, 100])
+                volBar = np.interp(length / wImg, [minDist, maxDist], [400, 150])
+                volPer = np.interp(length / wImg, [minDist, maxDist], [0, 100])
                 volume.SetMasterVolumeLevelScalar(volPer / 100, None)
 
                 cv2.circle(img, (lineinfo[4], lineinfo[5]), 15, (0, 255, 0), cv2.FILLED)
@@ -95,19 +96,19 @@ while True:
 
                 # Pause/Resume (Thumb + Middle)
                 length, img, lineInfo = detector.findDistance(4, 12, img, lmList=leftHandLmList)
-                if length < 40 and current_time - last_action_time > cooldown:
+                if length / wImg < touch_thresh and current_time - last_action_time > cooldown:
                     keyboard.send("play/pause media")
                     last_action_time = current_time
 
                 # Next Track (Thumb + Ring)
                 length, img, lineInfo = detector.findDistance(4, 16, img, lmList=leftHandLmList)
-                if length < 40 and current_time - last_action_time > cooldown:
+                if length / wImg < touch_thresh and current_time - last_action_time > cooldown:
                     keyboard.send("next track")
                     last_action_time = current_time
 
                 # Previous Track (Thumb + Pinky)
                 length, img, lineInfo = detector.findDistance(4, 20, img, lmList=leftHandLmList)
-                if length < 40 and current_time - last_action_time > cooldown:
+                if length / wImg < touch_thresh and current_time - last_action_time > cooldown:
                     keyboard.send("previous track")
                     last_action_time = current_time
 
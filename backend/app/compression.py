@@ -0,0 +1,122 @@
+"""Response compression for the Spotify proxy routes (``/api/*``).
+
+Brotli when the client accepts it and the ``brotli`` package is installed,
+gzip otherwise. Responses under ``minimum_size`` bytes go out as they are.
+Streamed responses (``?all=true`` track lists) are flushed after every chunk,
+so the client can decode each one as it arrives instead of waiting for the
+compressor to fill up. Other paths (WebSockets, the MJPEG preview) are never
+touched.
+"""
+import zlib
+from typing import Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli
+    brotli = None
+
+
+class _Gzip:
+    def __init__(self, level: int) -> None:
+        # wbits 31: deflate with a gzip header and trailer
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, more: bool) -> bytes:
+        return self._z.compress(data) + self._z.flush(zlib.Z_SYNC_FLUSH if more else zlib.Z_FINISH)
+
+
+class _Brotli:
+    def __init__(self, quality: int) -> None:
+        self._c = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, more: bool) -> bytes:
+        return self._c.process(data) + (self._c.flush() if more else self._c.finish())
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """``"br"``, ``"gzip"`` or None for an ``Accept-Encoding`` header."""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, *params = part.split(";")
+        q = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            accepted.add(name.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        prefixes: Tuple[str, ...] = ("/api",),
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 5,
+    ) -> None:
+        self.app = app
+        self.prefixes = prefixes
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefixes):
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Message = {}
+        # None until the first body chunk decides; False: sent uncompressed
+        encoder = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, encoder
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            if encoder is None:
+                headers = MutableHeaders(raw=start["headers"])
+                if "content-encoding" in headers or (not more and len(body) < self.minimum_size):
+                    encoder = False
+                    await send(start)
+                    await send(message)
+                    return
+                encoder = _Brotli(self.brotli_quality) if encoding == "br" else _Gzip(self.gzip_level)
+                body = encoder.compress(body, more)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if more:
+                    del headers["Content-Length"]
+                else:
+                    headers["Content-Length"] = str(len(body))
+                await send(start)
+                await send({"type": "http.response.body", "body": body, "more_body": more})
+                return
+            if encoder is False:
+                await send(message)
+                return
+            await send({"type": "http.response.body", "body": encoder.compress(body, more), "more_body": more})
+
+        await self.app(scope, receive, send_compressed)
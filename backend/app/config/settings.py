@@ -22,6 +22,79 @@ class Settings(BaseSettings):
         "SPOTIFY_SCOPE",
         "streaming user-read-email user-read-private user-modify-playback-state user-read-playback-state playlist-read-private playlist-read-collaborative",
     )
+    # Shared HTTP client for Spotify API and token calls (services/http_client.py):
+    # pooled keep-alive connections, optionally HTTP/2 (needs `pip install h2`)
+    spotify_http2: bool = os.getenv("SPOTIFY_HTTP2", "false").lower() in ("1", "true", "yes")
+    spotify_max_connections: int = int(os.getenv("SPOTIFY_MAX_CONNECTIONS", "20"))
+    spotify_max_keepalive: int = int(os.getenv("SPOTIFY_MAX_KEEPALIVE", "10"))
+    spotify_keepalive_s: float = float(os.getenv("SPOTIFY_KEEPALIVE_S", "60"))
+    spotify_connect_timeout_s: float = float(os.getenv("SPOTIFY_CONNECT_TIMEOUT_S", "5"))
+    spotify_timeout_s: float = float(os.getenv("SPOTIFY_TIMEOUT_S", "10"))
+    # Response cache for /api/me/playlists and /api/playlists/* (services/response_cache.py):
+    # total size, and seconds before an entry is revalidated with its ETag (0 disables)
+    spotify_cache_mb: float = float(os.getenv("SPOTIFY_CACHE_MB", "32"))
+    spotify_cache_ttl_me_s: float = float(os.getenv("SPOTIFY_CACHE_TTL_ME_S", "60"))
+    spotify_cache_ttl_playlist_s: float = float(os.getenv("SPOTIFY_CACHE_TTL_PLAYLIST_S", "300"))
+    # gzip (or brotli, with `pip install brotli`) for /api/* responses of at least
+    # API_COMPRESS_MIN_BYTES; 0 disables
+    api_compress_min_bytes: int = int(os.getenv("API_COMPRESS_MIN_BYTES", "1024"))
+    # Playlist track pages fetched at once by /api/playlists/{id}/tracks?all=true
+    spotify_page_concurrency: int = int(os.getenv("SPOTIFY_PAGE_CONCURRENCY", "6"))
+
+    # Gesture pipeline
+    # "inline": each API process runs its own GestureLoop (single worker, dev default)
+    # "worker": a separate `python -m app.gesture_worker` process owns the camera and
+    #           API processes subscribe to its events
+    gesture_mode: str = os.getenv("GESTURE_MODE", "inline")
+    # Unix socket path, or host:port for TCP (e.g. on Windows)
+    gesture_bus_address: str = os.getenv("GESTURE_BUS_ADDRESS", "/tmp/gestify-gestures.sock")
+    # Where frames come from: a camera index, a video file, a directory of images or
+    # a .gstrec landmark recording (see services/frame_sources.py)
+    gesture_source: str = os.getenv("GESTURE_SOURCE", "0")
+    # Append every frame's landmarks and emitted actions to this .gstrec file
+    # (see services/landmark_recording.py); empty disables recording
+    gesture_record_path: str = os.getenv("GESTURE_RECORD_PATH", "")
+    # Camera capture size; gesture thresholds are resolution independent, so lowering
+    # this (e.g. 640x360) only trades detection range for CPU
+    gesture_capture_width: int = int(os.getenv("GESTURE_CAPTURE_WIDTH", "1280"))
+    gesture_capture_height: int = int(os.getenv("GESTURE_CAPTURE_HEIGHT", "720"))
+    # Adaptive frame rate: full rate while a hand is visible, low presence-detect
+    # rate after GESTURE_IDLE_AFTER_S seconds without one; 0 means unpaced
+    gesture_active_fps: float = float(os.getenv("GESTURE_ACTIVE_FPS", "30"))
+    gesture_idle_fps: float = float(os.getenv("GESTURE_IDLE_FPS", "4"))
+    gesture_idle_after_s: float = float(os.getenv("GESTURE_IDLE_AFTER_S", "2.0"))
+    # Import the CV stack and build the MediaPipe graph in the background right after
+    # startup instead of on the first WebSocket subscriber
+    gesture_preload: bool = os.getenv("GESTURE_PRELOAD", "false").lower() in ("1", "true", "yes")
+    # Camera lifecycle: seconds to keep the camera open after the last client
+    # disconnects (covers page refreshes), or keep it open permanently
+    gesture_camera_grace_s: float = float(os.getenv("GESTURE_CAMERA_GRACE_S", "15"))
+    gesture_camera_always_warm: bool = os.getenv("GESTURE_CAMERA_ALWAYS_WARM", "false").lower() in ("1", "true", "yes")
+    # ROI tracking: run the detector on a downscaled crop around the last hand bboxes
+    gesture_roi: bool = os.getenv("GESTURE_ROI", "false").lower() in ("1", "true", "yes")
+    gesture_roi_size: int = int(os.getenv("GESTURE_ROI_SIZE", "320"))
+    gesture_roi_full_scan_every: int = int(os.getenv("GESTURE_ROI_FULL_SCAN_EVERY", "30"))
+    # Inference backend: "solutions" (mp.solutions.hands, model complexity 0 = lite,
+    # 1 = full) or "tasks" (HandLandmarker .task bundle, optionally in live-stream mode)
+    gesture_backend: str = os.getenv("GESTURE_BACKEND", "solutions")
+    gesture_model_complexity: int = int(os.getenv("GESTURE_MODEL_COMPLEXITY", "1"))
+    gesture_model_path: str = os.getenv("GESTURE_MODEL_PATH", "hand_landmarker.task")
+    gesture_live_stream: bool = os.getenv("GESTURE_LIVE_STREAM", "false").lower() in ("1", "true", "yes")
+    gesture_max_hands: int = int(os.getenv("GESTURE_MAX_HANDS", "2"))
+
+    # WebSocket fan-out: each client gets a bounded outbound queue; a client whose
+    # queue fills up or falls more than WS_MAX_LAG_S behind is disconnected
+    ws_send_queue_size: int = int(os.getenv("WS_SEND_QUEUE_SIZE", "256"))
+    ws_max_lag_s: float = float(os.getenv("WS_MAX_LAG_S", "5.0"))
+    # /gestures/preview MJPEG stream: frames wider than GESTURE_PREVIEW_WIDTH are
+    # downscaled, and at most GESTURE_PREVIEW_FPS are drawn and encoded per second
+    gesture_preview_width: int = int(os.getenv("GESTURE_PREVIEW_WIDTH", "640"))
+    gesture_preview_fps: float = float(os.getenv("GESTURE_PREVIEW_FPS", "10"))
+    gesture_preview_quality: int = int(os.getenv("GESTURE_PREVIEW_QUALITY", "70"))
+    # /ws/landmarks: default and maximum per-subscriber frame rate (?fps= picks
+    # one in between)
+    landmark_stream_fps: float = float(os.getenv("LANDMARK_STREAM_FPS", "15"))
+    landmark_stream_max_fps: float = float(os.getenv("LANDMARK_STREAM_MAX_FPS", "30"))
 
 
 @lru_cache
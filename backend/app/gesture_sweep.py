@@ -0,0 +1,204 @@
+"""Re-run the gesture logic over a ``.gstrec`` recording for many parameter sets.
+
+    cd backend
+    python -m app.gesture_sweep session.gstrec --pinch 0.02:0.05:0.002 --hold 0,0.05 --cooldown 0.1,0.25
+    python -m app.gesture_sweep session.gstrec --min-area 0.03:0.08:0.01 --expect toggle_play=4,next_track=2
+
+Every combination of pinch threshold, hold, cooldown and area gates (applied to all
+gestures from gestures.json; unswept axes keep each gesture's own value) is
+evaluated at once: the compiled GesturePlan computes per-frame geometry a
+single time over the whole (memory-mapped) recording, gates and thresholds
+are broadcast across all combinations, and only the pinch state machines and
+range filters (gesture_engine.advance / follow, with one state per
+combination) walk the candidate frames in order.
+Combinations are ranked by how far their event counts are from ``--expect``,
+or from what the recording itself emitted when no expectation is given.
+"""
+import argparse
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .services.gesture_engine import HANDS, IDLE, TRACKING, GesturePlan, advance, follow, new_filters
+from .services.gesture_loop import GestureLoop
+from .services.landmark_recording import HANDEDNESS, decode_actions, landmarks_px, open_recording
+
+# Per-gesture value when an axis isn't swept
+CONFIGURED = np.nan
+
+
+def parse_values(spec: str | None) -> np.ndarray:
+    """``a,b,c`` or an inclusive ``start:stop:step`` range; unset keeps each gesture's own value."""
+    if not spec:
+        return np.array([CONFIGURED])
+    if ":" in spec:
+        start, stop, step = (float(v) for v in spec.split(":"))
+        return np.arange(start, stop + step / 2, step)
+    return np.array([float(v) for v in spec.split(",")])
+
+
+def frame_features(records: np.ndarray, plan: GesturePlan) -> Dict[str, np.ndarray]:
+    """The plan's per-frame inputs for every record at once, each ``(frames, gestures)``."""
+    handedness = records["handedness"]
+    order = np.arange(handedness.shape[1])
+    pixels = landmarks_px(records)
+    rows = np.arange(len(records))
+    hands = np.zeros((len(records), len(HANDS)) + pixels.shape[2:], dtype=np.float32)
+    present = np.zeros((len(records), len(HANDS)), dtype=bool)
+    for slot, name in enumerate(HANDS):
+        # GestureLoop uses the last hand with each label
+        index = np.where(handedness == HANDEDNESS[name], order, -1).max(axis=1)
+        present[:, slot] = index >= 0
+        hands[:, slot] = pixels[rows, np.maximum(index, 0)]
+    dist, eligible, area = plan.features(hands, present, records["width"], records["height"])
+    return {"timestamp": records["timestamp"], "dist": dist, "eligible": eligible, "area": area}
+
+
+def _axis(values: np.ndarray, configured: np.ndarray) -> np.ndarray:
+    """``(gestures, combinations)``: the swept value, or each gesture's own where unset."""
+    return np.where(np.isnan(values)[None, :], configured[:, None], values[None, :])
+
+
+def sweep(features: Dict[str, np.ndarray], plan: GesturePlan, grid: Dict[str, np.ndarray]) -> np.ndarray:
+    """Fire counts ``(combinations, gestures)`` for every parameter combination."""
+    combos = len(grid["pinch"])
+    counts = np.zeros((combos, len(plan)), dtype=np.int64)
+    below = _axis(grid["pinch"], plan.below)
+    release = below + (plan.release - plan.below)[:, None]
+    hold = _axis(grid["hold"], plan.hold)
+    cooldown = _axis(grid["cooldown"], plan.cooldown)
+    area_min = _axis(grid["min_area"], plan.area_min)
+    area_max = _axis(grid["max_area"], plan.area_max)
+    timestamps, dist, eligible, area = features["timestamp"], features["dist"], features["eligible"], features["area"]
+
+    # Range gestures emit what survives smoothing, dead-band and rate limit,
+    # which depends on the area gates through when the filter resets
+    position = (dist - plan.range_lo) / plan.range_span
+    values = np.zeros(combos)
+    for g in np.flatnonzero(plan.is_range).tolist():
+        filters = new_filters(combos)
+        params = (plan.min_cutoff[g], plan.beta[g], plan.d_cutoff[g], plan.dead_band[g], plan.min_interval[g])
+        candidates = eligible[:, g] & (area[:, g] > area_min[g].min()) & (area[:, g] < area_max[g].max())
+        previous = -1
+        for k in np.flatnonzero(candidates).tolist():
+            if previous != k - 1:
+                filters[TRACKING][:] = False
+            previous = k
+            gated = (area_min[g] < area[k, g]) & (area_max[g] > area[k, g])
+            counts[:, g] += follow(filters, values, position[k, g], gated, timestamps[k], *params)
+
+    pinches = np.flatnonzero(~plan.is_range)
+    if not len(pinches):
+        return counts
+    # Frames where a pinch could be held for some combination; the state machine
+    # makes them order dependent, so walk them once with every combination as a
+    # vector. On every other frame no combination holds the pinch.
+    possible = (
+        eligible[:, pinches]
+        & (area[:, pinches] > area_min[pinches].min(axis=1))
+        & (area[:, pinches] < area_max[pinches].max(axis=1))
+        & (dist[:, pinches] < release[pinches].max(axis=1))
+    )
+    frames = np.flatnonzero(possible.any(axis=1))
+    state = np.full((len(pinches), combos), IDLE, dtype=np.int8)
+    armed_at = np.zeros((len(pinches), combos))
+    released_at = np.zeros((len(pinches), combos))
+    nothing = np.zeros(combos, dtype=bool)
+    previous = np.full(len(pinches), -1)
+    for k, now in zip(frames.tolist(), timestamps[frames].tolist()):
+        for j, g in enumerate(pinches.tolist()):
+            if not possible[k, j]:
+                continue
+            machine = (state[j], armed_at[j], released_at[j])
+            if 0 <= previous[j] < k - 1:
+                # The frames in between release everything; stepping at the
+                # first and last of them is equivalent to stepping through all
+                for gap in (previous[j] + 1, k - 1):
+                    advance(*machine, nothing, nothing, timestamps[gap], hold[g], cooldown[g])
+            previous[j] = k
+            # Same inputs as GesturePlan.evaluate
+            a, d = area[k, g], dist[k, g]
+            gated = (area_min[g] < a) & (area_max[g] > a)
+            fired = advance(*machine, gated & (d < below[g]), gated & (d < release[g]), now, hold[g], cooldown[g])
+            counts[:, g] += fired
+    return counts
+
+
+def parse_expect(spec: str | None) -> Dict[str, int]:
+    if not spec:
+        return {}
+    out = {}
+    for item in spec.split(","):
+        name, count = item.split("=")
+        out[name.strip()] = int(count)
+    return out
+
+
+def recorded_counts(records: np.ndarray, action_table: List[str]) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    masks, frames = np.unique(records["actions"], return_counts=True)
+    for mask, n in zip(masks.tolist(), frames.tolist()):
+        for name in decode_actions(mask, action_table):
+            counts[name] = counts.get(name, 0) + n
+    return counts
+
+
+def build_grid(args) -> Tuple[Dict[str, np.ndarray], int]:
+    names = ("pinch", "hold", "cooldown", "min_area", "max_area")
+    axes = [parse_values(getattr(args, name)) for name in names]
+    mesh = [m.ravel() for m in np.meshgrid(*axes, indexing="ij")]
+    return dict(zip(names, mesh)), len(mesh[0])
+
+
+def _fmt(value: float, width: int, digits: int) -> str:
+    return f"{'cfg':>{width}}" if np.isnan(value) else f"{value:{width}.{digits}f}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recording", help=".gstrec file written with GESTURE_RECORD_PATH")
+    parser.add_argument("--mapping", default="gestures.json")
+    parser.add_argument("--pinch", help="pinch 'below' thresholds in frame widths (release keeps its gap)")
+    parser.add_argument("--hold", help="seconds a pinch must be held before it fires")
+    parser.add_argument("--cooldown", help="seconds after a release before a pinch can arm again")
+    parser.add_argument("--min-area", help="minimum hand bbox area, fraction of the frame")
+    parser.add_argument("--max-area", help="maximum hand bbox area, fraction of the frame")
+    parser.add_argument("--expect", help="target event counts, e.g. toggle_play=4,next_track=2")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    loop = GestureLoop(mapping_path=args.mapping)
+    loop.load_mapping()
+    plan = loop.compile_gestures()
+    header, records = open_recording(args.recording)
+    started = time.perf_counter()
+    features = frame_features(records, plan)
+    grid, combos = build_grid(args)
+    per_gesture = sweep(features, plan, grid)
+    actions = sorted({s.action for s in plan.gestures})
+    counts = np.zeros((combos, len(actions)), dtype=np.int64)
+    for g, spec in enumerate(plan.gestures):
+        counts[:, actions.index(spec.action)] += per_gesture[:, g]
+    took = time.perf_counter() - started
+
+    baseline = recorded_counts(records, header["actions"])
+    expect = parse_expect(args.expect) or baseline
+    target = np.array([expect.get(a, 0) for a in actions])
+    error = np.abs(counts - target).sum(axis=1)
+    best = np.argsort(error, kind="stable")[: args.top]
+
+    print(f"frames={len(records)} combinations={combos} took_s={took:.2f}")
+    print("expected:" if args.expect else "recorded:", expect)
+    header_row = " ".join(f"{a[:14]:>14}" for a in actions)
+    print(f"{'pinch':>7} {'hold':>6} {'cooldown':>8} {'min_area':>8} {'max_area':>8} {'error':>6} {header_row}")
+    for i in best:
+        row = " ".join(f"{c:>14d}" for c in counts[i])
+        print(
+            f"{_fmt(grid['pinch'][i], 7, 4)} {_fmt(grid['hold'][i], 6, 3)} {_fmt(grid['cooldown'][i], 8, 3)} {_fmt(grid['min_area'][i], 8, 3)} "
+            f"{_fmt(grid['max_area'][i], 8, 3)} {error[i]:6d} {row}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Standalone capture/inference process.
+
+Owns the camera and the HandDetector and publishes gesture events to every
+API process started with GESTURE_MODE=worker:
+
+    python -m app.gesture_worker
+    GESTURE_MODE=worker python -m uvicorn app.main:app --workers 4
+"""
+import asyncio
+import logging
+
+from .config.settings import get_settings
+from .services.gesture_bus import GesturePublisher
+from .services.gesture_loop import GestureLoop
+
+
+logger = logging.getLogger("gesture_worker")
+
+
+async def log_status(loop: GestureLoop, interval: float = 30.0) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        logger.info("status %s", loop.status())
+
+
+async def main() -> None:
+    settings = get_settings()
+    publisher = GesturePublisher(settings.gesture_bus_address)
+    await publisher.start()
+    loop = GestureLoop(mapping_path="gestures.json", sink=publisher)
+    status_task = asyncio.create_task(log_status(loop))
+    try:
+        await loop.start()
+    finally:
+        status_task.cancel()
+        await publisher.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
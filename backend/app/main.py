@@ -1,13 +1,23 @@
+import time
+
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .routes.gestures import router as gestures_router
 from .routes.auth import router as auth_router
 from .routes.spotify import router as spotify_router
 from .config.settings import get_settings
+from .compression import CompressionMiddleware
 from .services.gesture_loop import GestureLoop
+from .services.gesture_bus import GestureSubscriber
+from .services import http_client
+from .services.websocket_manager import manager
 import asyncio
+import logging
 
 settings = get_settings()
+logger = logging.getLogger("uvicorn.error")
 
 
 app = FastAPI(title="Gestify Backend", version="0.1.0")
@@ -20,6 +30,9 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if settings.api_compress_min_bytes > 0:
+    # Spotify proxy responses only; WebSockets and the MJPEG preview pass through
+    app.add_middleware(CompressionMiddleware, prefixes=("/api",), minimum_size=settings.api_compress_min_bytes)
 
 
 @app.get("/ping")
@@ -33,20 +46,52 @@ app.include_router(spotify_router)
 
 
 gesture_loop: GestureLoop | None = None
+gesture_subscriber: GestureSubscriber | None = None
+# Strong references to startup's background tasks (the event loop only keeps weak ones)
+_background: set[asyncio.Task] = set()
+
+
+def _spawn(coro, name: str) -> asyncio.Task:
+    task = asyncio.create_task(coro, name=name)
+    _background.add(task)
+    task.add_done_callback(_task_done)
+    return task
+
+
+def _task_done(task: asyncio.Task) -> None:
+    _background.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Background task %s failed", task.get_name(), exc_info=task.exception())
 
 
 @app.on_event("startup")
 async def on_startup():
-    global gesture_loop
-    # Start gesture loop in background
+    global gesture_loop, gesture_subscriber
+    # Pooled keep-alive connections for Spotify API / token calls
+    await http_client.start()
+    if settings.gesture_mode == "worker":
+        # Camera + inference live in app.gesture_worker; relay its events to our clients
+        gesture_subscriber = GestureSubscriber(settings.gesture_bus_address, manager)
+        _spawn(gesture_subscriber.start(), "gesture-subscriber")
+        return
+    # Start gesture loop in background; the CV stack loads on the first subscriber
     gesture_loop = GestureLoop(mapping_path="gestures.json")
-    asyncio.create_task(gesture_loop.start())
+    app.state.gesture_loop = gesture_loop
+    _spawn(gesture_loop.start(), "gesture-loop")
+    if settings.gesture_preload:
+        # Build the graph in a worker thread once the server is up
+        _spawn(gesture_loop.warm(), "gesture-preload")
+    gesture_loop.metrics["cold_start_ms"] = round((time.perf_counter() - _import_started) * 1000, 1)
+    logger.info("Gestify backend ready in %.0f ms", gesture_loop.metrics["cold_start_ms"])
 
 
 @app.on_event("shutdown")
 async def on_shutdown():
-    global gesture_loop
+    global gesture_loop, gesture_subscriber
     if gesture_loop:
         await gesture_loop.stop()
+    if gesture_subscriber:
+        await gesture_subscriber.stop()
+    await http_client.close()
 
 
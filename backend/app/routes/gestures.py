@@ -1,5 +1,9 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from ..services.landmark_stream import landmark_stream
+from ..services.preview import MEDIA_TYPE, preview
 from ..services.websocket_manager import manager
+from ..services.wire_protocol import SUBPROTOCOL
 
 
 router = APIRouter()
@@ -7,8 +11,12 @@ router = APIRouter()
 
 @router.websocket("/ws/gestures")
 async def websocket_gestures(ws: WebSocket):
+    # JSON text frames by default; binary frames (services/wire_protocol.py) when
+    # the client asks for the subprotocol or ?format=binary
+    negotiated = SUBPROTOCOL in ws.scope.get("subprotocols", [])
+    binary = negotiated or ws.query_params.get("format") == "binary"
     try:
-        await manager.connect(ws)
+        await manager.connect(ws, binary=binary, subprotocol=SUBPROTOCOL if negotiated else None)
         while True:
             # Keep the socket open; no need to receive messages in this direction
             data = await ws.receive_text()
@@ -17,3 +25,46 @@ async def websocket_gestures(ws: WebSocket):
         await manager.disconnect(ws)
 
 
+@router.websocket("/ws/landmarks")
+async def websocket_landmarks(ws: WebSocket):
+    # Opt-in per-frame landmarks (services/landmark_stream.py), ?fps= caps the rate
+    if getattr(ws.app.state, "gesture_loop", None) is None:
+        # GESTURE_MODE=worker: landmarks aren't relayed from app.gesture_worker.
+        # Accepted first so the client gets the reason (a refused handshake is a bare 403)
+        await ws.accept()
+        await ws.close(code=status.WS_1008_POLICY_VIOLATION, reason="Landmarks are only available with GESTURE_MODE=inline")
+        return
+    try:
+        fps = float(ws.query_params.get("fps", 0)) or None
+    except ValueError:
+        fps = None
+    try:
+        await landmark_stream.connect(ws, fps)
+        while True:
+            await ws.receive_text()
+    except WebSocketDisconnect:
+        await landmark_stream.disconnect(ws)
+
+
+@router.get("/landmarks/stats")
+async def landmarks_stats():
+    """Per-subscriber frame and byte rates of the landmark stream."""
+    return landmark_stream.stats()
+
+
+@router.get("/gestures/preview")
+async def gestures_preview(request: Request):
+    """Camera frames with the detected hands drawn on them, as MJPEG (open it in a browser)."""
+    if getattr(request.app.state, "gesture_loop", None) is None:
+        # GESTURE_MODE=worker: the camera belongs to app.gesture_worker
+        raise HTTPException(status_code=503, detail="Preview is only available with GESTURE_MODE=inline")
+    return StreamingResponse(preview.stream(), media_type=MEDIA_TYPE, headers={"Cache-Control": "no-store"})
+
+
+@router.get("/gestures/status")
+async def gestures_status(request: Request):
+    loop = getattr(request.app.state, "gesture_loop", None)
+    if loop is None:
+        # GESTURE_MODE=worker: the loop runs in app.gesture_worker, which logs its own status
+        return {"running": False, "gesture_mode": "worker"}
+    return loop.status()
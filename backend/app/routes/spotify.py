@@ -1,5 +1,22 @@
+import json
+import logging
+from typing import Any, AsyncIterator, Dict
 from fastapi import APIRouter, HTTPException, Query, Header
-from ..services.spotify import get_me_playlists, get_playlist_tracks, search_global, get_playlist_detail
+from fastapi.responses import StreamingResponse
+from ..services.spotify import (
+    cache,
+    flights,
+    get_me_playlists,
+    get_playlist_tracks,
+    iter_playlist_tracks,
+    paging_fields,
+    search_global,
+    get_playlist_detail,
+    slim_search,
+)
+
+
+logger = logging.getLogger("uvicorn.error")
 
 
 router = APIRouter(prefix="/api")
@@ -14,26 +31,77 @@ async def me_playlists(authorization: str | None = Header(default=None)):
 
 
 @router.get("/playlists/{playlist_id}/tracks")
-async def playlist_tracks(playlist_id: str, authorization: str | None = Header(default=None)):
+async def playlist_tracks(
+    playlist_id: str,
+    full: bool = Query(False, alias="all"),
+    fields: str | None = None,
+    authorization: str | None = Header(default=None),
+):
+    # fields: passed on to Spotify, e.g. "items(track(id,name,uri,duration_ms,artists(name)))"
+    if full:
+        fields = paging_fields(fields)
     try:
-        return await get_playlist_tracks(playlist_id, token_override=authorization)
+        first_page = await get_playlist_tracks(playlist_id, token_override=authorization, fields=fields)
     except Exception as e:
         raise HTTPException(status_code=401, detail=str(e))
+    if not full:
+        return first_page
+    # Every track, one JSON object per line, in playlist order as the pages arrive
+    pages = iter_playlist_tracks(playlist_id, first_page, token_override=authorization, fields=fields)
+    return StreamingResponse(
+        _ndjson_items(pages),
+        media_type="application/x-ndjson",
+        headers={"X-Total-Count": str(first_page.get("total") or 0)},
+    )
+
+
+async def _ndjson_items(pages: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    try:
+        async for page in pages:
+            items = page.get("items") or []
+            if items:
+                yield "".join(json.dumps(item, separators=(",", ":")) + "\n" for item in items).encode()
+    except Exception as e:
+        # Headers are already sent: end the stream with an error line instead
+        logger.warning("Playlist track stream failed: %s", e)
+        yield (json.dumps({"error": str(e)}) + "\n").encode()
+    finally:
+        # Stops the page fetches still running when the client goes away
+        await pages.aclose()
 
 
 @router.get("/search")
-async def search(q: str = Query("", min_length=1), limit: int = 10, authorization: str | None = Header(default=None)):
+async def search(
+    q: str = Query("", min_length=1),
+    limit: int = 10,
+    slim: bool = False,
+    authorization: str | None = Header(default=None),
+):
     try:
-        return await search_global(q, limit=limit, token_override=authorization)
+        results = await search_global(q, limit=limit, token_override=authorization)
+        # slim: only what the UI reads, in the same shape
+        return slim_search(results) if slim else results
     except Exception as e:
         raise HTTPException(status_code=401, detail=str(e))
 
 
 @router.get("/playlists/{playlist_id}")
-async def playlist_detail(playlist_id: str, authorization: str | None = Header(default=None)):
+async def playlist_detail(
+    playlist_id: str, fields: str | None = None, authorization: str | None = Header(default=None)
+):
     try:
-        return await get_playlist_detail(playlist_id, token_override=authorization)
+        return await get_playlist_detail(playlist_id, token_override=authorization, fields=fields)
     except Exception as e:
         raise HTTPException(status_code=401, detail=str(e))
 
 
+@router.get("/cache/stats")
+async def cache_stats():
+    """Hit / revalidation / miss counters and size of the Spotify response cache."""
+    return cache.stats()
+
+
+@router.get("/coalescing/stats")
+async def coalescing_stats():
+    """Upstream Spotify calls made vs. identical concurrent requests that shared one."""
+    return flights.stats()
@@ -1,7 +1,7 @@
 import time
 from typing import Dict, Optional
-import httpx
 from ..config.settings import get_settings
+from .http_client import get_client
 
 
 settings = get_settings()
@@ -44,20 +44,19 @@ def get_authorize_url(state: str = "state") -> str:
 
 
 async def exchange_code_for_token(code: str) -> Dict:
-    async with httpx.AsyncClient() as client:
-        data = {
-            "grant_type": "authorization_code",
-            "code": code,
-            "redirect_uri": settings.spotify_redirect_uri,
-            "client_id": settings.spotify_client_id,
-            "client_secret": settings.spotify_client_secret,
-        }
-        resp = await client.post(SPOTIFY_TOKEN_URL, data=data)
-        resp.raise_for_status()
-        payload = resp.json()
-        payload["expires_at"] = int(time.time()) + int(payload.get("expires_in", 3600))
-        token_store.set(payload)
-        return payload
+    data = {
+        "grant_type": "authorization_code",
+        "code": code,
+        "redirect_uri": settings.spotify_redirect_uri,
+        "client_id": settings.spotify_client_id,
+        "client_secret": settings.spotify_client_secret,
+    }
+    resp = await get_client().post(SPOTIFY_TOKEN_URL, data=data)
+    resp.raise_for_status()
+    payload = resp.json()
+    payload["expires_at"] = int(time.time()) + int(payload.get("expires_in", 3600))
+    token_store.set(payload)
+    return payload
 
 
 async def refresh_access_token(user_key: str = "default") -> Dict:
@@ -65,22 +64,21 @@ async def refresh_access_token(user_key: str = "default") -> Dict:
     if not tokens or "refresh_token" not in tokens:
         raise RuntimeError("No refresh token available")
     refresh_token = tokens["refresh_token"]
-    async with httpx.AsyncClient() as client:
-        data = {
-            "grant_type": "refresh_token",
-            "refresh_token": refresh_token,
-            "client_id": settings.spotify_client_id,
-            "client_secret": settings.spotify_client_secret,
-        }
-        resp = await client.post(SPOTIFY_TOKEN_URL, data=data)
-        resp.raise_for_status()
-        refreshed = resp.json()
-        # Keep original refresh_token if not provided back
-        if "refresh_token" not in refreshed:
-            refreshed["refresh_token"] = refresh_token
-        refreshed["expires_at"] = int(time.time()) + int(refreshed.get("expires_in", 3600))
-        token_store.set(refreshed, user_key)
-        return refreshed
+    data = {
+        "grant_type": "refresh_token",
+        "refresh_token": refresh_token,
+        "client_id": settings.spotify_client_id,
+        "client_secret": settings.spotify_client_secret,
+    }
+    resp = await get_client().post(SPOTIFY_TOKEN_URL, data=data)
+    resp.raise_for_status()
+    refreshed = resp.json()
+    # Keep original refresh_token if not provided back
+    if "refresh_token" not in refreshed:
+        refreshed["refresh_token"] = refresh_token
+    refreshed["expires_at"] = int(time.time()) + int(refreshed.get("expires_in", 3600))
+    token_store.set(refreshed, user_key)
+    return refreshed
 
 
 def get_valid_access_token(user_key: str = "default") -> Optional[str]:
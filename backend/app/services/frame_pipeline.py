@@ -0,0 +1,378 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .frame_scheduler import AdaptiveFrameScheduler
+from .frame_sources import CameraSource, FrameSource
+from . import landmarks as lmk
+
+# Only for annotations: landmark replays never need mediapipe
+if TYPE_CHECKING:
+    from .hand_tracking import HandDetector
+
+logger = logging.getLogger("uvicorn.error")
+
+# Consecutive frames that may fail before the inference thread gives up
+MAX_FRAME_ERRORS = 30
+
+
+class FrameResult:
+    """Everything the async side needs from one processed frame.
+
+    ``landmarks`` is the detector's ``(hands, 21, 3)`` pixel array,
+    ``labels`` the matching handedness ("Left"/"Right") per hand and
+    ``width``/``height`` the size of the frame the pixels refer to.
+    ``timestamp`` is the source's frame time (monotonic for cameras, media
+    time for recordings) and ``processed_at`` when inference finished.
+    """
+
+    __slots__ = ("timestamp", "landmarks", "labels", "width", "height", "buffer", "processed_at")
+
+    def __init__(self, timestamp: float, landmarks: np.ndarray, labels: List[str], width: int, height: int) -> None:
+        self.timestamp = timestamp
+        self.landmarks = landmarks
+        self.labels = labels
+        self.width = width
+        self.height = height
+        # Backing (maxHands, 21, 3) array when the result comes from FramePipeline's pool
+        self.buffer = landmarks
+        self.processed_at = 0.0
+
+
+class LatestFrameSlot:
+    """Single-slot buffer: writers overwrite, the reader always gets the newest frame.
+
+    Overwritten and consumed frames go back to a small spare pool so the
+    capture thread can read into them instead of allocating a new image.
+    """
+
+    def __init__(self, spares: int = 2) -> None:
+        self._cond = threading.Condition()
+        self._frame: Any = None
+        self._timestamp = 0.0
+        self._spare: List[Any] = []
+        self._maxSpares = spares
+        self._closed = False
+        self.dropped = 0
+
+    def spare(self) -> Any:
+        with self._cond:
+            return self._spare.pop() if self._spare else None
+
+    def recycle(self, frame: Any) -> None:
+        with self._cond:
+            if len(self._spare) < self._maxSpares:
+                self._spare.append(frame)
+
+    def put(self, frame: Any, timestamp: float, block: bool = False) -> None:
+        """Store a frame; with ``block`` wait for the reader instead of overwriting."""
+        with self._cond:
+            if block:
+                self._cond.wait_for(lambda: self._frame is None or self._closed)
+            if self._frame is not None:
+                self.dropped += 1
+                if len(self._spare) < self._maxSpares:
+                    self._spare.append(self._frame)
+            self._frame = frame
+            self._timestamp = timestamp
+            self._cond.notify()
+
+    def take(self, timeout: float) -> Tuple[Any, float]:
+        with self._cond:
+            if self._frame is None:
+                self._cond.wait(timeout)
+            frame, ts = self._frame, self._timestamp
+            self._frame = None
+            self._cond.notify_all()
+            return frame, ts
+
+    @property
+    def empty(self) -> bool:
+        return self._frame is None
+
+    def close(self) -> None:
+        """Wake every waiter; blocking put() stops waiting from now on."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class FramePipeline:
+    """Frame capture and hand inference on background threads.
+
+    The capture thread owns the FrameSource (the camera by default) and, for
+    realtime sources, keeps only the newest frame. The inference thread runs
+    the detector on that frame and hands the landmarks to the asyncio side
+    through a small thread-safe queue, so a slow camera or model never blocks
+    the event loop. Offline sources (recordings) are never dropped: capture and
+    publishing wait for the next stage instead, and ``finished`` is set once
+    the last frame has been published. A frame that fails to process is logged
+    and skipped; after ``MAX_FRAME_ERRORS`` in a row (or if the detector fails
+    to warm up) inference stops, ``error`` says why and ``finished`` is set.
+    """
+
+    def __init__(
+        self,
+        detector: "Optional[HandDetector]",
+        loop: asyncio.AbstractEventLoop,
+        camera_index: int = 0,
+        width: int = 1280,
+        height: int = 720,
+        max_pending: int = 2,
+        scheduler: Optional[AdaptiveFrameScheduler] = None,
+        source: Optional[FrameSource] = None,
+        paced: bool = True,
+        record_stages: bool = False,
+        preview: Optional[Any] = None,
+    ) -> None:
+        # detector may be None for sources that provide landmarks themselves
+        self.detector = detector
+        self.scheduler = scheduler or AdaptiveFrameScheduler()
+        self.camera_index = camera_index
+        self.width, self.height = width, height
+        self.source = source or CameraSource(camera_index, width, height)
+        # paced=False skips the scheduler delay (replay as fast as possible)
+        self.paced = paced
+        # Per-frame durations in seconds ("read", "inference") for benchmarks
+        self.stage_times: Optional[Dict[str, List[float]]] = {"read": [], "inference": []} if record_stages else None
+        # PreviewStream offered annotated frames while it has viewers
+        self.preview = preview
+        self._loop = loop
+        self._slot = LatestFrameSlot()
+        self._results: "queue.Queue[FrameResult]" = queue.Queue(maxsize=max_pending)
+        # Preallocated results: max_pending queued, one being handled on the async
+        # side (returned through release()) and one being filled
+        self._free = deque(self._newResult() for _ in range(max_pending + 2))
+        self._ready = asyncio.Event()
+        self._stop = threading.Event()
+        # Cleared while paused: the camera stays open but no inference runs
+        self._active = threading.Event()
+        self._active.set()
+        self._threads: List[threading.Thread] = []
+        self._capture_done = threading.Event()
+        self._finished = threading.Event()
+        self.camera_open_s: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._capture_done.clear()
+        self._finished.clear()
+        self.error = None
+        self._slot = LatestFrameSlot()
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="gesture-capture", daemon=True),
+            threading.Thread(target=self._inference_loop, name="gesture-inference", daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._active.set()
+        self._slot.close()
+        for t in self._threads:
+            t.join(timeout=2.0)
+        self._threads = []
+
+    def pause(self) -> None:
+        """Keep the camera open (warm) but stop running inference."""
+        self._active.clear()
+
+    def resume(self) -> None:
+        if self._active.is_set():
+            return
+        # Results produced before the pause are stale
+        while True:
+            try:
+                self.release(self._results.get_nowait())
+            except queue.Empty:
+                break
+        self._active.set()
+
+    @property
+    def paused(self) -> bool:
+        return not self._active.is_set()
+
+    @property
+    def dropped_frames(self) -> int:
+        return self._slot.dropped
+
+    @property
+    def finished(self) -> bool:
+        """An offline source ran out and every frame has been published, or
+        inference stopped on an error (see ``error``)."""
+        return self._finished.is_set()
+
+    @property
+    def pending(self) -> int:
+        return self._results.qsize()
+
+    async def get(self, timeout: float = 0.2) -> Optional[FrameResult]:
+        """Wait for the next processed frame without blocking the event loop."""
+        # Clear before checking so a result published in between still wakes us
+        self._ready.clear()
+        try:
+            return self._results.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        try:
+            return self._results.get_nowait()
+        except queue.Empty:
+            return None
+
+    def release(self, result: FrameResult) -> None:
+        """Return a result from get() to the pool once the caller is done with it."""
+        self._free.append(result)
+
+    def _newResult(self) -> FrameResult:
+        max_hands = self.detector.maxHands if self.detector is not None else 2
+        buffer = np.zeros((max_hands, lmk.NUM_LANDMARKS, 3), dtype=np.float32)
+        result = FrameResult(0.0, buffer[:0], [], 0, 0)
+        result.buffer = buffer
+        return result
+
+    def _capture_loop(self) -> None:
+        source = self.source
+        block = not source.realtime
+        reads = self.stage_times["read"] if self.stage_times is not None else None
+        opened_at = time.monotonic()
+        try:
+            source.open()
+            self.camera_open_s = time.monotonic() - opened_at
+            while not self._stop.is_set():
+                buf = self._slot.spare()
+                started = time.perf_counter()
+                ok, img, ts = source.read(buf)
+                if not ok:
+                    if source.finished:
+                        break
+                    time.sleep(0.05)
+                    continue
+                if reads is not None:
+                    reads.append(time.perf_counter() - started)
+                self._slot.put(img, ts, block=block)
+        except Exception:
+            logger.exception("Frame source failed")
+        finally:
+            try:
+                source.release()
+            except Exception:
+                pass
+            self._capture_done.set()
+            self._slot.close()
+
+    def _inference_loop(self) -> None:
+        try:
+            self._run_inference()
+        except Exception as exc:
+            logger.exception("Inference failed")
+            self.error = repr(exc)
+        if self.error is not None or (self._capture_done.is_set() and not self._stop.is_set()):
+            self._finished.set()
+            self._wake()
+
+    def _run_inference(self) -> None:
+        # Build/initialise the graph while the capture thread is still opening the camera
+        if self.detector is not None:
+            self.detector.warmup(self.width, self.height)
+        recycle = not self.source.provides_landmarks
+        preview = self.preview
+        inference = self.stage_times["inference"] if self.stage_times is not None else None
+        failures = 0
+        while not self._stop.is_set():
+            if not self._active.wait(0.2):
+                continue
+            img, ts = self._slot.take(timeout=0.2)
+            if img is None:
+                if self._capture_done.is_set() and self._slot.empty:
+                    break
+                continue
+            started = time.monotonic()
+            try:
+                result = self.process_frame(img, ts)
+                if result is not None and preview is not None and preview.due(started):
+                    # Before recycle: the preview copies (a downscaled) img
+                    preview.offer(img if recycle else None, result)
+            except Exception as exc:
+                failures += 1
+                if failures == 1:
+                    logger.exception("Frame processing failed, skipping the frame")
+                if failures >= MAX_FRAME_ERRORS:
+                    self.error = f"{failures} frames in a row failed: {exc!r}"
+                    logger.error("Stopping inference: %s", self.error)
+                    return
+                continue
+            finally:
+                if recycle:
+                    self._slot.recycle(img)
+            failures = 0
+            if result is None:
+                # Live-stream backend: this frame's landmarks arrive with a later call
+                continue
+            finished_at = result.processed_at = time.monotonic()
+            if inference is not None:
+                inference.append(finished_at - started)
+            self._publish(result)
+            delay = self.scheduler.frame_done(len(result.landmarks) > 0, started, finished_at)
+            if self.paced and delay > 0:
+                self._stop.wait(delay)
+
+    def process_frame(self, img: np.ndarray, timestamp: float) -> Optional[FrameResult]:
+        """Run the detector on one frame into a pooled FrameResult (caller must release() it).
+
+        Returns None when a live-stream backend has no new results yet.
+        """
+        if self.source.provides_landmarks:
+            result = self._free.popleft() if self._free else self._newResult()
+            result.timestamp = timestamp
+            self.source.fill(img, result)
+            return result
+        self.detector.findHands(img, draw=False)
+        if not self.detector.freshResults:
+            return None
+        result = self._free.popleft() if self._free else self._newResult()
+        result.timestamp = timestamp
+        result.landmarks = self.detector.findLandmarks(img, out=result.buffer)
+        result.labels[:] = self.detector.handedness
+        result.height, result.width = img.shape[:2]
+        return result
+
+    def _publish(self, result: FrameResult) -> None:
+        if not self.source.realtime:
+            # Offline sources: wait for the async side rather than drop anything
+            while not self._stop.is_set():
+                try:
+                    self._results.put(result, timeout=0.2)
+                    break
+                except queue.Full:
+                    continue
+        else:
+            # Keep the newest results if the async side falls behind
+            while True:
+                try:
+                    self._results.put_nowait(result)
+                    break
+                except queue.Full:
+                    try:
+                        self.release(self._results.get_nowait())
+                    except queue.Empty:
+                        pass
+        self._wake()
+
+    def _wake(self) -> None:
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            # Event loop already closed during shutdown
+            pass
@@ -0,0 +1,55 @@
+from typing import Any, Dict, Optional
+
+
+class AdaptiveFrameScheduler:
+    """Paces the inference thread.
+
+    Runs at ``idle_fps`` (presence detection) while no hand is in view and
+    jumps to ``active_fps`` on the first frame with a hand. It drops back to
+    idle after ``idle_after_s`` without hands. The active rate is capped at
+    what inference can sustain, measured as a moving average. A rate of 0
+    means no pacing: frames run as fast as inference allows.
+    """
+
+    IDLE = "idle"
+    ACTIVE = "active"
+
+    def __init__(self, active_fps: float = 30.0, idle_fps: float = 4.0, idle_after_s: float = 2.0) -> None:
+        self.active_fps = active_fps
+        self.idle_fps = idle_fps
+        self.idle_after_s = idle_after_s
+        self.mode = self.IDLE
+        self.target_fps = idle_fps
+        self.effective_fps = 0.0
+        self.inference_s = 0.0
+        self._last_hand_at = 0.0
+        self._last_start: Optional[float] = None
+
+    def frame_done(self, hands_found: bool, started_at: float, finished_at: float) -> float:
+        """Record one processed frame and return how long to wait before the next."""
+        took = finished_at - started_at
+        self.inference_s = took if not self.inference_s else 0.9 * self.inference_s + 0.1 * took
+        if self._last_start is not None and started_at > self._last_start:
+            fps = 1.0 / (started_at - self._last_start)
+            self.effective_fps = fps if not self.effective_fps else 0.9 * self.effective_fps + 0.1 * fps
+        self._last_start = started_at
+
+        if hands_found:
+            self._last_hand_at = finished_at
+            self.mode = self.ACTIVE
+        elif self.mode == self.ACTIVE and finished_at - self._last_hand_at > self.idle_after_s:
+            self.mode = self.IDLE
+
+        target = self.active_fps if self.mode == self.ACTIVE else self.idle_fps
+        if self.inference_s > 0 and (target <= 0 or target > 1.0 / self.inference_s):
+            target = 1.0 / self.inference_s
+        self.target_fps = max(target, 0.0)
+        return max(0.0, 1.0 / target - took) if target > 0 else 0.0
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "target_fps": round(self.target_fps, 1),
+            "effective_fps": round(self.effective_fps, 1),
+            "inference_ms": round(self.inference_s * 1000, 1),
+        }
@@ -0,0 +1,196 @@
+"""Frame sources for FramePipeline.
+
+- ``CameraSource``: a live ``cv2.VideoCapture`` device (the default).
+- ``VideoFileSource``: a recorded video, timestamped by media time.
+- ``ImageDirectorySource``: sorted still images played at a fixed rate.
+- ``LandmarkTraceSource``: a ``.gstrec`` landmark recording (see
+  landmark_recording) that skips inference entirely.
+
+Realtime sources produce frames at their own pace and the pipeline keeps only
+the newest one. Offline sources are read exactly as fast as the pipeline
+consumes them, so no frame is dropped and a replay runs as fast as the
+slowest stage allows.
+"""
+import os
+import time
+from typing import Any, List, Tuple
+
+import cv2
+
+from .landmark_recording import LABELS, open_recording
+
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class FrameSource:
+    # Frames arrive in real time (drop stale ones) vs. on demand (never drop)
+    realtime = False
+    # read() yields trace record indices for fill() instead of images
+    provides_landmarks = False
+
+    def open(self) -> None:
+        pass
+
+    def read(self, buf: Any = None) -> Tuple[bool, Any, float]:
+        """Next ``(ok, frame, timestamp_s)``; ``ok`` is False on a failed read or at the end."""
+        raise NotImplementedError
+
+    @property
+    def finished(self) -> bool:
+        """True once an offline source has nothing left to read."""
+        return False
+
+    def release(self) -> None:
+        pass
+
+
+class CameraSource(FrameSource):
+    realtime = True
+
+    def __init__(self, index: int = 0, width: int = 1280, height: int = 720) -> None:
+        self.index = index
+        self.width, self.height = width, height
+        self.cap = None
+
+    def open(self) -> None:
+        self.cap = cv2.VideoCapture(self.index)
+        self.cap.set(3, self.width)
+        self.cap.set(4, self.height)
+
+    def read(self, buf: Any = None) -> Tuple[bool, Any, float]:
+        ok, img = self.cap.read(buf) if buf is not None else self.cap.read()
+        return ok, img, time.monotonic()
+
+    def release(self) -> None:
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+
+class VideoFileSource(FrameSource):
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.cap = None
+        self._fps = 30.0
+        self._index = 0
+        self._finished = False
+
+    def open(self) -> None:
+        self.cap = cv2.VideoCapture(self.path)
+        if not self.cap.isOpened():
+            raise FileNotFoundError(f"Could not open video: {self.path}")
+        self._fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self._index = 0
+        self._finished = False
+
+    def read(self, buf: Any = None) -> Tuple[bool, Any, float]:
+        ok, img = self.cap.read(buf) if buf is not None else self.cap.read()
+        if not ok:
+            self._finished = True
+            return False, None, 0.0
+        timestamp = self._index / self._fps
+        self._index += 1
+        return True, img, timestamp
+
+    @property
+    def finished(self) -> bool:
+        return self._finished
+
+    def release(self) -> None:
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+
+class ImageDirectorySource(FrameSource):
+    def __init__(self, path: str, fps: float = 30.0) -> None:
+        self.path = path
+        self.fps = fps
+        self.files: List[str] = []
+        self._index = 0
+
+    def open(self) -> None:
+        self.files = sorted(
+            os.path.join(self.path, name) for name in os.listdir(self.path) if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        if not self.files:
+            raise FileNotFoundError(f"No images in {self.path}")
+        self._index = 0
+
+    def read(self, buf: Any = None) -> Tuple[bool, Any, float]:
+        while self._index < len(self.files):
+            index = self._index
+            self._index += 1
+            img = cv2.imread(self.files[index])
+            if img is not None:
+                return True, img, index / self.fps
+        return False, None, 0.0
+
+    @property
+    def finished(self) -> bool:
+        return self._index >= len(self.files)
+
+
+class LandmarkTraceSource(FrameSource):
+    """Replays a ``.gstrec`` landmark recording (see landmark_recording); no model runs."""
+
+    provides_landmarks = True
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.records = None
+        self._index = 0
+        self._count = 0
+
+    def open(self) -> None:
+        self.header, self.records = open_recording(self.path)
+        self._count = len(self.records)
+        self._index = 0
+
+    def read(self, buf: Any = None) -> Tuple[bool, Any, float]:
+        if self._index >= self._count:
+            return False, None, 0.0
+        index = self._index
+        self._index += 1
+        return True, index, float(self.records[index]["timestamp"])
+
+    def fill(self, index: int, result) -> None:
+        """Decode record ``index`` into a pooled FrameResult."""
+        rec = self.records[index]
+        n = min(int(rec["hands"]), len(result.buffer))
+        width, height = int(rec["width"]), int(rec["height"])
+        hands = result.buffer[:n]
+        xy = rec["xy"][:n]
+        hands[..., 0] = xy[..., 0]
+        hands[..., 1] = xy[..., 1]
+        hands[..., 0] *= width / 65535.0
+        hands[..., 1] *= height / 65535.0
+        hands[..., 2] = 0
+        result.landmarks = hands
+        result.labels[:] = [LABELS[code] for code in rec["handedness"][:n]]
+        result.width, result.height = width, height
+
+    @property
+    def finished(self) -> bool:
+        return self._index >= self._count
+
+
+def provides_landmarks(spec: str) -> bool:
+    """Whether ``open_source(spec)`` replays recorded landmarks (no detector needed)."""
+    return str(spec).strip().lower().endswith(".gstrec")
+
+
+def open_source(spec: str, width: int = 1280, height: int = 720) -> FrameSource:
+    """Source for a ``GESTURE_SOURCE``-style spec: a camera index, a video file,
+    a directory of images or a ``.gstrec`` landmark recording."""
+    spec = str(spec).strip()
+    if spec.isdigit():
+        return CameraSource(int(spec), width, height)
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec)
+    if provides_landmarks(spec):
+        return LandmarkTraceSource(spec)
+    if not os.path.exists(spec):
+        raise FileNotFoundError(f"Gesture source not found: {spec}")
+    return VideoFileSource(spec)
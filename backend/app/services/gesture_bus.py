@@ -0,0 +1,243 @@
+import asyncio
+import errno
+import json
+import logging
+import os
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from .websocket_manager import WebSocketManager, encode
+
+
+logger = logging.getLogger("uvicorn.error")
+
+
+def parse_address(address: str) -> Tuple[str, Any]:
+    """Return ("tcp", (host, port)) for ``host:port`` or ("unix", path) otherwise."""
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and "/" not in address and "\\" not in address:
+        return "tcp", (host or "127.0.0.1", int(port))
+    return "unix", address
+
+
+class _Subscriber:
+    """One API process: its reported client count and outbound queue, drained
+    by its own sender task."""
+
+    __slots__ = ("writer", "clients", "queue", "wake", "task")
+
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self.writer = writer
+        self.clients = 0
+        self.queue: Deque[bytes] = deque()
+        self.wake = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+
+class GesturePublisher:
+    """Runs in the inference worker and fans gesture events out to API processes.
+
+    Exposes the same ``broadcast`` / ``client_count`` / ``wait_for_subscribers``
+    interface as ``WebSocketManager`` so ``GestureLoop`` can publish to either.
+    Each API process reports how many WebSocket clients it has; the worker only
+    keeps the camera open while the total is above zero. Like WebSocketManager,
+    ``broadcast()`` only appends the encoded event to each subscriber's bounded
+    queue and a sender task per subscriber does the writes, so the gesture loop
+    never waits on an API process. One whose queue fills up (``queue_size``)
+    or whose socket doesn't drain within ``drain_timeout`` seconds is
+    disconnected; it reconnects and starts fresh.
+    """
+
+    def __init__(self, address: str, queue_size: int = 256, drain_timeout: float = 1.0) -> None:
+        self.address = address
+        self.queue_size = queue_size
+        self.drain_timeout = drain_timeout
+        self._server: asyncio.AbstractServer | None = None
+        self._subscribers: Dict[asyncio.StreamWriter, _Subscriber] = {}
+        # Immutable view for broadcast(), replaced whenever a subscriber comes or goes
+        self._snapshot: Tuple[_Subscriber, ...] = ()
+        self.client_count = 0
+        self.has_subscribers = asyncio.Event()
+        self.evicted = 0
+
+    async def start(self) -> None:
+        kind, addr = parse_address(self.address)
+        if kind == "tcp":
+            self._server = await asyncio.start_server(self._on_subscriber, addr[0], addr[1])
+        else:
+            if os.path.exists(addr):
+                await self._remove_stale_socket(addr)
+            self._server = await asyncio.start_unix_server(self._on_subscriber, path=addr)
+        logger.info("[gesture bus] publishing on %s", self.address)
+
+    async def close(self) -> None:
+        for writer in list(self._subscribers):
+            self._drop(writer)
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    @staticmethod
+    async def _remove_stale_socket(path: str) -> None:
+        # A leftover socket file from a worker that died refuses connections; a
+        # live worker accepts them and keeps its address
+        try:
+            _, writer = await asyncio.open_unix_connection(path)
+        except OSError:
+            os.unlink(path)
+            return
+        writer.close()
+        raise OSError(errno.EADDRINUSE, f"Another gesture worker is already publishing on {path}")
+
+    async def _on_subscriber(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        sub = _Subscriber(writer)
+        sub.task = asyncio.create_task(self._sender(sub))
+        self._subscribers[writer] = sub
+        self._counts_changed()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    msg = json.loads(line)
+                    sub.clients = int(msg.get("clients", 0))
+                    self._counts_changed()
+                except Exception:
+                    continue
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._drop(writer)
+
+    async def broadcast(self, event: Dict[str, Any]) -> None:
+        data = (encode(event) + "\n").encode()
+        for sub in self._snapshot:
+            if len(sub.queue) >= self.queue_size:
+                self._evict(sub.writer, "send queue full")
+                continue
+            sub.queue.append(data)
+            sub.wake.set()
+
+    async def _sender(self, sub: _Subscriber) -> None:
+        queue, writer = sub.queue, sub.writer
+        try:
+            while True:
+                await sub.wake.wait()
+                sub.wake.clear()
+                while queue:
+                    # Everything queued since the last write goes out together
+                    data = b"".join(queue)
+                    queue.clear()
+                    writer.write(data)
+                    await asyncio.wait_for(writer.drain(), self.drain_timeout)
+        except asyncio.CancelledError:
+            pass
+        except asyncio.TimeoutError:
+            self._evict(writer, f"not drained in {self.drain_timeout:g}s")
+        except Exception:
+            self._drop(writer)
+
+    def _drop(self, writer: asyncio.StreamWriter) -> None:
+        sub = self._subscribers.pop(writer, None)
+        if sub is not None:
+            self._counts_changed()
+            if sub.task is not asyncio.current_task():
+                sub.task.cancel()
+        writer.close()
+
+    def _evict(self, writer: asyncio.StreamWriter, reason: str) -> None:
+        logger.warning("[gesture bus] disconnecting a subscriber that stopped reading (%s)", reason)
+        self.evicted += 1
+        self._drop(writer)
+
+    async def get_client_count(self) -> int:
+        return self.client_count
+
+    async def wait_for_subscribers(self, timeout: Optional[float] = None) -> bool:
+        """Wait until some API process reports a client; False on timeout."""
+        if self.client_count:
+            return True
+        try:
+            await asyncio.wait_for(self.has_subscribers.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def _counts_changed(self) -> None:
+        self._snapshot = tuple(self._subscribers.values())
+        self.client_count = sum(sub.clients for sub in self._snapshot)
+        if self.client_count:
+            self.has_subscribers.set()
+        else:
+            self.has_subscribers.clear()
+
+
+class GestureSubscriber:
+    """Runs in each API process: relays worker events to local WebSocket clients."""
+
+    def __init__(self, address: str, ws_manager: WebSocketManager, report_interval: float = 0.2) -> None:
+        self.address = address
+        self.ws_manager = ws_manager
+        self.report_interval = report_interval
+        self.running = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self.running = True
+        # stop() cancels this task, so a pending readline() or backoff ends at once
+        self._task = asyncio.current_task()
+        backoff = 0.5
+        while self.running:
+            try:
+                reader, writer = await self._connect()
+            except OSError:
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 5.0)
+                continue
+            backoff = 0.5
+            logger.info("[gesture bus] connected to worker at %s", self.address)
+            reporter = asyncio.create_task(self._report_clients(writer))
+            try:
+                while self.running:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue
+                    # Forward the worker's encoding as is rather than re-serializing
+                    await self.ws_manager.broadcast(event, line.decode().rstrip("\n"))
+            except ConnectionError:
+                pass
+            finally:
+                reporter.cancel()
+                writer.close()
+
+    async def stop(self) -> None:
+        self.running = False
+        task, self._task = self._task, None
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _connect(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        kind, addr = parse_address(self.address)
+        if kind == "tcp":
+            return await asyncio.open_connection(addr[0], addr[1])
+        return await asyncio.open_unix_connection(addr)
+
+    async def _report_clients(self, writer: asyncio.StreamWriter) -> None:
+        last = -1
+        try:
+            while True:
+                count = self.ws_manager.client_count
+                if count != last:
+                    writer.write((json.dumps({"clients": count}) + "\n").encode())
+                    await writer.drain()
+                    last = count
+                await asyncio.sleep(self.report_interval)
+        except (asyncio.CancelledError, ConnectionError):
+            pass
@@ -0,0 +1,366 @@
+"""Declarative gestures from gestures.json, compiled into one vectorized plan.
+
+gestures.json::
+
+    {
+      "defaults": {"hand": "Left", "area": [0.054, 0.326], "cooldown": 0.25},
+      "gestures": [
+        {"action": "toggle_play", "pair": [4, 12], "below": 0.031, "release": 0.036,
+         "unless": [{"hand": "Right", "finger": "index", "up": true}]},
+        {"action": "volume_control", "type": "range", "pair": [4, 8], "range": [0.027, 0.195],
+         "when": [{"hand": "Right", "finger": "index", "up": true}]}
+      ]
+    }
+
+Every gesture measures the distance between two landmarks (``pair``) of one
+``hand``, in frame widths:
+
+- ``pinch`` (default): edge-triggered, one event per physical pinch. Each
+  gesture steps through ``idle -> armed -> fired -> released -> idle``: it
+  arms when the distance drops below ``below``, fires once it has been held
+  for ``hold`` seconds (default 0, the same frame), and stays fired however
+  long the pinch is held. It is released when the distance rises above
+  ``release`` (hysteresis, defaults to ``below``) or the hand is lost, and
+  can only arm again ``cooldown`` seconds later with the pinch open.
+- ``range``: active whenever its conditions hold; the distance is mapped
+  from ``range`` onto a 0–100 ``value``. The mapped distance goes through a
+  One-Euro filter (``smoothing``: ``min_cutoff`` Hz at rest, rising by
+  ``beta`` Hz per range/second of movement, so slow adjustments are steady
+  and fast ones don't lag; ``null`` disables it), and a value is only emitted
+  once it moved at least ``dead_band`` (or reached 0 / 100), at most
+  ``max_rate`` times per second. The cap is per gesture, not per client:
+  WebSocketManager coalesces a slow client's updates to the latest value.
+
+``area`` gates on the gesture hand's bbox as a fraction of the frame (null
+disables it). ``when`` conditions must all hold, any ``unless`` condition
+suppresses the gesture; a condition is a finger (thumb/index/middle/ring/pinky)
+of a hand being ``up`` or not, and is false when that hand isn't in view.
+
+The legacy flat format (``{"pinch_thumb_middle": "toggle_play", ...}``) is
+still accepted and expands to the original built-in gestures.
+"""
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+from . import landmarks as lmk
+
+
+HANDS = ("Left", "Right")
+HAND_INDEX = {name: i for i, name in enumerate(HANDS)}
+FINGERS = ("thumb", "index", "middle", "ring", "pinky")
+PINCH = "pinch"
+RANGE = "range"
+
+DEFAULTS: Dict[str, Any] = {"hand": "Left", "area": [0.054, 0.326], "cooldown": 0.25}
+ONE_EURO: Dict[str, float] = {"min_cutoff": 1.0, "beta": 10.0, "d_cutoff": 1.0}
+RANGE_DEFAULTS: Dict[str, Any] = {"smoothing": ONE_EURO, "dead_band": 2.0, "max_rate": 10.0}
+# Pinch states
+IDLE, ARMED, FIRED, RELEASED = 0, 1, 2, 3
+STATES = ("idle", "armed", "fired", "released")
+# Right index up switches the left hand from media pinches to volume
+_VOLUME_MODE = [{"hand": "Right", "finger": "index", "up": True}]
+# Legacy mapping keys and what they meant before gestures were declarative
+LEGACY_GESTURES: Dict[str, Dict[str, Any]] = {
+    "pinch_thumb_middle": {"pair": [4, 12], "below": 0.031, "unless": _VOLUME_MODE},
+    "pinch_thumb_ring": {"pair": [4, 16], "below": 0.031, "unless": _VOLUME_MODE},
+    "pinch_thumb_pinky": {"pair": [4, 20], "below": 0.031, "unless": _VOLUME_MODE},
+    "pinch_thumb_index": {"type": RANGE, "pair": [4, 8], "range": [0.027, 0.195], "when": _VOLUME_MODE},
+}
+DEFAULT_MAPPING = {
+    "pinch_thumb_middle": "toggle_play",
+    "pinch_thumb_ring": "next_track",
+    "pinch_thumb_pinky": "previous_track",
+    "pinch_thumb_index": "volume_control",
+}
+
+
+class GestureSpec:
+    """One gesture definition with defaults applied and values validated."""
+
+    __slots__ = (
+        "name", "action", "kind", "hand", "pair", "below", "release", "range", "area", "hold", "cooldown",
+        "min_cutoff", "beta", "d_cutoff", "dead_band", "min_interval", "when", "unless",
+    )
+
+    def __init__(self, definition: Dict[str, Any], defaults: Dict[str, Any]) -> None:
+        d = {**DEFAULTS, **defaults, **definition}
+        if "action" not in d:
+            raise ValueError(f"Gesture without an action: {definition}")
+        self.action: str = d["action"]
+        self.name: str = d.get("name", self.action)
+        self.kind: str = d.get("type", PINCH)
+        if self.kind not in (PINCH, RANGE):
+            raise ValueError(f"{self.name}: unknown gesture type {self.kind!r}")
+        self.hand = _hand(d["hand"], self.name)
+        self.pair = tuple(int(i) for i in d["pair"])
+        if len(self.pair) != 2 or not all(0 <= i < lmk.NUM_LANDMARKS for i in self.pair):
+            raise ValueError(f"{self.name}: pair must be two landmark ids in 0..20")
+        if self.kind == PINCH:
+            self.below = float(d["below"])
+            self.release = float(d.get("release", self.below))
+            if self.release < self.below:
+                raise ValueError(f"{self.name}: release must be >= below")
+            self.range = (0.0, 1.0)
+            # No smoothing or rate limit: pinches only emit on their edge
+            self.min_cutoff, self.beta, self.d_cutoff = np.inf, 0.0, 1.0
+            self.dead_band = self.min_interval = 0.0
+        else:
+            d = {**RANGE_DEFAULTS, **d}
+            self.below = self.release = 0.0
+            self.range = (float(d["range"][0]), float(d["range"][1]))
+            smoothing = {**ONE_EURO, **d["smoothing"]} if d["smoothing"] else {"min_cutoff": np.inf}
+            self.min_cutoff = float(smoothing["min_cutoff"])
+            self.beta = float(smoothing.get("beta", 0.0))
+            self.d_cutoff = float(smoothing.get("d_cutoff", 1.0))
+            if self.min_cutoff <= 0 or self.d_cutoff <= 0:
+                raise ValueError(f"{self.name}: smoothing cutoffs must be > 0")
+            self.dead_band = float(d["dead_band"] or 0.0)
+            self.min_interval = 1.0 / float(d["max_rate"]) if d["max_rate"] else 0.0
+        area = d.get("area")
+        self.area = (float(area[0]), float(area[1])) if area else (-np.inf, np.inf)
+        self.hold = float(d.get("hold", 0.0))
+        self.cooldown = float(d.get("cooldown", 0.0))
+        self.when = [_condition(c, self.name) for c in d.get("when", [])]
+        self.unless = [_condition(c, self.name) for c in d.get("unless", [])]
+
+
+def _hand(name: str, gesture: str) -> int:
+    if name not in HAND_INDEX:
+        raise ValueError(f"{gesture}: hand must be one of {HANDS}")
+    return HAND_INDEX[name]
+
+
+def _condition(condition: Dict[str, Any], gesture: str) -> tuple:
+    finger = condition["finger"]
+    if finger not in FINGERS:
+        raise ValueError(f"{gesture}: finger must be one of {FINGERS}")
+    return _hand(condition["hand"], gesture), FINGERS.index(finger), bool(condition.get("up", True))
+
+
+def parse_gestures(config: Dict[str, Any]) -> List[GestureSpec]:
+    """GestureSpecs from a gestures.json document (declarative or legacy format)."""
+    if "gestures" not in config:
+        config = {
+            "gestures": [
+                {**LEGACY_GESTURES[key], "name": key, "action": action}
+                for key, action in config.items()
+                if key in LEGACY_GESTURES and action
+            ]
+        }
+    defaults = config.get("defaults", {})
+    return [GestureSpec(g, defaults) for g in config["gestures"]]
+
+
+class GesturePlan:
+    """All gestures evaluated together as arrays over ``G`` gestures.
+
+    ``evaluate()`` handles one frame and advances the pinch state machines;
+    ``features()`` computes the same per-frame quantities for a batch of
+    frames at once (used by the offline parameter sweep).
+    """
+
+    def __init__(self, gestures: Sequence[GestureSpec]) -> None:
+        self.gestures = list(gestures)
+        g = self.gestures
+        self.hand = np.array([s.hand for s in g], dtype=np.intp)
+        self.pairs = np.array([s.pair for s in g], dtype=np.intp).reshape(-1, 2)
+        self.is_range = np.array([s.kind == RANGE for s in g], dtype=bool)
+        self.below = np.array([s.below for s in g], dtype=np.float32)
+        self.release = np.array([s.release for s in g], dtype=np.float32)
+        self.range_lo = np.array([s.range[0] for s in g], dtype=np.float32)
+        self.range_span = np.array([s.range[1] - s.range[0] for s in g], dtype=np.float32)
+        self.area_min = np.array([s.area[0] for s in g], dtype=np.float32)
+        self.area_max = np.array([s.area[1] for s in g], dtype=np.float32)
+        self.hold = np.array([s.hold for s in g], dtype=np.float64)
+        self.cooldown = np.array([s.cooldown for s in g], dtype=np.float64)
+        self.min_cutoff = np.array([s.min_cutoff for s in g], dtype=np.float64)
+        self.beta = np.array([s.beta for s in g], dtype=np.float64)
+        self.d_cutoff = np.array([s.d_cutoff for s in g], dtype=np.float64)
+        self.dead_band = np.array([s.dead_band for s in g], dtype=np.float64)
+        self.min_interval = np.array([s.min_interval for s in g], dtype=np.float64)
+        # Distinct finger conditions and which gestures need / are blocked by them
+        conditions = sorted({c for s in g for c in s.when + s.unless})
+        index = {c: i for i, c in enumerate(conditions)}
+        self.cond_hand = np.array([c[0] for c in conditions], dtype=np.intp)
+        self.cond_finger = np.array([c[1] for c in conditions], dtype=np.intp)
+        self.cond_up = np.array([c[2] for c in conditions], dtype=bool)
+        self.when = np.zeros((len(g), len(conditions)), dtype=bool)
+        self.unless = np.zeros((len(g), len(conditions)), dtype=bool)
+        for i, s in enumerate(g):
+            for c in s.when:
+                self.when[i, index[c]] = True
+            for c in s.unless:
+                self.unless[i, index[c]] = True
+        self.when_t = np.ascontiguousarray(self.when.T)
+        self.unless_t = np.ascontiguousarray(self.unless.T)
+        # Flat indices into (hand, landmark) and (hand, finger) for features()
+        self.pair_a = self.hand * lmk.NUM_LANDMARKS + self.pairs[:, 0]
+        self.pair_b = self.hand * lmk.NUM_LANDMARKS + self.pairs[:, 1]
+        self.cond_flat = self.cond_hand * len(FINGERS) + self.cond_finger
+        # Pinch state machines, and what evaluate() emits for the current frame
+        self.state = np.full(len(g), IDLE, dtype=np.int8)
+        self.armed_at = np.zeros(len(g), dtype=np.float64)
+        self.released_at = np.zeros(len(g), dtype=np.float64)
+        # Range filters (see follow())
+        self.filters = new_filters(len(g))
+        self.emit = np.zeros(len(g), dtype=bool)
+        self.values = np.zeros(len(g), dtype=np.float64)
+        self._present = np.zeros(len(HANDS), dtype=bool)
+        self._select = np.zeros(len(HANDS), dtype=np.intp)
+        self._hands = np.zeros((len(HANDS), lmk.NUM_LANDMARKS, 3), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.gestures)
+
+    def features(self, hands: np.ndarray, present: np.ndarray, width, height):
+        """Distances, eligibility (all gates except area) and gesture-hand area.
+
+        ``hands`` is ``(..., 2, 21, 3)`` in Left/Right order and ``present``
+        ``(..., 2)``; the results are ``(..., G)``.
+        """
+        width = np.asarray(width, dtype=np.float32)[..., None]
+        height = np.asarray(height, dtype=np.float32)[..., None]
+        boxes = lmk.bboxes(hands)
+        area = (boxes[..., 2] - boxes[..., 0]) * (boxes[..., 3] - boxes[..., 1]) / (width * height)
+        # Gathered with one flat index each: indexing with several index arrays
+        # allocates several times more per call, on every frame
+        fingers = lmk.fingers_up(hands).reshape(hands.shape[:-3] + (-1,))
+        cond = np.take(present, self.cond_hand, axis=-1) & (np.take(fingers, self.cond_flat, axis=-1) == self.cond_up)
+        points = hands.reshape(hands.shape[:-3] + (-1, 3))
+        a = np.take(points, self.pair_a, axis=-2)[..., :2]
+        b = np.take(points, self.pair_b, axis=-2)[..., :2]
+        dist = np.sqrt(((a - b) ** 2).sum(axis=-1)) / width
+        # Boolean matmul: any(when & ~cond) / any(unless & cond) per gesture
+        eligible = np.take(present, self.hand, axis=-1) & ~(~cond @ self.when_t) & ~(cond @ self.unless_t)
+        return dist, eligible, np.take(area, self.hand, axis=-1)
+
+    def reset(self) -> None:
+        """Every pinch back to idle and fresh range filters, e.g. when a replayed
+        recording starts over and its timestamps jump back."""
+        self.state[:] = IDLE
+        self.armed_at[:] = 0
+        self.released_at[:] = 0
+        self.filters = new_filters(len(self.gestures))
+        self.emit[:] = False
+
+    def states(self) -> Dict[str, str]:
+        return {spec.name: STATES[state] for spec, state in zip(self.gestures, self.state.tolist())}
+
+    def evaluate(self, landmarks: np.ndarray, labels: Sequence[str], width: int, height: int, now: float) -> np.ndarray:
+        """Gestures to emit for one frame: pinches that just fired and every
+        active range gesture (with its ``values``)."""
+        present, select = self._present, self._select
+        present[:] = False
+        select[:] = 0
+        for i, label in enumerate(labels):
+            slot = HAND_INDEX.get(label)
+            if slot is not None:
+                # Like before, the last hand with a label wins
+                present[slot] = True
+                select[slot] = i
+        if not present.any():
+            # Releases held pinches and resets the range filters
+            self.emit[:] = False
+            advance(self.state, self.armed_at, self.released_at, self.emit, self.emit, now, self.hold, self.cooldown)
+            self.filters[TRACKING][:] = False
+            return self.emit
+        np.take(landmarks, select, axis=0, out=self._hands)
+        dist, eligible, area = self.features(self._hands, present, width, height)
+        eligible &= (area > self.area_min) & (area < self.area_max)
+        pinch = eligible & ~self.is_range
+        fired = advance(
+            self.state,
+            self.armed_at,
+            self.released_at,
+            pinch & (dist < self.below),
+            pinch & (dist < self.release),
+            now,
+            self.hold,
+            self.cooldown,
+        )
+        changed = follow(
+            self.filters,
+            self.values,
+            (dist - self.range_lo) / self.range_span,
+            eligible & self.is_range,
+            now,
+            self.min_cutoff,
+            self.beta,
+            self.d_cutoff,
+            self.dead_band,
+            self.min_interval,
+        )
+        np.logical_or(fired, changed, out=self.emit)
+        return self.emit
+
+
+def advance(state, armed_at, released_at, pinched, held, now: float, hold, cooldown) -> np.ndarray:
+    """One frame of the pinch state machine, in place; returns where it fired.
+
+    ``pinched`` is the distance below ``below`` and ``held`` below ``release``
+    (both false when the hand is missing or gated out). Works element-wise on
+    any shape: per gesture in GesturePlan, per parameter combination in the
+    offline sweep.
+    """
+    released = (state == FIRED) & ~held
+    state[released] = RELEASED
+    released_at[released] = now
+    state[(state == RELEASED) & ~held & (now - released_at >= cooldown)] = IDLE
+    armed = (state == IDLE) & pinched
+    state[armed] = ARMED
+    armed_at[armed] = now
+    waiting = state == ARMED
+    state[waiting & ~held] = IDLE
+    fired = waiting & held & (now - armed_at >= hold)
+    state[fired] = FIRED
+    return fired
+
+
+# Per-gesture range filter state: filtered position, filtered speed, last
+# update, whether it is tracking, and the last emitted value and its time
+POSITION, SPEED, SEEN, TRACKING, SENT, SENT_AT = range(6)
+
+
+def new_filters(shape) -> tuple:
+    return (
+        np.zeros(shape),
+        np.zeros(shape),
+        np.zeros(shape),
+        np.zeros(shape, dtype=bool),
+        np.full(shape, -np.inf),
+        np.full(shape, -np.inf),
+    )
+
+
+def _alpha(cutoff, dt):
+    return 1.0 / (1.0 + 1.0 / (2 * np.pi * cutoff * dt))
+
+
+def follow(filters: tuple, values, position, active, now: float, min_cutoff, beta, d_cutoff, dead_band, min_interval):
+    """One frame of range smoothing (One-Euro filter) and change-only emission, in place.
+
+    ``position`` is the distance mapped onto the range (0-1, unclipped);
+    ``values`` receives the smoothed 0-100 value. Returns where a value should
+    be emitted. Element-wise like advance().
+    """
+    x, speed, seen, tracking, sent, sent_at = filters
+    dt = now - seen
+    step = active & tracking & (dt > 0)
+    dt = np.where(step, dt, 1.0)
+    np.copyto(speed, speed + _alpha(d_cutoff, dt) * ((position - x) / dt - speed), where=step)
+    np.copyto(x, x + _alpha(min_cutoff + beta * np.abs(speed), dt) * (position - x), where=step)
+    # (Re)entering the gesture starts from the raw position, without lag
+    start = active & ~tracking
+    np.copyto(x, position, where=start)
+    np.copyto(speed, 0.0, where=start)
+    np.copyto(seen, now, where=active)
+    tracking[...] = active
+    np.clip(x, 0.0, 1.0, out=values)
+    values *= 100
+    moved = np.abs(values - sent)
+    emit = active & ((moved >= dead_band) | ((moved > 0) & ((values == 0) | (values == 100))))
+    emit &= now - sent_at >= min_interval
+    np.copyto(sent, values, where=emit)
+    np.copyto(sent_at, now, where=emit)
+    return emit
@@ -1,121 +1,342 @@
 import asyncio
 import json
-import cv2
-import numpy as np
-from typing import Dict, Any
-from .hand_tracking import HandDetector
+import logging
+import time
+from typing import TYPE_CHECKING, Dict, Any, List, Optional
+from ..config.settings import get_settings
+from .frame_scheduler import AdaptiveFrameScheduler
+from .landmark_stream import landmark_stream
+from .preview import preview
 from .websocket_manager import manager
 
+# cv2, mediapipe and numpy are imported on first use (see build_detector) so
+# importing the app and serving /api/* never pays for the CV stack
+if TYPE_CHECKING:
+    from .frame_pipeline import FramePipeline, FrameResult
+    from .gesture_engine import GesturePlan
+    from .hand_tracking import HandDetector
+    from .landmark_recording import LandmarkRecorder
+
+logger = logging.getLogger("uvicorn.error")
+
 
 class GestureLoop:
-    def __init__(self, mapping_path: str = "gestures.json") -> None:
+    def __init__(self, mapping_path: str = "gestures.json", sink: Optional[Any] = None) -> None:
         self.mapping_path = mapping_path
-        self.detector = HandDetector(detectionCon=0.7)
-        self.cap = None
+        # Where events go: the local WebSocketManager, or a GesturePublisher in the worker process
+        self.sink = sink or manager
+        settings = get_settings()
+        self.settings = settings
+        # Built lazily on the first subscriber (or by warm()), off the event loop
+        self.detector: "HandDetector | None" = None
+        self._detector_task: Optional[asyncio.Task] = None
+        self.scheduler = AdaptiveFrameScheduler(
+            active_fps=settings.gesture_active_fps,
+            idle_fps=settings.gesture_idle_fps,
+            idle_after_s=settings.gesture_idle_after_s,
+        )
+        self.pipeline: "FramePipeline | None" = None
+        # Camera lifecycle: keep it open camera_grace_s after the last client leaves,
+        # or for the whole process lifetime in always-warm mode
+        self.camera_grace_s = settings.gesture_camera_grace_s
+        self.always_warm = settings.gesture_camera_always_warm
+        self._no_clients_since = 0.0
+        self._session_started: Optional[float] = None
+        self._awaiting_first_frame = self._awaiting_first_gesture = False
+        # detector_init_ms and latest camera_open_ms / time_to_first_frame_ms /
+        # time_to_first_gesture_ms
+        self.metrics: Dict[str, float] = {}
         self.running = False
-        self.minDist, self.maxDist = 35, 250
-        self.cooldown_s = 0.5
-        self._last_action_at: Dict[str, float] = {}
+        self._stopping: Optional[asyncio.Event] = None
+        # Why the pipeline last failed to start (shown by status()); retried after retry_s
+        self.error: Optional[str] = None
+        self.retry_s = 5.0
+        self.capture_size = (settings.gesture_capture_width, settings.gesture_capture_height)
+        # gestures.json as loaded; compiled into self.plan (see gesture_engine) once the
+        # CV stack is loaded. Distances are in frame widths and areas fractions of the
+        # frame, so capture size is only a performance knob.
         self.mapping: Dict[str, Any] = {}
-        # area gating similar to FullyIntegrated.py
-        self.minArea, self.maxArea = 500, 3000
+        self.plan: "GesturePlan | None" = None
+        # Events are reused rather than rebuilt per frame; sinks serialize them
+        # before broadcast() returns, so mutating a range gesture's value is safe
+        self._events: List[Dict[str, Any]] = []
+        # Optional .gstrec recording of every frame with hands, plus what it emitted
+        self.recorder: "LandmarkRecorder | None" = None
+        # /ws/landmarks subscribers and /gestures/preview viewers keep the camera
+        # running like WebSocket clients
+        self.landmark_stream = landmark_stream
+        self.preview = preview
+        self._frame_actions = 0
+        self._frame_volume = -1
+
+    def build_detector(self) -> "HandDetector":
+        """Import the CV stack and build + warm up the MediaPipe graph (blocking)."""
+        if self.detector is not None:
+            return self.detector
+        started = time.perf_counter()
+        from .hand_tracking import HandDetector
+
+        settings = self.settings
+        detector = HandDetector(
+            maxHands=settings.gesture_max_hands,
+            detectionCon=0.7,
+            roi=settings.gesture_roi,
+            roiSize=settings.gesture_roi_size,
+            fullScanEvery=settings.gesture_roi_full_scan_every,
+            backend=settings.gesture_backend,
+            modelComplexity=settings.gesture_model_complexity,
+            modelPath=settings.gesture_model_path,
+            liveStream=settings.gesture_live_stream,
+        )
+        detector.warmup(*self.capture_size)
+        self.compile_gestures()
+        self.detector = detector
+        self.metrics["detector_init_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return detector
+
+    def compile_gestures(self) -> "GesturePlan":
+        """Compile the loaded gestures.json into the plan _handle_frame() evaluates;
+        enough on its own for sources that provide landmarks (no detector)."""
+        if self.plan is not None:
+            return self.plan
+        from .gesture_engine import DEFAULT_MAPPING, GesturePlan, RANGE, parse_gestures
+
+        try:
+            specs = parse_gestures(self.mapping)
+        except (KeyError, TypeError, ValueError) as exc:
+            logger.error("Invalid %s (%s), using the default gestures", self.mapping_path, exc)
+            specs = parse_gestures(DEFAULT_MAPPING)
+        self.plan = GesturePlan(specs)
+        self._events = [{"action": s.action, "value": 0} if s.kind == RANGE else {"action": s.action} for s in specs]
+        return self.plan
+
+    async def warm(self) -> None:
+        """Build the detector in a worker thread; concurrent callers share one build.
+
+        A no-op for sources that provide landmarks (.gstrec recordings), which
+        only need compile_gestures().
+        """
+        if self.detector is not None:
+            return
+        from .frame_sources import provides_landmarks
+
+        if provides_landmarks(self.settings.gesture_source):
+            return
+        if self._detector_task is None:
+            self._detector_task = asyncio.ensure_future(asyncio.to_thread(self.build_detector))
+        task = self._detector_task
+        try:
+            await task
+        except Exception as exc:
+            # Forget the failed build so the next attempt runs it again
+            if self._detector_task is task:
+                self._detector_task = None
+            self.error = f"Hand detector failed to load: {exc!r}"
+            raise
 
     def load_mapping(self) -> None:
         try:
             with open(self.mapping_path, "r", encoding="utf-8") as f:
                 self.mapping = json.load(f)
         except Exception:
-            # default mapping
+            # default mapping (legacy format, expanded by gesture_engine)
             self.mapping = {
                 "pinch_thumb_middle": "toggle_play",
                 "pinch_thumb_ring": "next_track",
                 "pinch_thumb_pinky": "previous_track",
                 "pinch_thumb_index": "volume_control",
             }
+        self.plan = None
 
     async def start(self) -> None:
         self.load_mapping()
         self.running = True
+        self._stopping = asyncio.Event()
         try:
+            if self.always_warm:
+                await self._start_pipeline()
             while self.running:
-                # Lazily open camera only if there are clients
-                if not self.cap or not self.cap.isOpened():
-                    if await manager.get_client_count() > 0:
-                        self.cap = cv2.VideoCapture(0)
-                        self.cap.set(3, 1280)
-                        self.cap.set(4, 720)
-                    else:
-                        await asyncio.sleep(0.2)
-                        continue
-
-                ok, img = self.cap.read()
-                if not ok:
-                    await asyncio.sleep(0.05)
-                    continue
-                img = self.detector.findHands(img)
-
-                leftHandLmList, rightFingers = [], None
-                if self.detector.results and self.detector.results.multi_hand_landmarks:
-                    for handNo in range(len(self.detector.results.multi_hand_landmarks)):
-                        lmList, bbox = self.detector.findPosition(img, handNo, draw=False)
-                        if not lmList:
-                            continue
-                        label = self.detector.results.multi_handedness[handNo].classification[0].label
-                        if label == "Left":
-                            leftHandLmList = lmList
-                            leftBbox = bbox
-                        elif label == "Right":
-                            rightFingers = self.detector.fingersUp(lmList)
-
-                if leftHandLmList:
-                    # Optional area gating (using last computed bbox from findPosition when hand labeled Left)
-                    try:
-                        xmin, ymin, xmax, ymax = leftBbox  # type: ignore[name-defined]
-                        area = (xmax - xmin) * (ymax - ymin) // 100
-                    except Exception:
-                        area = self.minArea + 1
-
-                    if self.minArea < area < self.maxArea:
-                        # Volume when right index up
-                        if rightFingers and len(rightFingers) > 1 and rightFingers[1] == 1:
-                            length, _, _ = self.detector.findDistance(4, 8, img, lmList=leftHandLmList, draw=False)
-                            volPer = np.interp(length, [self.minDist, self.maxDist], [0, 100])
-                            event = {"action": "volume_control", "value": int(volPer)}
-                            await manager.broadcast(event)
-                            await asyncio.sleep(0.05)
+                # Plain attribute read: no lock or await on the per-frame path
+                clients = self.sink.client_count + self.preview.viewer_count + self.landmark_stream.subscriber_count
+                now = time.monotonic()
+                if clients == 0:
+                    if self._session_started is not None:
+                        self._session_started = None
+                        self._no_clients_since = now
+                    if self.pipeline:
+                        # Keep the camera warm for a grace period (or forever in always-warm
+                        # mode) so a page refresh doesn't pay the camera open again
+                        if not self.always_warm and now - self._no_clients_since >= self.camera_grace_s:
+                            await self._close_pipeline()
                         else:
-                            # Media controls via pinches
-                            await self._maybe_emit_pinch(leftHandLmList, 4, 12, self.mapping.get("pinch_thumb_middle"))
-                            await self._maybe_emit_pinch(leftHandLmList, 4, 16, self.mapping.get("pinch_thumb_ring"))
-                            await self._maybe_emit_pinch(leftHandLmList, 4, 20, self.mapping.get("pinch_thumb_pinky"))
+                            self.pipeline.pause()
+                    # Sleep until someone subscribes; while the camera is kept warm for
+                    # the grace period, wake up when it runs out so it can be closed
+                    timeout = None
+                    if self.pipeline is not None and not self.always_warm:
+                        timeout = max(0.0, self._no_clients_since + self.camera_grace_s - now)
+                    await self._wait_for_subscribers(timeout)
+                    continue
 
-                # If no clients anymore, release the camera
-                if await manager.get_client_count() == 0 and self.cap and self.cap.isOpened():
-                    self.cap.release()
-                    self.cap = None
+                if self._session_started is None:
+                    self._session_started = now
+                    self._awaiting_first_frame = self._awaiting_first_gesture = True
+                if self.pipeline is None and not await self._start_pipeline():
+                    continue
+                self.pipeline.resume()
 
-                await asyncio.sleep(0.01)
+                result = await self.pipeline.get(timeout=0.2)
+                if result is None and self.pipeline.finished and not self.pipeline.pending:
+                    error = self.pipeline.error
+                    # A recording ran out; reopening the pipeline replays it from its
+                    # first timestamp, so gesture timers start over with it
+                    await self._close_pipeline()
+                    self.plan.reset()
+                    if error is not None:
+                        self.error = f"Inference stopped: {error}"
+                        logger.error("%s, reopening the pipeline in %gs", self.error, self.retry_s)
+                        await self._back_off()
+                    continue
+                if result is not None:
+                    if self.error is not None:
+                        # Recovered: frames are flowing again
+                        self.error = None
+                    if self._awaiting_first_frame:
+                        self._awaiting_first_frame = False
+                        self.metrics["time_to_first_frame_ms"] = round(self._since_session(time.monotonic()), 1)
+                        if self.pipeline.camera_open_s is not None:
+                            self.metrics["camera_open_ms"] = round(self.pipeline.camera_open_s * 1000, 1)
+                    try:
+                        await self._handle_frame(result)
+                    finally:
+                        self.pipeline.release(result)
+        except Exception as exc:
+            self.error = f"Gesture loop stopped: {exc!r}"
+            raise
         finally:
-            try:
-                if self.cap:
-                    self.cap.release()
-            except Exception:
-                pass
+            self.running = False
+            await self._close_pipeline()
+            if self.recorder is not None:
+                self.recorder.close()
+                self.recorder = None
 
     async def stop(self) -> None:
         self.running = False
+        if self._stopping is not None:
+            self._stopping.set()
 
-    async def _maybe_emit_pinch(self, lmList, p1: int, p2: int, action: str | None) -> None:
-        if not action:
-            return
-        import time
+    async def _start_pipeline(self) -> bool:
+        """Build the detector and open the pipeline. On failure log it, keep the
+        error for status() and back off retry_s before the caller tries again."""
+        try:
+            await self.warm()
+            self._open_pipeline()
+        except Exception as exc:
+            logger.exception("Gesture pipeline failed to start, retrying in %gs", self.retry_s)
+            self.error = f"Gesture pipeline failed to start: {exc!r}"
+            await self._back_off()
+            return False
+        return True
+
+    async def _back_off(self) -> None:
+        """Wait retry_s before the pipeline is opened again (less if stopping)."""
+        try:
+            await asyncio.wait_for(self._stopping.wait(), self.retry_s)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _wait_for_subscribers(self, timeout: Optional[float]) -> None:
+        waiters = [
+            asyncio.ensure_future(self.sink.wait_for_subscribers()),
+            asyncio.ensure_future(self.preview.has_viewers.wait()),
+            asyncio.ensure_future(self.landmark_stream.has_subscribers.wait()),
+            asyncio.ensure_future(self._stopping.wait()),
+        ]
+        try:
+            await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
 
-        length, _, _ = self.detector.findDistance(p1, p2, np.zeros((1, 1, 3), dtype=np.uint8), lmList=lmList, draw=False)
-        if length < 40:
-            now = time.time()
-            if now - self._last_action_at.get(action, 0) > self.cooldown_s:
-                event = {"action": action}
-                await manager.broadcast(event)
-                self._last_action_at[action] = now
+    def status(self) -> Dict[str, Any]:
+        """Scheduler mode, frame rates and camera lifecycle timings."""
+        status: Dict[str, Any] = {
+            # Not while the pipeline keeps failing to start (see error)
+            "running": self.running and self.error is None,
+            "camera_open": self.pipeline is not None,
+            "camera_paused": bool(self.pipeline and self.pipeline.paused),
+            "always_warm": self.always_warm,
+            "backend": self.settings.gesture_backend,
+            "live_stream": self.settings.gesture_live_stream,
+            "gestures": self.plan.states() if self.plan is not None else {},
+            "error": self.error,
+        }
+        status.update(self.scheduler.status())
+        status["dropped_frames"] = self.pipeline.dropped_frames if self.pipeline else 0
+        status["preview"] = self.preview.status()
+        status.update(self.metrics)
+        return status
 
+    def _open_pipeline(self) -> None:
+        from .frame_pipeline import FramePipeline
+        from .frame_sources import open_source
 
+        if self.settings.gesture_record_path and self.recorder is None:
+            from .landmark_recording import LandmarkRecorder
+
+            self.recorder = LandmarkRecorder(self.settings.gesture_record_path, self.settings.gesture_max_hands)
+        self.compile_gestures()
+        width, height = self.capture_size
+        self.pipeline = FramePipeline(
+            self.detector,
+            asyncio.get_running_loop(),
+            width=width,
+            height=height,
+            scheduler=self.scheduler,
+            source=open_source(self.settings.gesture_source, width, height),
+            preview=self.preview,
+        )
+        self.pipeline.start()
+
+    async def _close_pipeline(self) -> None:
+        if self.pipeline:
+            pipeline, self.pipeline = self.pipeline, None
+            await asyncio.to_thread(pipeline.stop)
+
+    def _since_session(self, now: float) -> float:
+        return (now - self._session_started) * 1000 if self._session_started is not None else 0.0
+
+    async def _emit(self, event: Dict[str, Any]) -> None:
+        if self._awaiting_first_gesture:
+            self._awaiting_first_gesture = False
+            self.metrics["time_to_first_gesture_ms"] = round(self._since_session(time.monotonic()), 1)
+        if self.recorder is not None:
+            self._frame_actions |= self.recorder.action_bit(event["action"])
+            self._frame_volume = event.get("value", self._frame_volume)
+        await self.sink.broadcast(event)
+
+    async def _handle_frame(self, result: "FrameResult") -> None:
+        if self.landmark_stream.subscriber_count:
+            self.landmark_stream.publish(result)
+        if self.recorder is None:
+            await self._detect_gestures(result)
+            return
+        self._frame_actions, self._frame_volume = 0, -1
+        await self._detect_gestures(result)
+        self.recorder.write(result, self._frame_actions, self._frame_volume)
+
+    async def _detect_gestures(self, result: "FrameResult") -> None:
+        # Every gesture is tested in one vectorized pass; pinches are edge-triggered
+        # (one event per physical pinch), so only a frame that fires reaches Python.
+        # Frame timestamp, so hold / cooldown follow media time when replaying recordings
+        plan = self.plan
+        emit = plan.evaluate(result.landmarks, result.labels, result.width, result.height, result.timestamp)
+        if not emit.any():
+            return
+        for g in range(len(plan)):
+            if not emit[g]:
+                continue
+            event = self._events[g]
+            if "value" in event:
+                event["value"] = int(plan.values[g])
+            await self._emit(event)
@@ -0,0 +1,136 @@
+"""Inference backends for HandDetector.
+
+- ``solutions``: legacy ``mp.solutions.hands.Hands`` (synchronous), with
+  selectable model complexity (0 = lite, 1 = full).
+- ``tasks``: MediaPipe Tasks ``HandLandmarker`` from a ``.task`` bundle, in
+  VIDEO mode (synchronous) or LIVE_STREAM mode (``detect_async`` with a result
+  callback, so the caller never waits on the model).
+
+Every backend returns results shaped like the legacy solution output
+(``multi_hand_landmarks[i].landmark`` and
+``multi_handedness[i].classification[0].label``) so the rest of HandDetector
+doesn't care which one produced them.
+"""
+from typing import Any, Callable, List, Optional
+
+import mediapipe as mp
+
+
+class SolutionsBackend:
+    name = "solutions"
+    live = False
+
+    def __init__(self, mode: bool, maxHands: int, detectionCon: float, trackCon: float, modelComplexity: int = 1) -> None:
+        self.hands = mp.solutions.hands.Hands(
+            static_image_mode=mode,
+            max_num_hands=maxHands,
+            model_complexity=modelComplexity,
+            min_detection_confidence=detectionCon,
+            min_tracking_confidence=trackCon,
+        )
+
+    def process(self, imgRGB, timestamp_ms: int):
+        return self.hands.process(imgRGB)
+
+    def close(self) -> None:
+        self.hands.close()
+
+
+class _Landmarks:
+    __slots__ = ("landmark",)
+
+    def __init__(self, landmark: List[Any]) -> None:
+        self.landmark = landmark
+
+
+class _Label:
+    __slots__ = ("label",)
+
+    def __init__(self, label: str) -> None:
+        self.label = label
+
+
+class _Handedness:
+    __slots__ = ("classification",)
+
+    def __init__(self, label: str) -> None:
+        self.classification = [_Label(label)]
+
+
+class TasksResults:
+    """Adapts a Tasks ``HandLandmarkerResult`` to the legacy results shape."""
+
+    __slots__ = ("multi_hand_landmarks", "multi_handedness")
+
+    def __init__(self, result) -> None:
+        if result.hand_landmarks:
+            self.multi_hand_landmarks = [_Landmarks(hand) for hand in result.hand_landmarks]
+            self.multi_handedness = [_Handedness(cats[0].category_name) for cats in result.handedness]
+        else:
+            self.multi_hand_landmarks = None
+            self.multi_handedness = None
+
+
+class TasksBackend:
+    name = "tasks"
+
+    def __init__(
+        self,
+        modelPath: str,
+        maxHands: int,
+        detectionCon: float,
+        trackCon: float,
+        live: bool = False,
+        onResult: Optional[Callable[[TasksResults, int], None]] = None,
+    ) -> None:
+        from mediapipe.tasks.python import vision
+        from mediapipe.tasks.python.core.base_options import BaseOptions
+
+        self.live = live
+        self._onResult = onResult
+        mode = vision.RunningMode.LIVE_STREAM if live else vision.RunningMode.VIDEO
+        options = vision.HandLandmarkerOptions(
+            base_options=BaseOptions(model_asset_path=modelPath),
+            running_mode=mode,
+            num_hands=maxHands,
+            min_hand_detection_confidence=detectionCon,
+            min_hand_presence_confidence=detectionCon,
+            min_tracking_confidence=trackCon,
+            result_callback=self._callback if live else None,
+        )
+        self.landmarker = vision.HandLandmarker.create_from_options(options)
+
+    def _callback(self, result, output_image, timestamp_ms: int) -> None:
+        if self._onResult:
+            self._onResult(TasksResults(result), timestamp_ms)
+
+    def process(self, imgRGB, timestamp_ms: int):
+        """VIDEO mode returns results; LIVE_STREAM mode returns None and calls onResult later."""
+        image = mp.Image(image_format=mp.ImageFormat.SRGB, data=imgRGB)
+        if self.live:
+            self.landmarker.detect_async(image, timestamp_ms)
+            return None
+        return TasksResults(self.landmarker.detect_for_video(image, timestamp_ms))
+
+    def close(self) -> None:
+        self.landmarker.close()
+
+
+def create_backend(
+    name: str,
+    mode: bool,
+    maxHands: int,
+    detectionCon: float,
+    trackCon: float,
+    modelComplexity: int = 1,
+    modelPath: str | None = None,
+    live: bool = False,
+    onResult: Optional[Callable[[TasksResults, int], None]] = None,
+):
+    if name == "solutions":
+        return SolutionsBackend(mode, maxHands, detectionCon, trackCon, modelComplexity)
+    if name == "tasks":
+        if not modelPath:
+            raise ValueError("The 'tasks' hand backend needs a HandLandmarker .task model path")
+        return TasksBackend(modelPath, maxHands, detectionCon, trackCon, live=live, onResult=onResult)
+    raise ValueError(f"Unknown hand backend: {name!r}")
@@ -1,57 +1,230 @@
 import cv2
 import mediapipe as mp
 import math
-from typing import List, Tuple
+import threading
+import time
+import numpy as np
+from typing import Dict, List, Tuple
+from . import landmarks as lmk
+from .hand_backends import create_backend
 
 
 class HandDetector:
-    def __init__(self, mode: bool = False, maxHands: int = 2, detectionCon: float = 0.5, trackCon: float = 0.5):
+    def __init__(
+        self,
+        mode: bool = False,
+        maxHands: int = 2,
+        detectionCon: float = 0.5,
+        trackCon: float = 0.5,
+        roi: bool = False,
+        roiSize: int = 320,
+        roiPadding: float = 0.6,
+        fullScanEvery: int = 30,
+        landmarkBuffers: int = 4,
+        backend: str = "solutions",
+        modelComplexity: int = 1,
+        modelPath: str | None = None,
+        liveStream: bool = False,
+    ):
         self.mode = mode
         self.maxHands = maxHands
         self.detectionCon = detectionCon
         self.trackCon = trackCon
+        # ROI tracking: after a hand is found, only a padded crop around the last
+        # bboxes (downscaled so its longest side is <= roiSize) goes to the model.
+        # A full-frame scan runs when tracking is lost and every fullScanEvery frames.
+        self.roi = roi
+        self.roiSize = roiSize
+        self.roiPadding = roiPadding
+        self.fullScanEvery = fullScanEvery
+        self._roiRect: Tuple[int, int, int, int] | None = None
+        self._framesSinceScan = 0
+        # Region of the frame the last findHands() call actually processed (x0, y0, w, h)
+        self.processedRect: Tuple[int, int, int, int] = (0, 0, 0, 0)
 
         self.mpHands = mp.solutions.hands
-        self.hands = self.mpHands.Hands(
-            static_image_mode=self.mode,
-            max_num_hands=self.maxHands,
-            min_detection_confidence=self.detectionCon,
-            min_tracking_confidence=self.trackCon,
+        # Inference backend, see hand_backends. In live-stream mode results arrive on a
+        # MediaPipe thread and are picked up by the next findHands() call.
+        self._asyncLock = threading.Lock()
+        self._asyncPending = None
+        self._pendingRects: Dict[int, Tuple[int, int, int, int]] = {}
+        self._lastTimestamp = 0
+        self.backend = create_backend(
+            backend,
+            self.mode,
+            self.maxHands,
+            self.detectionCon,
+            self.trackCon,
+            modelComplexity=modelComplexity,
+            modelPath=modelPath,
+            live=liveStream,
+            onResult=self._onAsyncResult,
         )
+        # Legacy mp.solutions Hands graph, kept for existing callers
+        self.hands = getattr(self.backend, "hands", None)
+        # False after a live-stream findHands() call that had no new result yet
+        self.freshResults = False
         self.mpDraw = mp.solutions.drawing_utils
         self.tipIds = [4, 8, 12, 16, 20]
         self.results = None
         self.lmList: List[List[int]] = []
+        # (hands, 21, 3) float32 pixel landmarks for self.results, see findLandmarks().
+        # Written into a ring of preallocated buffers so the per-frame path doesn't
+        # allocate; an array stays valid for landmarkBuffers - 1 further frames.
+        self._lmRing = np.zeros((max(1, landmarkBuffers), self.maxHands, lmk.NUM_LANDMARKS, 3), dtype=np.float32)
+        self._lmRingPos = 0
+        self.landmarks = self._lmRing[0, :0]
+        self.handedness: List[str] = []
+        self._landmarks_for = None
+        # Reused cvtColor / resize destinations, keyed by purpose
+        self._frameBuffers: Dict[str, np.ndarray] = {}
+        self._warm = False
 
     def findHands(self, img, draw: bool = True):
-        imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        self.results = self.hands.process(imgRGB)
-        if self.results.multi_hand_landmarks:
-            for handLms in self.results.multi_hand_landmarks:
-                if draw:
+        h, w = img.shape[:2]
+        rect = self._nextRoi() if self.roi else None
+        if rect is None:
+            imgRGB = cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=self._frameBuffer("rgb", img.shape))
+            self.processedRect = (0, 0, w, h)
+        else:
+            x0, y0, cw, ch = rect
+            crop = img[y0 : y0 + ch, x0 : x0 + cw]
+            scale = self.roiSize / max(cw, ch)
+            if scale < 1:
+                # Multiples of 16 keep the number of distinct buffer shapes small
+                rw, rh = max(16, int(cw * scale) // 16 * 16), max(16, int(ch * scale) // 16 * 16)
+                crop = cv2.resize(crop, (rw, rh), dst=self._frameBuffer("roi", (rh, rw, 3)), interpolation=cv2.INTER_AREA)
+            imgRGB = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB, dst=self._frameBuffer("roiRGB", crop.shape))
+            self.processedRect = rect
+        timestamp = self._nextTimestamp()
+        if self.backend.live:
+            with self._asyncLock:
+                self._pendingRects[timestamp] = self.processedRect
+                pending, self._asyncPending = self._asyncPending, None
+            self.backend.process(imgRGB, timestamp)
+            if pending is None:
+                # Nothing finished since the last call; keep the previous results
+                self.freshResults = False
+                return img
+            self.results, self.processedRect = pending
+        else:
+            self.results = self.backend.process(imgRGB, timestamp)
+        self.freshResults = True
+        self._landmarks_for = None
+        if self.roi:
+            self._updateRoi(self.findLandmarks(img), w, h)
+        if draw and self.results.multi_hand_landmarks:
+            if self.processedRect == (0, 0, w, h) and self.backend.name == "solutions":
+                for handLms in self.results.multi_hand_landmarks:
                     self.mpDraw.draw_landmarks(img, handLms, self.mpHands.HAND_CONNECTIONS)
+            else:
+                # Crop-relative or non-proto landmarks: draw from the full-frame array
+                for hand in self.findLandmarks(img):
+                    self._drawHand(img, hand)
         return img
 
+    def warmup(self, width: int = 640, height: int = 480) -> None:
+        """Run the graph once on a blank frame so the first real frame doesn't pay model init."""
+        if self._warm:
+            return
+        timestamp = self._nextTimestamp()
+        with self._asyncLock:
+            self._pendingRects[timestamp] = (0, 0, width, height)
+        self.backend.process(np.zeros((height, width, 3), dtype=np.uint8), timestamp)
+        self._warm = True
+
+    def _nextTimestamp(self) -> int:
+        # Tasks VIDEO / LIVE_STREAM modes need strictly increasing millisecond timestamps
+        self._lastTimestamp = max(self._lastTimestamp + 1, int(time.monotonic() * 1000))
+        return self._lastTimestamp
+
+    def _onAsyncResult(self, results, timestamp: int) -> None:
+        with self._asyncLock:
+            rect = self._pendingRects.pop(timestamp, self.processedRect)
+            # Frames the live stream dropped never get a callback
+            for stale in [t for t in self._pendingRects if t < timestamp]:
+                del self._pendingRects[stale]
+            self._asyncPending = (results, rect)
+
+    def _frameBuffer(self, name: str, shape) -> np.ndarray:
+        buf = self._frameBuffers.get(name)
+        if buf is None or buf.shape != shape:
+            buf = np.empty(shape, dtype=np.uint8)
+            self._frameBuffers[name] = buf
+        return buf
+
+    def _nextRoi(self):
+        self._framesSinceScan += 1
+        if self._roiRect is None or self._framesSinceScan >= self.fullScanEvery:
+            self._framesSinceScan = 0
+            return None
+        return self._roiRect
+
+    def _updateRoi(self, hands: np.ndarray, w: int, h: int) -> None:
+        if len(hands) == 0:
+            # Tracking lost: next frame is a full-frame scan
+            self._roiRect = None
+            return
+        xmin, ymin = hands[..., 0].min(), hands[..., 1].min()
+        xmax, ymax = hands[..., 0].max(), hands[..., 1].max()
+        pad = self.roiPadding * max(xmax - xmin, ymax - ymin)
+        # Snap to a 16 px grid so the crop (and its buffers) rarely changes shape
+        x0, y0 = max(0, int(xmin - pad) // 16 * 16), max(0, int(ymin - pad) // 16 * 16)
+        x1, y1 = min(w, -(-int(xmax + pad) // 16) * 16), min(h, -(-int(ymax + pad) // 16) * 16)
+        if x1 - x0 < 32 or y1 - y0 < 32:
+            self._roiRect = None
+            return
+        self._roiRect = (x0, y0, x1 - x0, y1 - y0)
+
+    def _drawHand(self, img, hand: np.ndarray) -> None:
+        pts = hand[:, :2].astype(np.int32)
+        for a, b in self.mpHands.HAND_CONNECTIONS:
+            cv2.line(img, tuple(pts[a].tolist()), tuple(pts[b].tolist()), (224, 224, 224), 2)
+        for x, y in pts.tolist():
+            cv2.circle(img, (x, y), 4, (0, 0, 255), cv2.FILLED)
+
+    def findLandmarks(self, img, out: np.ndarray | None = None) -> np.ndarray:
+        """Landmarks of every detected hand as one ``(hands, 21, 3)`` float32 array.
+
+        Converted once per ``findHands`` call, into ``out`` (``(maxHands, 21, 3)``)
+        if given, else into the next buffer of the landmark ring.
+        ``self.handedness`` holds the matching "Left"/"Right" labels. Copy a
+        ring-backed array to keep it longer than landmarkBuffers - 1 frames.
+        """
+        if self._landmarks_for is self.results:
+            if out is not None and not np.may_share_memory(out, self.landmarks):
+                n = len(self.landmarks)
+                out[:n] = self.landmarks
+                self.landmarks = out[:n]
+        else:
+            x0, y0, w, h = self.processedRect
+            if not (w and h):
+                h, w = img.shape[:2]
+            results = self.results
+            multi = results.multi_hand_landmarks if results else None
+            if out is None:
+                self._lmRingPos = (self._lmRingPos + 1) % len(self._lmRing)
+                out = self._lmRing[self._lmRingPos]
+            n = lmk.fill_landmarks(multi, w, h, out, x0, y0)
+            self.landmarks = out[:n]
+            self.handedness.clear()
+            for i in range(n):
+                self.handedness.append(results.multi_handedness[i].classification[0].label)
+            self._landmarks_for = results
+        return self.landmarks
+
     def findPosition(self, img, handNo: int = 0, draw: bool = True):
-        xList, yList = [], []
+        # Thin list view over findLandmarks() for existing callers
         lmList: List[List[int]] = []
         bbox: Tuple[int, int, int, int] = (0, 0, 0, 0)
-        if self.results and self.results.multi_hand_landmarks:
-            myHand = self.results.multi_hand_landmarks[handNo]
-            for idx, lm in enumerate(myHand.landmark):
-                h, w, _ = img.shape
-                cx, cy = int(lm.x * w), int(lm.y * h)
-                xList.append(cx)
-                yList.append(cy)
-                lmList.append([idx, cx, cy])
-                if draw:
+        hands = self.findLandmarks(img)
+        if handNo < len(hands):
+            lmList = lmk.to_lm_list(hands[handNo])
+            bbox = tuple(lmk.bboxes(hands[handNo]).tolist())
+            if draw:
+                for _, cx, cy in lmList:
                     cv2.circle(img, (cx, cy), 7, (255, 0, 255), cv2.FILLED)
-            if xList and yList:
-                xmin, xmax = min(xList), max(xList)
-                ymin, ymax = min(yList), max(yList)
-                bbox = (xmin, ymin, xmax, ymax)
-                if draw:
-                    cv2.rectangle(img, (bbox[0] - 20, bbox[1] - 20), (bbox[2] + 20, bbox[3] + 20), (0, 255, 0), 2)
+                cv2.rectangle(img, (bbox[0] - 20, bbox[1] - 20), (bbox[2] + 20, bbox[3] + 20), (0, 255, 0), 2)
         self.lmList = lmList
         return lmList, bbox
 
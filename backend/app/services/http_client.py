@@ -0,0 +1,60 @@
+"""One app-lifetime ``httpx.AsyncClient`` for every Spotify API and token call.
+
+Connections to api.spotify.com and accounts.spotify.com stay open between
+requests (keep-alive pool, optionally HTTP/2), so only the first request pays
+the TCP + TLS handshake. The client carries no credentials: callers pass the
+``Authorization`` header per request. Opened and closed by the app's
+startup / shutdown hooks; ``get_client()`` also opens it on first use, for
+scripts that don't run the app.
+"""
+import logging
+from typing import Optional
+
+import httpx
+
+from ..config.settings import get_settings
+
+logger = logging.getLogger("uvicorn.error")
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def build_client() -> httpx.AsyncClient:
+    settings = get_settings()
+    limits = httpx.Limits(
+        max_connections=settings.spotify_max_connections,
+        max_keepalive_connections=settings.spotify_max_keepalive,
+        keepalive_expiry=settings.spotify_keepalive_s,
+    )
+    # Waiting for a pooled connection counts against the connect timeout
+    timeout = httpx.Timeout(
+        settings.spotify_timeout_s,
+        connect=settings.spotify_connect_timeout_s,
+        pool=settings.spotify_connect_timeout_s,
+    )
+    http2 = settings.spotify_http2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("SPOTIFY_HTTP2 needs the h2 package (pip install h2); using HTTP/1.1")
+            http2 = False
+    return httpx.AsyncClient(limits=limits, timeout=timeout, http2=http2)
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = build_client()
+    return _client
+
+
+async def start() -> None:
+    get_client()
+
+
+async def close() -> None:
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
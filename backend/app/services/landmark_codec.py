@@ -0,0 +1,105 @@
+"""Binary frames for the ``/ws/landmarks`` stream (see landmark_stream.py).
+
+Little-endian::
+
+    u8   version (2)
+    u8   kind        1 key frame, 2 delta frame
+    u16  width       frame size in pixels
+    u16  height
+    u32  t_ms        frame timestamp in ms (source clock, wraps)
+    u8   hands
+    u8[hands]        handedness: 0 unknown, 1 Left, 2 Right
+    key:   u24[hands, 21]      x | y << 12, each a fraction of the frame * 4095
+    delta: hands * 21 * 2 varints, the zigzag-encoded change of each value
+           since the previous frame sent to this subscriber (mod 2**12)
+
+12 bits is about a third of a pixel on a 1280x720 frame, plenty for an
+overlay, and keeps frame-to-frame changes small: varints are 7 bits per byte,
+low bits first, high bit set on all but the last byte, so a coordinate that
+moved less than 64 units (about 20 px across, 11 px down a 720p frame) costs
+one byte and any other two. A delta frame only follows a frame with the same
+hands; a key frame is sent at least every ``KEYFRAME_EVERY`` frames, and a
+single empty key frame when the hands leave.
+"""
+import struct
+from typing import Optional, Tuple
+
+import numpy as np
+
+from . import landmarks as lmk
+from .landmark_recording import HANDEDNESS, quantize_xy
+
+VERSION = 2
+KEY, DELTA = 1, 2
+KEYFRAME_EVERY = 30
+# quantize_xy() is 16-bit; the stream keeps the top 12 bits
+_SHIFT = 4
+_RANGE = 1 << 12
+_HEADER = struct.Struct("<BBHHIB")
+
+# (t_ms, width, height, handedness bytes, xy uint16 (hands, 21, 2) in 0..4095)
+Frame = Tuple[int, int, int, bytes, np.ndarray]
+
+
+def quantize(result) -> Frame:
+    """A FrameResult as the stream's quantized frame (copied: results are pooled)."""
+    n = len(result.landmarks)
+    xy = np.empty((n, lmk.NUM_LANDMARKS, 2), dtype=np.uint16)
+    if n:
+        quantize_xy(result.landmarks, result.width, result.height, xy)
+        xy >>= _SHIFT
+    handedness = bytes(HANDEDNESS.get(label, 0) for label in result.labels[:n])
+    t_ms = int(result.timestamp * 1000) & 0xFFFFFFFF
+    return t_ms, result.width, result.height, handedness, xy
+
+
+def pack_xy(xy: np.ndarray) -> bytes:
+    """12-bit x / y pairs as three little-endian bytes each."""
+    v = xy[..., 0].astype("<u4") | (xy[..., 1].astype("<u4") << 12)
+    return v.view(np.uint8).reshape(-1, 4)[:, :3].tobytes()
+
+
+def varints(values: np.ndarray) -> bytes:
+    """Unsigned values below 2**21 as little-endian base-128 varints."""
+    v = values.astype(np.uint32).ravel()
+    size = 1 + (v >= 0x80) + (v >= 0x4000)
+    out = np.empty((len(v), 3), dtype=np.uint8)
+    out[:, 0] = (v & 0x7F) | ((size > 1) << 7)
+    out[:, 1] = ((v >> 7) & 0x7F) | ((size > 2) << 7)
+    out[:, 2] = v >> 14
+    return out[np.arange(3) < size[:, None]].tobytes()
+
+
+class FrameEncoder:
+    """Per-subscriber encoder: deltas are against what that subscriber last got."""
+
+    def __init__(self) -> None:
+        self._previous: Optional[np.ndarray] = None
+        self._handedness: Optional[bytes] = None
+        self._since_key = 0
+        self.key_frames = 0
+
+    def encode(self, frame: Frame) -> Optional[bytes]:
+        """The next message for ``frame``, or None when there's nothing new to send."""
+        t_ms, width, height, handedness, xy = frame
+        if not handedness and self._handedness == b"":
+            # Still no hands; the empty key frame already went out
+            return None
+        delta = (
+            bool(handedness)
+            and handedness == self._handedness
+            and self._previous is not None
+            and self._since_key < KEYFRAME_EVERY
+        )
+        header = _HEADER.pack(VERSION, DELTA if delta else KEY, width, height, t_ms, len(handedness)) + handedness
+        if delta:
+            change = (xy.astype(np.int32) - self._previous + _RANGE // 2) % _RANGE - _RANGE // 2
+            payload = varints((change << 1) ^ (change >> 31))
+            self._since_key += 1
+        else:
+            payload = pack_xy(xy)
+            self._since_key = 0
+            self.key_frames += 1
+        self._previous = xy.astype(np.int32)
+        self._handedness = handedness
+        return header + payload
@@ -0,0 +1,203 @@
+"""Append-only, fixed-record landmark recordings (``.gstrec``).
+
+Layout: a 1 KiB header (``MAGIC`` followed by space-padded JSON with the
+format version, ``max_hands`` and the action name table) and then one packed
+little-endian record per frame, so the body opens directly as a NumPy memmap
+(see ``open_recording``)::
+
+    timestamp   f8          frame time in seconds (source clock)
+    width       u2          frame size in pixels
+    height      u2
+    hands       u1          number of hands in the frame
+    handedness  u1[H]       per hand: 0 none, 1 Left, 2 Right
+    actions     u4          bitmask into the header's action table
+    volume      i1          emitted volume_control value, -1 if none
+    xy          u2[H,21,2]  landmark x / y as fractions of the frame * 65535
+
+Depth (``z``) isn't stored: the gesture logic only uses x / y. A record is
+188 bytes for two hands, so an hour of continuous gesturing at 30 FPS is
+~20 MB. A run of frames without hands is stored as just its first and last
+frame (``hands`` 0): that is all the gesture logic can tell apart, since the
+first releases held pinches and resets the range filters and the last shows
+how far a cooldown ran out while the hand was away. Typical sessions (mostly
+no hand in view) stay far smaller.
+"""
+import json
+import os
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from . import landmarks as lmk
+
+
+MAGIC = b"GSTREC01"
+HEADER_SIZE = 1024
+VERSION = 1
+HANDEDNESS = {"Left": 1, "Right": 2}
+LABELS = ("", "Left", "Right")
+MAX_ACTIONS = 32
+_XY_SCALE = 65535.0
+
+
+def record_dtype(max_hands: int = 2) -> np.dtype:
+    return np.dtype(
+        [
+            ("timestamp", "<f8"),
+            ("width", "<u2"),
+            ("height", "<u2"),
+            ("hands", "u1"),
+            ("handedness", "u1", (max_hands,)),
+            ("actions", "<u4"),
+            ("volume", "i1"),
+            ("xy", "<u2", (max_hands, lmk.NUM_LANDMARKS, 2)),
+        ]
+    )
+
+
+def _encode_header(header: Dict[str, Any]) -> bytes:
+    body = json.dumps(header).encode("utf-8")
+    if len(MAGIC) + len(body) > HEADER_SIZE:
+        raise ValueError("Recording header too large")
+    return MAGIC + body.ljust(HEADER_SIZE - len(MAGIC), b" ")
+
+
+def read_header(path: str) -> Dict[str, Any]:
+    with open(path, "rb") as f:
+        raw = f.read(HEADER_SIZE)
+    if len(raw) < HEADER_SIZE or not raw.startswith(MAGIC):
+        raise ValueError(f"Not a landmark recording: {path}")
+    header = json.loads(raw[len(MAGIC) :].decode("utf-8"))
+    if header.get("version") != VERSION:
+        raise ValueError(f"Unsupported recording version {header.get('version')} in {path}")
+    return header
+
+
+def open_recording(path: str) -> Tuple[Dict[str, Any], np.ndarray]:
+    """Header and a read-only memmap of every record (nothing is read up front)."""
+    header = read_header(path)
+    dtype = record_dtype(header["max_hands"])
+    count = (os.path.getsize(path) - HEADER_SIZE) // dtype.itemsize
+    if count <= 0:
+        return header, np.zeros(0, dtype=dtype)
+    return header, np.memmap(path, dtype=dtype, mode="r", offset=HEADER_SIZE, shape=(count,))
+
+
+def landmarks_px(records: np.ndarray) -> np.ndarray:
+    """``(frames, max_hands, 21, 3)`` float32 pixel landmarks (``z`` = 0) for a slice of records."""
+    xy = records["xy"].astype(np.float32) / _XY_SCALE
+    out = np.zeros(xy.shape[:-1] + (3,), dtype=np.float32)
+    out[..., 0] = xy[..., 0] * records["width"][:, None, None]
+    out[..., 1] = xy[..., 1] * records["height"][:, None, None]
+    return out
+
+
+def quantize_xy(landmarks: np.ndarray, width: int, height: int, out: np.ndarray) -> np.ndarray:
+    """Pixel landmarks ``(hands, 21, >=2)`` to fractions of the frame * 65535 in
+    ``out`` (``(hands, 21, 2)``, float32 or uint16; values are rounded down)."""
+    xy = landmarks[..., :2] * np.array([_XY_SCALE / width, _XY_SCALE / height], dtype=np.float32)
+    np.clip(xy, 0, _XY_SCALE, out=xy)
+    out[...] = xy
+    return out
+
+
+class LandmarkRecorder:
+    """Appends one record per processed frame (runs without hands: first and last).
+
+    Reopening an existing file appends to it (the hand count must match).
+    Writes are buffered; ``close()`` (or ``flush()``) makes them durable.
+    """
+
+    def __init__(self, path: str, max_hands: int = 2) -> None:
+        self.path = path
+        if os.path.exists(path) and os.path.getsize(path) >= HEADER_SIZE:
+            self.header = read_header(path)
+            if self.header["max_hands"] != max_hands:
+                raise ValueError(f"{path} was recorded with max_hands={self.header['max_hands']}")
+            # Drop a partially written trailing record
+            size = os.path.getsize(path)
+            itemsize = record_dtype(max_hands).itemsize
+            with open(path, "r+b") as f:
+                f.truncate(size - (size - HEADER_SIZE) % itemsize)
+        else:
+            self.header = {"version": VERSION, "max_hands": max_hands, "actions": []}
+            with open(path, "wb") as f:
+                f.write(_encode_header(self.header))
+        self.max_hands = max_hands
+        self._bits = {name: 1 << i for i, name in enumerate(self.header["actions"])}
+        self._record = np.zeros(1, dtype=record_dtype(max_hands))
+        self._xy = np.zeros((max_hands, lmk.NUM_LANDMARKS, 2), dtype=np.float32)
+        self._file = open(path, "ab")
+        self.written = 0
+        # Inside a run of frames without hands, its latest frame (timestamp,
+        # width, height) once the first has been written
+        self._empty_run = False
+        self._last_empty: Tuple[float, int, int] | None = None
+
+    def action_bit(self, action: str) -> int:
+        bit = self._bits.get(action)
+        if bit is None:
+            if len(self._bits) >= MAX_ACTIONS:
+                return 0
+            bit = self._bits[action] = 1 << len(self.header["actions"])
+            self.header["actions"].append(action)
+            self._file.flush()
+            with open(self.path, "r+b") as f:
+                f.write(_encode_header(self.header))
+        return bit
+
+    def write(self, result, actions: int = 0, volume: int = -1) -> None:
+        """Append a FrameResult with the action bits / volume emitted for it."""
+        n = min(len(result.landmarks), self.max_hands)
+        if n == 0:
+            if self._empty_run:
+                self._last_empty = (result.timestamp, result.width, result.height)
+                return
+            self._empty_run = True
+            self._write_empty(result.timestamp, result.width, result.height)
+            return
+        self._end_empty_run()
+        rec = self._record[0]
+        rec["timestamp"] = result.timestamp
+        rec["width"], rec["height"] = result.width, result.height
+        rec["hands"] = n
+        handedness = rec["handedness"]
+        for i in range(self.max_hands):
+            handedness[i] = HANDEDNESS.get(result.labels[i], 0) if i < n else 0
+        rec["actions"] = actions
+        rec["volume"] = volume
+        quantize_xy(result.landmarks[:n], result.width, result.height, self._xy[:n])
+        self._xy[n:] = 0
+        rec["xy"] = self._xy
+        self._file.write(self._record.data)
+        self.written += 1
+
+    def _write_empty(self, timestamp: float, width: int, height: int) -> None:
+        rec = self._record[0]
+        rec["timestamp"] = timestamp
+        rec["width"], rec["height"] = width, height
+        rec["hands"] = 0
+        rec["handedness"] = 0
+        rec["actions"] = 0
+        rec["volume"] = -1
+        rec["xy"] = 0
+        self._file.write(self._record.data)
+        self.written += 1
+
+    def _end_empty_run(self) -> None:
+        if self._last_empty is not None:
+            self._write_empty(*self._last_empty)
+            self._last_empty = None
+        self._empty_run = False
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._end_empty_run()
+            self._file.close()
+
+
+def decode_actions(mask: int, actions: List[str]) -> List[str]:
+    return [name for i, name in enumerate(actions) if mask & (1 << i)]
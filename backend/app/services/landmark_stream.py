@@ -0,0 +1,152 @@
+"""Opt-in raw landmark stream on ``/ws/landmarks``, for skeleton overlays and
+client-side gesture experiments.
+
+GestureLoop publishes every processed frame; each subscriber gets binary
+frames (landmark_codec.py: 12-bit normalized coordinates, delta-encoded
+against what that subscriber last received) at up to its own ``?fps=`` cap.
+A subscriber that can't keep up simply skips frames: there is one pending
+slot per subscriber, never a queue. Frames are quantized once per publish and
+only when some subscriber is due one; nothing happens without subscribers.
+
+Only available where the gesture loop runs (GESTURE_MODE=inline); a
+subscriber keeps the camera running like a ``/ws/gestures`` client does.
+"""
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import WebSocket
+
+from ..config.settings import get_settings
+
+# numpy (via landmark_codec) is imported on the first frame, like the rest of the
+# CV stack, so importing the routes stays cheap
+
+# Bytes-per-second window for stats()
+_RATE_WINDOW_S = 5.0
+
+
+class _Subscriber:
+    __slots__ = (
+        "ws", "fps", "credit", "last_offer", "pending", "wake", "task", "encoder",
+        "frames", "bytes", "connected_at", "window_start", "window_bytes", "rate",
+    )
+
+    def __init__(self, ws: WebSocket, fps: float) -> None:
+        self.ws = ws
+        self.fps = fps
+        # Token bucket for the frame-rate cap (tolerates frame timing jitter)
+        self.credit = 1.0
+        self.last_offer = time.monotonic()
+        self.pending = None
+        self.wake = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.encoder = None
+        self.frames = self.bytes = 0
+        self.connected_at = self.window_start = self.last_offer
+        self.window_bytes = 0
+        self.rate: Optional[float] = None
+
+
+class LandmarkStream:
+    def __init__(self, default_fps: Optional[float] = None, max_fps: Optional[float] = None) -> None:
+        settings = get_settings()
+        self.default_fps = default_fps or settings.landmark_stream_fps
+        self.max_fps = max_fps or settings.landmark_stream_max_fps
+        self._subscribers: Dict[WebSocket, _Subscriber] = {}
+        # Copy-on-write, like WebSocketManager
+        self._snapshot: Tuple[_Subscriber, ...] = ()
+        self.subscriber_count = 0
+        self.has_subscribers = asyncio.Event()
+
+    async def connect(self, ws: WebSocket, fps: Optional[float] = None) -> None:
+        await ws.accept()
+        fps = min(max(fps or self.default_fps, 1.0), self.max_fps)
+        sub = _Subscriber(ws, fps)
+        sub.task = asyncio.create_task(self._sender(sub))
+        self._subscribers[ws] = sub
+        self._changed()
+
+    async def disconnect(self, ws: WebSocket) -> None:
+        sub = self._subscribers.pop(ws, None)
+        if sub is None:
+            return
+        self._changed()
+        if sub.task is not asyncio.current_task():
+            sub.task.cancel()
+
+    def publish(self, result) -> None:
+        """Offer one processed FrameResult to every subscriber that is due a frame."""
+        frame = None
+        now = time.monotonic()
+        for sub in self._snapshot:
+            sub.credit = min(1.0, sub.credit + (now - sub.last_offer) * sub.fps)
+            sub.last_offer = now
+            if sub.credit < 0.9:
+                continue
+            sub.credit -= 1.0
+            if frame is None:
+                from .landmark_codec import quantize
+
+                frame = quantize(result)
+            # Latest wins: an unsent older frame is replaced
+            sub.pending = frame
+            sub.wake.set()
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        subscribers: List[Dict[str, Any]] = []
+        for i, sub in enumerate(self._snapshot):
+            elapsed = max(now - sub.connected_at, 1e-6)
+            subscribers.append(
+                {
+                    "id": i,
+                    "fps_cap": sub.fps,
+                    "frames": sub.frames,
+                    "key_frames": sub.encoder.key_frames if sub.encoder else 0,
+                    "bytes": sub.bytes,
+                    "bytes_per_s": round(sub.rate if sub.rate is not None else sub.bytes / elapsed, 1),
+                    "bytes_per_frame": round(sub.bytes / sub.frames, 1) if sub.frames else 0.0,
+                    "connected_s": round(elapsed, 1),
+                }
+            )
+        return {"subscribers": subscribers, "max_fps": self.max_fps}
+
+    async def _sender(self, sub: _Subscriber) -> None:
+        try:
+            while True:
+                await sub.wake.wait()
+                sub.wake.clear()
+                frame, sub.pending = sub.pending, None
+                if frame is None:
+                    continue
+                if sub.encoder is None:
+                    from .landmark_codec import FrameEncoder
+
+                    sub.encoder = FrameEncoder()
+                data = sub.encoder.encode(frame)
+                if data is None:
+                    continue
+                await sub.ws.send_bytes(data)
+                sub.frames += 1
+                sub.bytes += len(data)
+                sub.window_bytes += len(data)
+                now = time.monotonic()
+                if now - sub.window_start >= _RATE_WINDOW_S:
+                    sub.rate = sub.window_bytes / (now - sub.window_start)
+                    sub.window_start, sub.window_bytes = now, 0
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            await self.disconnect(sub.ws)
+
+    def _changed(self) -> None:
+        self._snapshot = tuple(self._subscribers.values())
+        self.subscriber_count = len(self._snapshot)
+        if self.subscriber_count:
+            self.has_subscribers.set()
+        else:
+            self.has_subscribers.clear()
+
+
+landmark_stream = LandmarkStream()
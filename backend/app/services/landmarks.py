@@ -0,0 +1,73 @@
+"""Vectorized hand geometry over ``(hands, 21, 3)`` float32 landmark arrays.
+
+Columns are ``x, y`` in pixels and MediaPipe's relative depth ``z`` (scaled
+by image width, like ``x``). All helpers accept a single hand ``(21, 3)`` or
+a batch ``(hands, 21, 3)`` and broadcast over the leading axes.
+"""
+from itertools import chain
+from operator import attrgetter
+
+import numpy as np
+
+
+NUM_LANDMARKS = 21
+TIP_IDS = np.array([4, 8, 12, 16, 20])
+# Joint each tip is compared against in fingers_up(): thumb tip 4 against its IP
+# joint 3 (x axis), the other tips (8, 12, 16, 20) against their PIP joints
+# (6, 10, 14, 18; y axis). Slices rather than index arrays keep them views.
+_FINGER_TIPS = slice(8, 21, 4)
+_FINGER_PIPS = slice(6, 19, 4)
+# Skeleton edges for drawing, same as mediapipe's HAND_CONNECTIONS
+HAND_CONNECTIONS = (
+    (0, 1), (1, 2), (2, 3), (3, 4),
+    (0, 5), (5, 6), (6, 7), (7, 8),
+    (5, 9), (9, 10), (10, 11), (11, 12),
+    (9, 13), (13, 14), (14, 15), (15, 16),
+    (13, 17), (0, 17), (17, 18), (18, 19), (19, 20),
+)
+_XYZ = attrgetter("x", "y", "z")
+
+
+def fill_landmarks(multi_hand_landmarks, width: int, height: int, out: np.ndarray, x0: int = 0, y0: int = 0) -> int:
+    """Convert MediaPipe ``multi_hand_landmarks`` to pixels in ``out`` (``(maxHands, 21, 3)``).
+
+    ``width``/``height`` are the size of the image the detector saw and
+    ``x0``/``y0`` its offset in the full frame (non-zero for ROI crops).
+    Returns the number of hands written.
+    """
+    if not multi_hand_landmarks:
+        return 0
+    n = min(len(multi_hand_landmarks), len(out))
+    # All coordinates in one pass into a flat array, then scaled into out a column
+    # at a time (scalar operands: a (w, h, w) tuple would be converted every call)
+    coords = chain.from_iterable(map(_XYZ, chain.from_iterable(hand.landmark for hand in multi_hand_landmarks[:n])))
+    flat = np.fromiter(coords, dtype=np.float32, count=n * NUM_LANDMARKS * 3).reshape(n, NUM_LANDMARKS, 3)
+    hands = out[:n]
+    np.multiply(flat[..., 0], width, out=hands[..., 0])
+    np.multiply(flat[..., 1], height, out=hands[..., 1])
+    np.multiply(flat[..., 2], width, out=hands[..., 2])
+    if x0 or y0:
+        hands[..., 0] += x0
+        hands[..., 1] += y0
+    return n
+
+
+def fingers_up(landmarks: np.ndarray) -> np.ndarray:
+    """Finger-up flags ``(..., 5)`` (thumb, index, middle, ring, pinky) as uint8."""
+    up = np.empty(landmarks.shape[:-2] + (5,), dtype=np.uint8)
+    np.greater(landmarks[..., 4, 0], landmarks[..., 3, 0], out=up[..., 0])
+    np.less(landmarks[..., _FINGER_TIPS, 1], landmarks[..., _FINGER_PIPS, 1], out=up[..., 1:])
+    return up
+
+
+def bboxes(landmarks: np.ndarray) -> np.ndarray:
+    """Integer ``(xmin, ymin, xmax, ymax)`` per hand; shape ``(..., 4)``."""
+    xy = landmarks[..., :2].astype(np.int32)
+    return np.concatenate([xy.min(axis=-2), xy.max(axis=-2)], axis=-1)
+
+
+def to_lm_list(hand: np.ndarray) -> list:
+    """List view ``[[id, cx, cy], ...]`` matching ``HandDetector.findPosition``."""
+    xy = hand[:, :2].astype(np.int32).tolist()
+    return [[idx, x, y] for idx, (x, y) in enumerate(xy)]
+
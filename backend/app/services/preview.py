@@ -0,0 +1,166 @@
+"""MJPEG preview of what the gesture pipeline sees, at ``/gestures/preview``.
+
+The camera frame with the detected hands drawn on it, for debugging gestures
+in a browser instead of ``cv2.imshow`` on a desktop. The inference thread
+only offers a frame while someone is watching, at most ``fps`` times a second
+and only once the encoder has finished the previous one; it downscales the
+frame to the preview width and copies the landmarks (both are reused right
+after). A separate encoder thread draws the hands and JPEG-encodes each frame
+once, and every viewer is sent that same multipart part: a viewer that can't
+keep up skips frames. Without viewers the pipeline does one attribute check
+per frame and the encoder thread exits.
+
+Viewers count as subscribers for the gesture loop, so opening the preview
+starts the camera on its own.
+"""
+import asyncio
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from ..config.settings import get_settings
+
+# cv2 / numpy are only imported by the pipeline and encoder threads, so the routes
+# can import this module without the CV stack
+
+BOUNDARY = "frame"
+MEDIA_TYPE = f"multipart/x-mixed-replace; boundary={BOUNDARY}"
+
+
+class PreviewStream:
+    def __init__(self, width: Optional[int] = None, fps: Optional[float] = None, quality: Optional[int] = None) -> None:
+        settings = get_settings()
+        # Frames wider than this are downscaled (aspect ratio kept) before drawing
+        self.width = width or settings.gesture_preview_width
+        self.fps = fps or settings.gesture_preview_fps
+        self.quality = quality or settings.gesture_preview_quality
+        self.viewer_count = 0
+        self.has_viewers = asyncio.Event()
+        self.frames_encoded = 0
+        self.encode_ms = 0.0
+        self._cond = threading.Condition()
+        # Set by offer() until the encoder thread is done with the frame in _image
+        self._busy = False
+        self._next_due = 0.0
+        self._image: Any = None
+        self._hands: Any = None
+        self._labels: List[str] = []
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Latest encoded multipart part, shared by every viewer
+        self._part = b""
+        self._new_part = asyncio.Event()
+
+    def due(self, now: float) -> bool:
+        """Whether the pipeline should offer() this frame (called per frame)."""
+        return bool(self.viewer_count) and not self._busy and now >= self._next_due
+
+    def offer(self, img: Any, result) -> None:
+        """Downscale ``img`` (None: draw on black, e.g. for landmark recordings) and
+        queue it with ``result``'s hands for the encoder thread."""
+        import cv2
+        import numpy as np
+
+        self._next_due = time.monotonic() + 0.9 / self.fps
+        scale = min(1.0, self.width / max(result.width, 1))
+        size = (max(1, round(result.width * scale)), max(1, round(result.height * scale)))
+        if self._image is None or self._image.shape[1::-1] != size:
+            self._image = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+        if img is None:
+            self._image[...] = 0
+        elif img.shape[1::-1] == size:
+            self._image[...] = img
+        else:
+            cv2.resize(img, size, dst=self._image, interpolation=cv2.INTER_AREA)
+        self._hands = (result.landmarks[..., :2] * scale).astype(np.int32)
+        self._labels = list(result.labels)
+        with self._cond:
+            self._busy = True
+            self._cond.notify()
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        """Multipart parts for one viewer, until it disconnects."""
+        self._add_viewer()
+        try:
+            while True:
+                new_part = self._new_part
+                await new_part.wait()
+                yield self._part
+        finally:
+            self._remove_viewer()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "viewers": self.viewer_count,
+            "width": self.width,
+            "fps_cap": self.fps,
+            "frames_encoded": self.frames_encoded,
+            "encode_ms": round(self.encode_ms, 2),
+        }
+
+    def _add_viewer(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        with self._cond:
+            self.viewer_count += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._encode_loop, name="gesture-preview", daemon=True)
+                self._thread.start()
+        self.has_viewers.set()
+
+    def _remove_viewer(self) -> None:
+        with self._cond:
+            self.viewer_count -= 1
+            self._cond.notify()
+        if not self.viewer_count:
+            self.has_viewers.clear()
+
+    def _encode_loop(self) -> None:
+        import cv2
+
+        from .landmarks import HAND_CONNECTIONS
+
+        params = [cv2.IMWRITE_JPEG_QUALITY, int(self.quality)]
+        while True:
+            with self._cond:
+                if not self._busy:
+                    self._cond.wait(0.5)
+                if not self._busy:
+                    if not self.viewer_count:
+                        # _add_viewer() starts a new thread under the same lock
+                        self._thread = None
+                        return
+                    continue
+            started = time.perf_counter()
+            img = self._image
+            for hand, label in zip(self._hands.tolist(), self._labels):
+                for a, b in HAND_CONNECTIONS:
+                    cv2.line(img, tuple(hand[a]), tuple(hand[b]), (224, 224, 224), 2)
+                for x, y in hand:
+                    cv2.circle(img, (x, y), 3, (0, 0, 255), cv2.FILLED)
+                if label:
+                    x, y = hand[0]
+                    cv2.putText(img, label, (x + 8, y + 16), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 255), 1, cv2.LINE_AA)
+            ok, jpeg = cv2.imencode(".jpg", img, params)
+            with self._cond:
+                self._busy = False
+            if not ok:
+                continue
+            header = f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n"
+            part = header.encode("ascii") + jpeg.tobytes() + b"\r\n"
+            self.encode_ms = (time.perf_counter() - started) * 1000
+            self.frames_encoded += 1
+            try:
+                self._loop.call_soon_threadsafe(self._publish, part)
+            except RuntimeError:
+                # Event loop closed during shutdown
+                with self._cond:
+                    self._thread = None
+                return
+
+    def _publish(self, part: bytes) -> None:
+        self._part = part
+        new_part, self._new_part = self._new_part, asyncio.Event()
+        new_part.set()
+
+
+preview = PreviewStream()
@@ -0,0 +1,117 @@
+"""Bounded in-memory cache of Spotify API responses (see spotify._get_json).
+
+Entries are keyed by a hash of the ``Authorization`` header the response was
+fetched with, plus the API path and query, so nothing is ever served to a
+different token. Each entry is fresh for its endpoint's TTL; after that it's
+revalidated with ``If-None-Match`` and a 304 just renews it. The least
+recently used entries are evicted once the cached response bodies exceed
+``max_bytes``.
+
+Playlist responses carry a ``snapshot_id`` that changes with the content;
+when a newer one shows up (in the playlist itself or the user's playlist
+list) every cached response for that playlist is dropped.
+
+Cached data is shared between requests and must not be mutated.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from ..config.settings import get_settings
+
+# (user, path, sorted query items)
+CacheKey = Tuple[bytes, str, Tuple[Tuple[str, Any], ...]]
+
+# Snapshot ids remembered per user and playlist, oldest forgotten first
+_MAX_SNAPSHOTS = 4096
+
+
+class CacheEntry:
+    __slots__ = ("data", "etag", "expires_at", "size", "playlist_id")
+
+    def __init__(self, data: Any, etag: Optional[str], expires_at: float, size: int, playlist_id: Optional[str]) -> None:
+        self.data = data
+        self.etag = etag
+        self.expires_at = expires_at
+        self.size = size
+        self.playlist_id = playlist_id
+
+
+class ResponseCache:
+    def __init__(self, max_bytes: Optional[int] = None) -> None:
+        self.max_bytes = max_bytes or int(get_settings().spotify_cache_mb * 1024 * 1024)
+        self._entries: "OrderedDict[CacheKey, CacheEntry]" = OrderedDict()
+        self._snapshots: Dict[Tuple[bytes, str], str] = {}
+        self.bytes = 0
+        # Fresh hits, upstream 304s, full upstream fetches, LRU evictions and
+        # entries dropped for a new snapshot_id
+        self.hits = self.revalidated = self.misses = self.evicted = self.invalidated = 0
+
+    @staticmethod
+    def user_key(authorization: str) -> bytes:
+        return hashlib.sha256(authorization.encode("utf-8")).digest()
+
+    @staticmethod
+    def key(user: bytes, path: str, params: Optional[Dict[str, Any]] = None) -> CacheKey:
+        return user, path, tuple(sorted((params or {}).items()))
+
+    def get(self, key: CacheKey) -> Optional[CacheEntry]:
+        """The entry for ``key``, fresh or not (check ``expires_at``)."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(
+        self,
+        key: CacheKey,
+        data: Any,
+        etag: Optional[str],
+        ttl: float,
+        size: int,
+        playlist_id: Optional[str] = None,
+    ) -> None:
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.bytes -= old.size
+        if size > self.max_bytes:
+            return
+        self._entries[key] = CacheEntry(data, etag, time.monotonic() + ttl, size, playlist_id)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= evicted.size
+            self.evicted += 1
+
+    def note_snapshot(self, user: bytes, playlist_id: str, snapshot_id: str) -> None:
+        """Record a playlist's current snapshot_id; a change drops its cached responses."""
+        previous = self._snapshots.pop((user, playlist_id), None)
+        self._snapshots[(user, playlist_id)] = snapshot_id
+        if len(self._snapshots) > _MAX_SNAPSHOTS:
+            del self._snapshots[next(iter(self._snapshots))]
+        if previous is None or previous == snapshot_id:
+            return
+        stale = [k for k, e in self._entries.items() if k[0] == user and e.playlist_id == playlist_id]
+        for k in stale:
+            self.bytes -= self._entries.pop(k).size
+        self.invalidated += len(stale)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._snapshots.clear()
+        self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.revalidated + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.revalidated) / lookups, 3) if lookups else 0.0,
+            "evicted": self.evicted,
+            "invalidated": self.invalidated,
+        }
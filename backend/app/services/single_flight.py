@@ -0,0 +1,70 @@
+"""Coalesces identical concurrent upstream calls (see spotify._get_json).
+
+The first caller for a key starts the call as a task and later callers with
+the same key await that task instead of starting their own, until it
+finishes: everyone gets the same result, or the same exception. The task is
+shielded, so a caller that goes away (e.g. a closed browser tab) doesn't
+cancel it for the others; once the last one has gone the task is cancelled
+too, so nobody keeps waiting on an upstream request no one will read.
+
+Results are shared between callers and must not be mutated.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        # Callers still awaiting each task
+        self._waiters: Dict["asyncio.Task[Any]", int] = {}
+        # Upstream calls made, and callers that joined one instead of making their own
+        self.calls = 0
+        self.shared = 0
+        self.failed = 0
+        # Calls cancelled because every caller went away
+        self.abandoned = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self.calls += 1
+            task.add_done_callback(lambda t: self._finished(key, t))
+        else:
+            self.shared += 1
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            waiting = self._waiters.pop(task) - 1
+            if waiting:
+                self._waiters[task] = waiting
+            elif not task.done():
+                # Only reached when this last caller was cancelled
+                if self._calls.get(key) is task:
+                    del self._calls[key]
+                task.cancel()
+                self.abandoned += 1
+
+    def stats(self) -> Dict[str, Any]:
+        requests = self.calls + self.shared
+        return {
+            "in_flight": len(self._calls),
+            "upstream_calls": self.calls,
+            "coalesced": self.shared,
+            "saved": round(self.shared / requests, 3) if requests else 0.0,
+            "failed": self.failed,
+            "abandoned": self.abandoned,
+        }
+
+    def _finished(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Retrieve the exception even if every caller has gone away, so asyncio
+        # doesn't log it as never retrieved
+        if not task.cancelled() and task.exception() is not None:
+            self.failed += 1
@@ -1,13 +1,28 @@
-from typing import Any, Dict, Optional
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+import asyncio
 import logging
+import time
 import httpx
+from ..config.settings import get_settings
 from ..services.auth import get_valid_access_token, refresh_access_token
+from ..services.http_client import get_client
+from ..services.response_cache import CacheKey, ResponseCache
+from ..services.single_flight import SingleFlight
 
 
 SPOTIFY_API = "https://api.spotify.com/v1"
+# Largest page /playlists/{id}/tracks returns
+TRACKS_PAGE_LIMIT = 100
 # Use uvicorn's error logger so messages appear in the default console output
 logger = logging.getLogger("uvicorn.error")
 
+settings = get_settings()
+# Playlist responses, per access token (see response_cache.py)
+cache = ResponseCache()
+# Identical concurrent requests (same token, path and query) share one upstream call
+flights = SingleFlight()
+
 
 def _log_search_result(query: str, label: str, data: Dict[str, Any]) -> None:
     try:
@@ -36,14 +51,14 @@ def _log_search_result(query: str, label: str, data: Dict[str, Any]) -> None:
         logger.warning("[Spotify search] logging failed: %s", e)
 
 
-async def _authorized_client(token_override: Optional[str] = None) -> httpx.AsyncClient:
+async def _auth_headers(token_override: Optional[str] = None) -> Dict[str, str]:
     if token_override:
         # token_override may already include 'Bearer '
         if token_override.lower().startswith("bearer "):
             auth_header = token_override
         else:
             auth_header = f"Bearer {token_override}"
-        return httpx.AsyncClient(headers={"Authorization": auth_header})
+        return {"Authorization": auth_header}
 
     token = get_valid_access_token()
     if not token:
@@ -52,84 +67,256 @@ async def _authorized_client(token_override: Optional[str] = None) -> httpx.Asyn
         token = get_valid_access_token()
         if not token:
             raise RuntimeError("Not authenticated with Spotify")
-    headers = {"Authorization": f"Bearer {token}"}
-    return httpx.AsyncClient(headers=headers)
+    return {"Authorization": f"Bearer {token}"}
 
 
-async def get_me_playlists(limit: int = 20, token_override: Optional[str] = None) -> Dict[str, Any]:
-    async with await _authorized_client(token_override) as client:
-        resp = await client.get(f"{SPOTIFY_API}/me/playlists", params={"limit": limit})
-        if resp.status_code == 401:
-            await refresh_access_token()
-            async with await _authorized_client(token_override) as client2:
-                resp = await client2.get(f"{SPOTIFY_API}/me/playlists", params={"limit": limit})
+async def _get(
+    path: str,
+    params: Optional[Dict[str, Any]] = None,
+    token_override: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> httpx.Response:
+    """GET an API path on the shared client; on 401, refresh the token and retry once.
+    A 304 (answer to a conditional ``headers``) is returned, not raised."""
+    client = get_client()
+    url = f"{SPOTIFY_API}{path}"
+    resp = await client.get(url, params=params, headers={**await _auth_headers(token_override), **(headers or {})})
+    if resp.status_code == 401:
+        await refresh_access_token()
+        resp = await client.get(url, params=params, headers={**await _auth_headers(token_override), **(headers or {})})
+    if resp.status_code != 304:
         resp.raise_for_status()
-        return resp.json()
+    return resp
 
 
-async def get_playlist_tracks(playlist_id: str, limit: int = 100, token_override: Optional[str] = None) -> Dict[str, Any]:
-    async with await _authorized_client(token_override) as client:
-        resp = await client.get(f"{SPOTIFY_API}/playlists/{playlist_id}/tracks", params={"limit": limit})
-        if resp.status_code == 401:
-            await refresh_access_token()
-            async with await _authorized_client(token_override) as client2:
-                resp = await client2.get(f"{SPOTIFY_API}/playlists/{playlist_id}/tracks", params={"limit": limit})
-        resp.raise_for_status()
-        return resp.json()
+async def _get_json(
+    path: str,
+    params: Optional[Dict[str, Any]] = None,
+    token_override: Optional[str] = None,
+    ttl: float = 0.0,
+    playlist_id: Optional[str] = None,
+) -> Any:
+    """Decoded response, from the cache while fresh for ``ttl`` seconds and
+    revalidated with its ETag after that. ``playlist_id`` tags the entry for
+    snapshot_id invalidation. Concurrent misses for the same key share one fetch."""
+    user = cache.user_key((await _auth_headers(token_override))["Authorization"])
+    key = cache.key(user, path, params)
+    if ttl > 0:
+        entry = cache.get(key)
+        if entry is not None and entry.expires_at > time.monotonic():
+            cache.hits += 1
+            return entry.data
+    return await flights.do(key, lambda: _fetch_json(key, path, params, token_override, ttl, playlist_id))
+
+
+async def _fetch_json(
+    key: CacheKey,
+    path: str,
+    params: Optional[Dict[str, Any]],
+    token_override: Optional[str],
+    ttl: float,
+    playlist_id: Optional[str],
+) -> Any:
+    if ttl <= 0:
+        return (await _get(path, params, token_override)).json()
+    entry = cache.get(key)
+    conditional = {"If-None-Match": entry.etag} if entry is not None and entry.etag else None
+    resp = await _get(path, params, token_override, conditional)
+    # Stored under the token that got the answer (a 401 may have refreshed it)
+    user = cache.user_key(resp.request.headers["Authorization"])
+    if resp.status_code == 304:
+        cache.revalidated += 1
+        cache.put(cache.key(user, path, params), entry.data, entry.etag, ttl, entry.size, playlist_id)
+        return entry.data
+    cache.misses += 1
+    data = resp.json()
+    # A playlist, or a page of them: a new snapshot_id drops what's cached for it
+    for item in (data.get("items") or []) if "items" in data else [data]:
+        if isinstance(item, dict) and item.get("id") and item.get("snapshot_id"):
+            cache.note_snapshot(user, item["id"], item["snapshot_id"])
+    cache.put(cache.key(user, path, params), data, resp.headers.get("ETag"), ttl, len(resp.content), playlist_id)
+    return data
+
+
+async def get_me_playlists(limit: int = 20, token_override: Optional[str] = None) -> Dict[str, Any]:
+    return await _get_json("/me/playlists", {"limit": limit}, token_override, ttl=settings.spotify_cache_ttl_me_s)
+
+
+def _with_fields(params: Dict[str, Any], fields: Optional[str]) -> Dict[str, Any]:
+    # Spotify's own projection, e.g. "items(track(name,uri,artists(name))),total"
+    return {**params, "fields": fields} if fields else params
+
+
+def paging_fields(fields: Optional[str]) -> Optional[str]:
+    """``fields`` plus whichever of total / limit / offset it leaves out, which
+    paging through a playlist needs (None: everything is returned anyway)."""
+    if not fields:
+        return fields
+    top, depth, token = set(), 0, ""
+    for ch in fields + ",":
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            top.add(token.strip())
+            token = ""
+            continue
+        if depth == 0 and ch != ")":
+            token += ch
+    missing = [name for name in ("total", "limit", "offset") if name not in top]
+    return ",".join([fields] + missing)
+
+
+async def get_playlist_tracks(
+    playlist_id: str, limit: int = 100, token_override: Optional[str] = None, fields: Optional[str] = None
+) -> Dict[str, Any]:
+    return await _get_json(
+        f"/playlists/{playlist_id}/tracks",
+        _with_fields({"limit": limit}, fields),
+        token_override,
+        ttl=settings.spotify_cache_ttl_playlist_s,
+        playlist_id=playlist_id,
+    )
+
+
+async def iter_playlist_tracks(
+    playlist_id: str,
+    first_page: Dict[str, Any],
+    token_override: Optional[str] = None,
+    fields: Optional[str] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Every page of a playlist's tracks in order, starting with ``first_page``
+    (from get_playlist_tracks() with the same ``fields``, which must include
+    total: see paging_fields()). The pages after it are fetched
+    ``spotify_page_concurrency`` at a time, a window that only moves on as
+    pages are consumed, so a slow reader doesn't make us fetch ahead."""
+    yield first_page
+    limit = first_page.get("limit") or TRACKS_PAGE_LIMIT
+    offsets = iter(range(first_page.get("offset", 0) + limit, int(first_page.get("total") or 0), limit))
+    path = f"/playlists/{playlist_id}/tracks"
+    ttl = settings.spotify_cache_ttl_playlist_s
+
+    def fetch(offset: int) -> "asyncio.Task[Any]":
+        params = _with_fields({"limit": limit, "offset": offset}, fields)
+        return asyncio.ensure_future(_get_json(path, params, token_override, ttl=ttl, playlist_id=playlist_id))
+
+    window: Deque["asyncio.Task[Any]"] = deque(
+        fetch(o) for _, o in zip(range(max(1, settings.spotify_page_concurrency)), offsets)
+    )
+    try:
+        while window:
+            page = await window.popleft()
+            offset = next(offsets, None)
+            if offset is not None:
+                window.append(fetch(offset))
+            yield page
+    finally:
+        for task in window:
+            task.cancel()
 
 
 async def search_global(query: str, limit: int = 10, token_override: Optional[str] = None) -> Dict[str, Any]:
-    async with await _authorized_client(token_override) as client:
-        resp = await client.get(
-            f"{SPOTIFY_API}/search",
-            params={"q": query, "type": "track,playlist,album,artist", "limit": limit, "market": "from_token"},
+    user = cache.user_key((await _auth_headers(token_override))["Authorization"])
+    key = cache.key(user, "/search", {"q": query, "limit": limit})
+    return await flights.do(key, lambda: _search(query, limit, token_override))
+
+
+async def _search(query: str, limit: int, token_override: Optional[str]) -> Dict[str, Any]:
+    resp = await _get(
+        "/search",
+        {"q": query, "type": "track,playlist,album,artist", "limit": limit, "market": "from_token"},
+        token_override,
+    )
+    data = resp.json()
+    _log_search_result(query, "primary market=from_token", data)
+    # Fallback: if no items returned, retry without market and include external audio
+    try:
+        tracks_empty = not (data.get("tracks", {}).get("items"))
+        playlists_empty = not (data.get("playlists", {}).get("items"))
+        albums_empty = not (data.get("albums", {}).get("items"))
+        artists_empty = not (data.get("artists", {}).get("items"))
+    except Exception:
+        tracks_empty = playlists_empty = albums_empty = artists_empty = False
+    if tracks_empty and playlists_empty and albums_empty and artists_empty:
+        resp2 = await _get(
+            "/search",
+            {"q": query, "type": "track,playlist,album,artist", "limit": limit, "include_external": "audio"},
+            token_override,
         )
-        if resp.status_code == 401:
-            await refresh_access_token()
-            async with await _authorized_client(token_override) as client2:
-                resp = await client2.get(
-                    f"{SPOTIFY_API}/search",
-                    params={"q": query, "type": "track,playlist,album,artist", "limit": limit, "market": "from_token"},
-                )
-        resp.raise_for_status()
-        data = resp.json()
-        _log_search_result(query, "primary market=from_token", data)
-        # Fallback: if no items returned, retry without market and include external audio
-        try:
-            tracks_empty = not (data.get("tracks", {}).get("items"))
-            playlists_empty = not (data.get("playlists", {}).get("items"))
-            albums_empty = not (data.get("albums", {}).get("items"))
-            artists_empty = not (data.get("artists", {}).get("items"))
-        except Exception:
-            tracks_empty = playlists_empty = albums_empty = artists_empty = False
-        if tracks_empty and playlists_empty and albums_empty and artists_empty:
-            resp2 = await client.get(
-                f"{SPOTIFY_API}/search",
-                params={"q": query, "type": "track,playlist,album,artist", "limit": limit, "include_external": "audio"},
-            )
-            # best-effort: if unauthorized, refresh and retry once
-            if resp2.status_code == 401:
-                await refresh_access_token()
-                async with await _authorized_client(token_override) as client3:
-                    resp2 = await client3.get(
-                        f"{SPOTIFY_API}/search",
-                        params={"q": query, "type": "track,playlist,album,artist", "limit": limit, "include_external": "audio"},
-                    )
-            resp2.raise_for_status()
-            fallback_data = resp2.json()
-            _log_search_result(query, "fallback include_external", fallback_data)
-            return fallback_data
-        return data
-
-
-async def get_playlist_detail(playlist_id: str, token_override: Optional[str] = None) -> Dict[str, Any]:
-    async with await _authorized_client(token_override) as client:
-        resp = await client.get(f"{SPOTIFY_API}/playlists/{playlist_id}")
-        if resp.status_code == 401:
-            await refresh_access_token()
-            async with await _authorized_client(token_override) as client2:
-                resp = await client2.get(f"{SPOTIFY_API}/playlists/{playlist_id}")
-        resp.raise_for_status()
-        return resp.json()
+        fallback_data = resp2.json()
+        _log_search_result(query, "fallback include_external", fallback_data)
+        return fallback_data
+    return data
+
+
+async def get_playlist_detail(
+    playlist_id: str, token_override: Optional[str] = None, fields: Optional[str] = None
+) -> Dict[str, Any]:
+    return await _get_json(
+        f"/playlists/{playlist_id}",
+        _with_fields({}, fields),
+        token_override=token_override,
+        ttl=settings.spotify_cache_ttl_playlist_s,
+        playlist_id=playlist_id,
+    )
+
+
+def _image(images: Any) -> List[Dict[str, Any]]:
+    # The one closest to 300 px wide (Spotify sends 640 / 300 / 64)
+    images = [i for i in images or [] if isinstance(i, dict) and i.get("url")]
+    if not images:
+        return []
+    best = min(images, key=lambda i: abs((i.get("width") or 300) - 300))
+    return [{"url": best["url"], "width": best.get("width"), "height": best.get("height")}]
+
+
+def _artists(obj: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"id": a.get("id"), "name": a.get("name")} for a in obj.get("artists") or [] if isinstance(a, dict)]
+
+
+def _slim_track(t: Dict[str, Any]) -> Dict[str, Any]:
+    album = t.get("album") or {}
+    return {
+        "id": t.get("id"),
+        "name": t.get("name"),
+        "uri": t.get("uri"),
+        "duration_ms": t.get("duration_ms"),
+        "artists": _artists(t),
+        "album": {"id": album.get("id"), "name": album.get("name"), "images": _image(album.get("images"))},
+    }
+
+
+def _slim_playlist(p: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": p.get("id"),
+        "name": p.get("name"),
+        "uri": p.get("uri"),
+        "images": _image(p.get("images")),
+        "tracks": {"total": (p.get("tracks") or {}).get("total")},
+    }
+
+
+def _slim_album(a: Dict[str, Any]) -> Dict[str, Any]:
+    return {"id": a.get("id"), "name": a.get("name"), "uri": a.get("uri"), "artists": _artists(a), "images": _image(a.get("images"))}
+
+
+def _slim_artist(a: Dict[str, Any]) -> Dict[str, Any]:
+    return {"id": a.get("id"), "name": a.get("name"), "uri": a.get("uri"), "images": _image(a.get("images"))}
+
+
+_SLIM = {"tracks": _slim_track, "playlists": _slim_playlist, "albums": _slim_album, "artists": _slim_artist}
 
 
+def slim_search(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Search results in Spotify's shape, with only the fields the UI reads
+    (no markets, one image per item, artists as id + name). Builds new dicts:
+    ``data`` may be shared (see single_flight.py)."""
+    out: Dict[str, Any] = {}
+    for kind, project in _SLIM.items():
+        section = data.get(kind)
+        if not isinstance(section, dict):
+            continue
+        items = [project(it) for it in section.get("items") or [] if isinstance(it, dict)]
+        out[kind] = {"items": items, "total": section.get("total")}
+    return out
@@ -1,41 +1,231 @@
-from typing import Set, Dict, Any
+from collections import deque
+from typing import Deque, Dict, Any, Optional, Tuple
 from fastapi import WebSocket
 import asyncio
+import json
+import logging
+import time
+from ..config.settings import get_settings
+from . import wire_protocol as wire
+
+
+logger = logging.getLogger("uvicorn.error")
+
+# Close code for evicted clients ("try again later"); the frontend reconnects
+EVICTED = 1013
+
+
+def encode(event: Dict[str, Any]) -> str:
+    # Same encoding as WebSocket.send_json()
+    return json.dumps(event, separators=(",", ":"), ensure_ascii=False)
+
+
+def latest_key(event: Dict[str, Any]) -> Optional[str]:
+    """Continuous events (with a ``value``, e.g. volume) only matter as their
+    latest value, so a slow client gets that instead of the backlog."""
+    return event.get("action") if "value" in event else None
+
+
+class _Client:
+    """One connection's outbound queue, drained by its own sender task."""
+
+    __slots__ = ("ws", "binary", "queue", "latest", "wake", "task")
+
+    def __init__(self, ws: WebSocket, binary: bool = False) -> None:
+        self.ws = ws
+        # wire_protocol frames instead of JSON text
+        self.binary = binary
+        # (enqueued_at, text, key, record); a coalesced event (key set) is queued
+        # once and its current version lives in ``latest`` until sent
+        self.queue: Deque[tuple] = deque()
+        self.latest: Dict[str, tuple] = {}
+        self.wake = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
 
 
 class WebSocketManager:
-    def __init__(self) -> None:
-        self._clients: Set[WebSocket] = set()
-        self._lock = asyncio.Lock()
+    """Fans events out to WebSocket clients without ever waiting on one.
+
+    ``broadcast()`` serializes an event once as JSON text, plus once as a
+    wire_protocol record while binary clients are connected, and hands it to
+    a dispatcher task, so its cost doesn't grow with the number of clients.
+    The dispatcher appends it to every client's bounded queue and a sender
+    task per client does the actual sends. Discrete actions are never dropped: a client whose queue
+    fills up, or whose oldest message is older than ``ws_max_lag_s``, is
+    disconnected instead (it reconnects and starts fresh). Continuous events
+    are coalesced per client, so a slow client only ever gets the latest volume.
+
+    Nothing on the per-frame path takes a lock: the client set is replaced
+    (copy-on-write) on connect / disconnect, ``client_count`` is a plain
+    attribute, and ``wait_for_subscribers()`` blocks on an event instead of
+    polling the count.
+    """
 
-    async def connect(self, ws: WebSocket) -> None:
-        await ws.accept()
-        async with self._lock:
-            self._clients.add(ws)
+    def __init__(self, queue_size: Optional[int] = None, max_lag_s: Optional[float] = None) -> None:
+        settings = get_settings()
+        self.queue_size = queue_size or settings.ws_send_queue_size
+        self.max_lag_s = max_lag_s or settings.ws_max_lag_s
+        self._clients: Dict[WebSocket, _Client] = {}
+        # Immutable view for the dispatcher, replaced whenever a client comes or goes
+        self._snapshot: Tuple[_Client, ...] = ()
+        self.client_count = 0
+        self._binary_count = 0
+        self.has_subscribers = asyncio.Event()
+        # Serialized events waiting for the dispatcher: (enqueued_at, text, key, record)
+        self._outbox: Deque[tuple] = deque()
+        self._outbox_ready = asyncio.Event()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.evicted = 0
+
+    async def connect(self, ws: WebSocket, binary: bool = False, subprotocol: Optional[str] = None) -> None:
+        await ws.accept(subprotocol=subprotocol)
+        client = _Client(ws, binary)
+        client.task = asyncio.create_task(self._sender(client))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        self._clients[ws] = client
+        self._clients_changed()
 
     async def disconnect(self, ws: WebSocket) -> None:
-        async with self._lock:
-            if ws in self._clients:
-                self._clients.remove(ws)
-
-    async def broadcast(self, event: Dict[str, Any]) -> None:
-        async with self._lock:
-            clients = list(self._clients)
-        for ws in clients:
+        self._drop(ws)
+
+    async def broadcast(self, event: Dict[str, Any], text: Optional[str] = None) -> None:
+        """Queue an event for every client. ``text`` is its JSON encoding when the
+        caller already has one (e.g. relayed from the gesture worker)."""
+        if not self.client_count:
+            return
+        # Encoded now: the caller may reuse the dict once this returns. The text is
+        # kept even when every client is binary: a JSON client can connect before
+        # the dispatcher gets to this event
+        now = time.monotonic()
+        record = wire.pack_event(event, now) if self._binary_count else None
+        if text is None:
+            text = encode(event)
+        self._outbox.append((now, text, latest_key(event), record))
+        self._outbox_ready.set()
+
+    async def get_client_count(self) -> int:
+        return self.client_count
+
+    async def wait_for_subscribers(self, timeout: Optional[float] = None) -> bool:
+        """Wait until at least one client is connected; False on timeout."""
+        if self.client_count:
+            return True
+        try:
+            await asyncio.wait_for(self.has_subscribers.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def _dispatch(self) -> None:
+        outbox = self._outbox
+        while True:
+            await self._outbox_ready.wait()
+            self._outbox_ready.clear()
+            # Everything broadcast since the last pass, so each client wakes once
+            batch = list(outbox)
+            outbox.clear()
+            now = time.monotonic()
+            for client in self._snapshot:
+                queue, latest = client.queue, client.latest
+                if queue and now - queue[0][0] > self.max_lag_s:
+                    self._evict(client, f"{now - queue[0][0]:.1f}s behind")
+                    continue
+                idle, full = not queue, False
+                for item in batch:
+                    key = item[2]
+                    if key is not None:
+                        if key not in latest:
+                            queue.append(item)
+                        latest[key] = item
+                    elif len(queue) >= self.queue_size:
+                        full = True
+                        break
+                    else:
+                        queue.append(item)
+                if full:
+                    self._evict(client, "send queue full")
+                elif idle and queue:
+                    client.wake.set()
+
+    async def _sender(self, client: _Client) -> None:
+        queue, latest, ws = client.queue, client.latest, client.ws
+        try:
+            while True:
+                await client.wake.wait()
+                client.wake.clear()
+                while queue:
+                    if client.binary:
+                        await self._send_frames(client)
+                        continue
+                    item = queue[0]
+                    if item[2] is not None:
+                        # Coalesced event: send its latest value
+                        item = latest.pop(item[2])
+                    await ws.send_text(item[1])
+                    queue.popleft()
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            await self.disconnect(ws)
             try:
-                await ws.send_json(event)
+                await ws.close()
             except Exception:
-                try:
-                    await ws.close()
-                except Exception:
-                    pass
-                await self.disconnect(ws)
+                pass
 
-    async def get_client_count(self) -> int:
-        async with self._lock:
-            return len(self._clients)
+    @staticmethod
+    async def _send_frames(client: _Client) -> None:
+        """Everything queued as one binary frame (split around events that only
+        have a JSON form), then drop it from the queue."""
+        queue, latest, ws = client.queue, client.latest, client.ws
+        count = len(queue)
+        records = []
+        for i in range(count):
+            item = queue[i]
+            if item[2] is not None:
+                item = latest.pop(item[2])
+            if item[3] is not None:
+                records.append(item[3])
+                continue
+            if records:
+                await ws.send_bytes(wire.pack_frame(records))
+                records = []
+            await ws.send_text(item[1])
+        if records:
+            await ws.send_bytes(wire.pack_frame(records))
+        for _ in range(count):
+            queue.popleft()
 
+    def _clients_changed(self) -> None:
+        self._snapshot = tuple(self._clients.values())
+        self.client_count = len(self._snapshot)
+        self._binary_count = sum(client.binary for client in self._snapshot)
+        if self.client_count:
+            self.has_subscribers.set()
+        else:
+            self.has_subscribers.clear()
 
-manager = WebSocketManager()
+    def _drop(self, ws: WebSocket) -> None:
+        client = self._clients.pop(ws, None)
+        if client is None:
+            return
+        self._clients_changed()
+        if client.task is not asyncio.current_task():
+            client.task.cancel()
 
+    def _evict(self, client: _Client, reason: str) -> None:
+        logger.warning("Disconnecting slow WebSocket client (%s)", reason)
+        self.evicted += 1
+        self._drop(client.ws)
+        # Closing a stalled socket can block too; don't hold up the others
+        asyncio.ensure_future(self._close(client.ws))
 
+    @staticmethod
+    async def _close(ws: WebSocket) -> None:
+        try:
+            await asyncio.wait_for(ws.close(code=EVICTED), timeout=1.0)
+        except Exception:
+            pass
+
+
+manager = WebSocketManager()
@@ -0,0 +1,49 @@
+"""Binary framing for ``/ws/gestures`` (opt-in; JSON text frames stay the default).
+
+A client selects it with the ``gestify.v1.bin`` WebSocket subprotocol or
+``?format=binary``. Every binary message is one frame holding all events
+produced in the same gesture loop tick (or everything a slow client had
+queued), little-endian::
+
+    header  u8 version (1), u8 kind (1 = events), u16 count
+    count x u8  action   index into ACTIONS
+            u8  flags    bit 0: value present
+            i16 value    e.g. volume 0-100
+            u32 t_ms     server monotonic milliseconds (wraps after ~49 days)
+
+so a volume update is 12 bytes instead of ~40 of JSON. Actions not in
+``ACTIONS`` (custom ones from gestures.json) are still sent to binary clients,
+as JSON text frames.
+"""
+import struct
+import time
+from typing import Any, Dict, Iterable, Optional
+
+SUBPROTOCOL = "gestify.v1.bin"
+VERSION = 1
+KIND_EVENTS = 1
+# Append only: the index is the wire value (frontend/src/hooks/useWebSocket.ts)
+ACTIONS = ("toggle_play", "next_track", "previous_track", "volume_control")
+ACTION_IDS = {name: i for i, name in enumerate(ACTIONS)}
+HAS_VALUE = 1
+
+_HEADER = struct.Struct("<BBH")
+_RECORD = struct.Struct("<BBhI")
+_EPOCH = time.monotonic()
+
+
+def pack_event(event: Dict[str, Any], now: Optional[float] = None) -> Optional[bytes]:
+    """One event record, or None when the action has no wire id."""
+    action = ACTION_IDS.get(event.get("action"))
+    if action is None:
+        return None
+    value = event.get("value")
+    t_ms = int(((time.monotonic() if now is None else now) - _EPOCH) * 1000) & 0xFFFFFFFF
+    if value is None:
+        return _RECORD.pack(action, 0, 0, t_ms)
+    return _RECORD.pack(action, HAS_VALUE, max(-32768, min(32767, int(value))), t_ms)
+
+
+def pack_frame(records: Iterable[bytes]) -> bytes:
+    records = list(records)
+    return _HEADER.pack(VERSION, KIND_EVENTS, len(records)) + b"".join(records)
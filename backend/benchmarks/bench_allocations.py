@@ -0,0 +1,158 @@
+"""Per-frame Python allocations on the steady-state gesture path.
+
+Replays a two-hand MediaPipe result through FramePipeline.process_frame and
+GestureLoop._handle_frame (the model itself is stubbed out, since its
+allocations happen in C++) at 30 FPS of frame time. The left thumb sweeps
+back and forth along a ramp, so the volume gesture keeps emitting (the
+reused event dict, the sink's broadcast) during the measured frames, and
+reports, after warm-up:
+
+- peak bytes allocated within a frame above what was allocated when it
+  started (tracemalloc), i.e. the transient allocations that are freed again
+  before the next frame, as the worst and median frame,
+- net bytes still allocated per frame,
+- garbage collections triggered, and
+- events emitted (the run fails without any).
+
+Every numpy call keeps a little iterator state alive while it runs, so the
+peak can't reach zero: the budget is a few such calls, and anything that
+allocates per-frame arrays, images or lists on top of them fails it.
+
+Exits non-zero if any exceeds its budget, so it can gate CI:
+
+    python -m benchmarks.bench_allocations --frames 2000
+"""
+import argparse
+import asyncio
+import gc
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from mediapipe.framework.formats import classification_pb2, landmark_pb2
+
+from app.services.frame_pipeline import FramePipeline
+from app.services.gesture_loop import GestureLoop
+
+FPS = 30.0
+# Left thumb-to-index distance in normalized x, a triangle over RAMP_FRAMES
+# frames across the default volume range (0.027 - 0.195 frame widths)
+RAMP_FRAMES = 60
+RAMP = [0.03 + 0.16 * (1 - abs(1 - 2 * i / RAMP_FRAMES)) for i in range(RAMP_FRAMES)]
+
+
+class _Results:
+    def __init__(self, hands, handedness) -> None:
+        self.multi_hand_landmarks = hands
+        self.multi_handedness = handedness
+
+
+def _fixed_results() -> _Results:
+    rng = np.random.default_rng(0)
+    hands, handedness = [], []
+    for label, x0 in (("Left", 0.3), ("Right", 0.6)):
+        lms = landmark_pb2.NormalizedLandmarkList()
+        for x, y in rng.random((21, 2)) * 0.3:
+            lms.landmark.add(x=x0 + float(x), y=0.3 + float(y), z=0.0)
+        # Right index finger up, so the volume branch runs every frame
+        if label == "Right":
+            lms.landmark[8].y, lms.landmark[6].y = 0.1, 0.5
+        hands.append(lms)
+        cls = classification_pb2.ClassificationList()
+        cls.classification.add(label=label, score=0.99)
+        handedness.append(cls)
+    return _Results(hands, handedness)
+
+
+class _NullSink:
+    client_count = 1
+
+    def __init__(self) -> None:
+        self.events = 0
+
+    async def broadcast(self, event) -> None:
+        self.events += 1
+
+    async def wait_for_subscribers(self, timeout=None) -> bool:
+        return True
+
+
+class _FixedBackend:
+    name = "fixed"
+    live = False
+
+    def __init__(self, results: _Results) -> None:
+        self.results = results
+
+    def process(self, imgRGB, timestamp_ms: int):
+        return self.results
+
+
+async def run(frames: int, warmup: int) -> tuple:
+    sink = _NullSink()
+    loop = GestureLoop(sink=sink)
+    loop.load_mapping()
+    loop.build_detector()
+    loop.plan.area_min[:], loop.plan.area_max[:] = 0.0, 1.0
+    results = _fixed_results()
+    loop.detector.backend = _FixedBackend(results)
+    thumb, index = results.multi_hand_landmarks[0].landmark[4], results.multi_hand_landmarks[0].landmark[8]
+    pipeline = FramePipeline(loop.detector, asyncio.get_running_loop())
+    img = np.zeros((720, 1280, 3), dtype=np.uint8)
+    clock = iter(range(1 << 62))
+
+    async def step() -> None:
+        i = next(clock)
+        thumb.x = index.x - RAMP[i % RAMP_FRAMES]
+        result = pipeline.process_frame(img, i / FPS)
+        await loop._handle_frame(result)
+        pipeline.release(result)
+
+    # Traced (and collected) before the warm-up: the first frames after either
+    # allocate more than the steady state does
+    tracemalloc.start()
+    gc.collect()
+    for _ in range(warmup):
+        await step()
+    collections_before = sum(s["collections"] for s in gc.get_stats())
+    events_before = sink.events
+    peaks = np.zeros(frames)
+    before, _ = tracemalloc.get_traced_memory()
+    for i in range(frames):
+        tracemalloc.reset_peak()
+        start, _ = tracemalloc.get_traced_memory()
+        await step()
+        _, peak = tracemalloc.get_traced_memory()
+        peaks[i] = peak - start
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    collections = sum(s["collections"] for s in gc.get_stats()) - collections_before
+    return peaks, (after - before) / frames, collections, sink.events - events_before
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--max-peak-bytes", type=int, default=4096, help="transient bytes in the worst frame")
+    parser.add_argument("--max-bytes-per-frame", type=float, default=8.0, help="net bytes retained per frame")
+    parser.add_argument("--max-collections", type=int, default=0)
+    args = parser.parse_args()
+
+    peaks, per_frame, collections, events = asyncio.run(run(args.frames, args.warmup))
+    print(
+        f"frames={args.frames} peak_bytes_max={peaks.max():.0f} peak_bytes_median={np.median(peaks):.0f} "
+        f"net_bytes_per_frame={per_frame:.2f} gc_collections={collections} events={events}"
+    )
+    if (
+        peaks.max() > args.max_peak_bytes
+        or per_frame > args.max_bytes_per_frame
+        or collections > args.max_collections
+        or not events
+    ):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
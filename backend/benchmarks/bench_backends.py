@@ -0,0 +1,119 @@
+"""Latency and CPU per frame for each hand inference backend configuration.
+
+Run from ``backend/``:
+
+    python -m benchmarks.bench_backends --video sample.mp4
+    python -m benchmarks.bench_backends --model hand_landmarker.task --hands 1,2
+
+Compares ``solutions`` at model complexity 0 (lite) and 1 (full) with the
+Tasks ``HandLandmarker`` in VIDEO and LIVE_STREAM mode. Tasks configurations
+are skipped unless ``--model`` points at a ``.task`` bundle.
+
+``call ms`` is the time findHands() blocks the inference thread; for the
+live stream that's only the submit, and ``latency ms`` is submit → result
+callback. ``results`` is the fraction of frames that produced a result
+(the live stream drops frames while the model is busy).
+"""
+import argparse
+import os
+import time
+from typing import List
+
+import cv2
+import numpy as np
+
+from app.services.hand_tracking import HandDetector
+from benchmarks.bench_resolution import load_frames
+
+
+def configs(model: str | None, hands: List[int]) -> List[dict]:
+    out = []
+    for maxHands in hands:
+        for complexity in (0, 1):
+            out.append({"label": f"solutions c{complexity}", "backend": "solutions", "modelComplexity": complexity, "maxHands": maxHands})
+        if model:
+            out.append({"label": "tasks video", "backend": "tasks", "modelPath": model, "maxHands": maxHands})
+            out.append({"label": "tasks live", "backend": "tasks", "modelPath": model, "liveStream": True, "maxHands": maxHands})
+    return out
+
+
+def run(frames: List[np.ndarray], config: dict, fps: float) -> dict:
+    options = {k: v for k, v in config.items() if k != "label"}
+    detector = HandDetector(detectionCon=0.7, **options)
+    submitted, latencies = {}, []
+    onResult = detector._onAsyncResult
+
+    def timed(results, timestamp: int) -> None:
+        if timestamp in submitted:
+            latencies.append(time.perf_counter() - submitted.pop(timestamp))
+        onResult(results, timestamp)
+
+    if detector.backend.live:
+        detector.backend._onResult = timed
+    h, w = frames[0].shape[:2]
+    detector.warmup(w, h)
+    for img in frames[:5]:
+        detector.findHands(img, draw=False)
+    submitted.clear()
+    latencies.clear()
+
+    produced = hands_seen = 0
+    call_s = 0.0
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    for img in frames:
+        started = time.perf_counter()
+        detector.findHands(img, draw=False)
+        finished = time.perf_counter()
+        call_s += finished - started
+        if detector.backend.live:
+            submitted[detector._lastTimestamp] = started
+        elif detector.freshResults:
+            latencies.append(finished - started)
+        if detector.freshResults:
+            produced += 1
+            hands_seen += len(detector.findLandmarks(img)) > 0
+        if fps:
+            # Pace like a camera so the live stream isn't flooded faster than real time
+            time.sleep(max(0.0, 1 / fps - (time.perf_counter() - started)))
+    wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+    detector.backend.close()
+    n = len(frames)
+    return {
+        "label": config["label"],
+        "hands": config["maxHands"],
+        "call_ms": 1000 * call_s / n,
+        "latency_ms": 1000 * float(np.median(latencies)) if latencies else float("nan"),
+        "cpu_ms": 1000 * cpu / n,
+        "results": produced / n,
+        "hand_rate": hands_seen / max(1, produced),
+        "wall_s": wall,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--video", help="video file to replay (default: synthetic frames)")
+    parser.add_argument("--frames", type=int, default=150)
+    parser.add_argument("--size", default="640x360", help="frame size fed to the detector")
+    parser.add_argument("--hands", default="1,2", help="comma separated maxHands values")
+    parser.add_argument("--model", help="HandLandmarker .task bundle for the tasks backend")
+    parser.add_argument("--fps", type=float, default=30.0, help="replay rate, 0 = as fast as possible")
+    args = parser.parse_args()
+
+    if args.model and not os.path.exists(args.model):
+        raise SystemExit(f"Model not found: {args.model}")
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    frames = [cv2.resize(f, (width, height), interpolation=cv2.INTER_AREA) for f in load_frames(args.video, args.frames)]
+    hands = [int(v) for v in args.hands.split(",")]
+
+    print(f"{'backend':>13} {'hands':>5} {'call ms':>8} {'latency ms':>10} {'cpu ms':>7} {'results':>8} {'w/ hand':>8}")
+    for config in configs(args.model, hands):
+        r = run(frames, config, args.fps)
+        print(
+            f"{r['label']:>13} {r['hands']:>5} {r['call_ms']:8.2f} {r['latency_ms']:10.2f} "
+            f"{r['cpu_ms']:7.2f} {r['results']:8.0%} {r['hand_rate']:8.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
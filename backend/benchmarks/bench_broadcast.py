@@ -0,0 +1,138 @@
+"""WebSocketManager fan-out latency with many, partly slow, clients.
+
+Run from ``backend/``:
+
+    python -m benchmarks.bench_broadcast
+    python -m benchmarks.bench_broadcast --clients 1,100,1000 --slow 0.05 --stalled 0.01
+
+Connects in-process stand-in sockets (half of them in binary mode; a send
+costs one event loop turn, ``--send-ms`` for slow ones, never returns for
+stalled ones) and
+broadcasts a 30 FPS gesture stream: a volume update every frame and a discrete
+action every half second. Reports how long ``broadcast()`` (what the gesture
+loop awaits) takes per call, how late the loop's next 30 FPS tick runs (p95,
+the fan-out work itself), whether every fast and slow client received every
+discrete action, how many volume updates slow clients got (coalesced), and
+how many clients were evicted. ``--max-p95-ms`` exits non-zero above a
+latency ceiling, for CI.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from app.services.websocket_manager import WebSocketManager
+
+
+class _Socket:
+    def __init__(self, delay: float | None) -> None:
+        # None: fast; > 0: slow sends; < 0: stalled (sends never complete)
+        self.delay = delay
+        self.actions = 0
+        self.volumes = 0
+        self.closed = False
+
+    async def accept(self, subprotocol=None) -> None:
+        pass
+
+    async def _wire(self) -> None:
+        if self.delay is None:
+            await asyncio.sleep(0)
+        elif self.delay < 0:
+            await asyncio.Event().wait()
+        else:
+            await asyncio.sleep(self.delay)
+
+    async def send_text(self, text: str) -> None:
+        await self._wire()
+        if '"value"' in text:
+            self.volumes += 1
+        else:
+            self.actions += 1
+
+    async def send_bytes(self, data: bytes) -> None:
+        await self._wire()
+        for i in range(data[2] | data[3] << 8):
+            # wire_protocol record: action id, then the has-value flag
+            if data[4 + i * 8 + 1]:
+                self.volumes += 1
+            else:
+                self.actions += 1
+
+    async def close(self, code: int = 1000) -> None:
+        self.closed = True
+
+
+async def run(clients: int, args) -> Dict[str, float]:
+    manager = WebSocketManager(max_lag_s=args.max_lag)
+    rng = np.random.default_rng(0)
+    kinds = rng.choice(3, size=clients, p=[1 - args.slow - args.stalled, args.slow, args.stalled])
+    sockets: List[_Socket] = [_Socket((None, args.send_ms / 1000, -1.0)[k]) for k in kinds]
+    for i, ws in enumerate(sockets):
+        await manager.connect(ws, binary=i < clients * args.binary)
+
+    frames = int(args.seconds * 30)
+    latencies, late = [], []
+    actions = 0
+    started = time.perf_counter()
+    for frame in range(frames):
+        t0 = time.perf_counter()
+        await manager.broadcast({"action": "volume_control", "value": frame % 101})
+        if frame % 15 == 0:
+            await manager.broadcast({"action": "toggle_play"})
+            actions += 1
+        latencies.append(time.perf_counter() - t0)
+        # Pace like the gesture loop; the dispatcher and sender tasks run in between,
+        # and how late the next tick wakes up is what fan-out costs the loop
+        tick = started + (frame + 1) / 30
+        await asyncio.sleep(max(0.0, tick - time.perf_counter()))
+        late.append(max(0.0, time.perf_counter() - tick))
+    # Let queues drain
+    await asyncio.sleep(max(args.send_ms / 1000 * 4, 0.1))
+
+    ms = np.asarray(latencies) * 1000
+    live = [ws for ws, kind in zip(sockets, kinds) if kind != 2]
+    slow = [ws for ws, kind in zip(sockets, kinds) if kind == 1]
+    return {
+        "p50": float(np.percentile(ms, 50)),
+        "p95": float(np.percentile(ms, 95)),
+        "max": float(ms.max()),
+        "late": float(np.percentile(np.asarray(late) * 1000, 95)),
+        "complete": sum(ws.actions == actions for ws in live) / max(len(live), 1),
+        "slow_volumes": float(np.mean([ws.volumes for ws in slow])) if slow else 0.0,
+        "frames": frames,
+        "evicted": manager.evicted,
+        "stalled": int((kinds == 2).sum()),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", default="1,10,100,1000", help="comma-separated client counts")
+    parser.add_argument("--slow", type=float, default=0.05, help="fraction of slow clients")
+    parser.add_argument("--stalled", type=float, default=0.01, help="fraction of clients that never finish a send")
+    parser.add_argument("--send-ms", type=float, default=100.0, help="per-message send time of slow clients")
+    parser.add_argument("--binary", type=float, default=0.5, help="fraction of clients using binary frames")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--max-lag", type=float, default=2.0, help="WS_MAX_LAG_S for the run")
+    parser.add_argument("--max-p95-ms", type=float, default=0.0, help="exit non-zero above this broadcast p95")
+    args = parser.parse_args()
+
+    print(f"{'clients':>8} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'late p95':>9} {'all actions':>12} {'slow vol/frames':>16} {'evicted':>8}")
+    worst = 0.0
+    for clients in (int(c) for c in args.clients.split(",")):
+        r = asyncio.run(run(clients, args))
+        worst = max(worst, r["p95"])
+        print(
+            f"{clients:>8d} {r['p50']:>8.3f} {r['p95']:>8.3f} {r['max']:>8.3f} {r['late']:>9.2f} {r['complete']:>11.0%} "
+            f"{r['slow_volumes']:>7.0f}/{r['frames']:<8d} {r['evicted']:>4d}/{r['stalled']:<3d}"
+        )
+    if args.max_p95_ms and worst > args.max_p95_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Bytes per frame of the /ws/landmarks stream against naive JSON.
+
+Run from ``backend/``:
+
+    python -m benchmarks.bench_landmark_stream
+    python -m benchmarks.bench_landmark_stream recording.gstrec --fps 15
+
+Feeds frames (a ``.gstrec`` recording, or by default a synthetic hand drifting
+around the frame with ``--noise`` px of landmark jitter, hands leaving now and
+then) through landmark_codec three ways: JSON with float pixel coordinates
+(what sending ``FrameResult`` as-is would cost), key frames only (12-bit
+quantization alone) and the real stream (delta frames between key frames).
+``--fps`` drops frames as a subscriber's cap would, which makes deltas larger.
+Reports bytes per frame and per second for each, and the share of key frames.
+"""
+import argparse
+import json
+from typing import Iterator, List
+
+import numpy as np
+
+from app.services import landmarks as lmk
+from app.services.landmark_codec import KEYFRAME_EVERY, FrameEncoder, quantize
+from app.services.landmark_recording import LABELS, landmarks_px, open_recording
+
+WIDTH, HEIGHT = 1280, 720
+SOURCE_FPS = 30.0
+
+
+class _Result:
+    """The parts of FrameResult that quantize() reads."""
+
+    __slots__ = ("timestamp", "landmarks", "labels", "width", "height")
+
+    def __init__(self, timestamp: float, landmarks: np.ndarray, labels: List[str], width: int, height: int) -> None:
+        self.timestamp = timestamp
+        self.landmarks = landmarks
+        self.labels = labels
+        self.width = width
+        self.height = height
+
+
+def synthetic(seconds: float, noise: float, rng: np.random.Generator) -> Iterator[_Result]:
+    hand = rng.normal(0, 40, size=(lmk.NUM_LANDMARKS, 3)).astype(np.float32)
+    hand[:, 2] = 0
+    for i in range(int(seconds * SOURCE_FPS)):
+        t = i / SOURCE_FPS
+        # About one second without hands every ten
+        if t % 10 > 9:
+            yield _Result(t, np.zeros((0, lmk.NUM_LANDMARKS, 3), dtype=np.float32), [], WIDTH, HEIGHT)
+            continue
+        centre = np.array([WIDTH * (0.5 + 0.3 * np.sin(t * 0.7)), HEIGHT * (0.5 + 0.3 * np.sin(t * 1.1)), 0])
+        points = hand + centre + rng.normal(0, noise, size=hand.shape)
+        points[:, 2] = rng.normal(0, 0.05, size=lmk.NUM_LANDMARKS)
+        yield _Result(t, points[None].astype(np.float32), ["Right"], WIDTH, HEIGHT)
+
+
+def recorded(path: str) -> Iterator[_Result]:
+    _, records = open_recording(path)
+    pixels = landmarks_px(records)
+    for rec, points in zip(records, pixels):
+        n = int(rec["hands"])
+        labels = [LABELS[code] for code in rec["handedness"][:n]]
+        yield _Result(float(rec["timestamp"]), points[:n], labels, int(rec["width"]), int(rec["height"]))
+
+
+def naive_json(result: _Result) -> int:
+    return len(
+        json.dumps(
+            {
+                "t": result.timestamp,
+                "width": result.width,
+                "height": result.height,
+                "hands": [
+                    {"label": label, "landmarks": points.tolist()}
+                    for label, points in zip(result.labels, result.landmarks)
+                ],
+            }
+        )
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recording", nargs="?", help=".gstrec file (default: synthetic hand)")
+    parser.add_argument("--seconds", type=float, default=60.0, help="synthetic stream length")
+    parser.add_argument("--noise", type=float, default=1.5, help="synthetic landmark jitter in pixels")
+    parser.add_argument("--fps", type=float, default=30.0, help="subscriber frame-rate cap")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    frames = recorded(args.recording) if args.recording else synthetic(args.seconds, args.noise, rng)
+    delta = FrameEncoder()
+    sizes = {"json": 0, "key frames": 0, "delta": 0}
+    sent = 0
+    start = end = next_due = None
+    for result in frames:
+        start = result.timestamp if start is None else start
+        end = result.timestamp
+        if next_due is not None and result.timestamp < next_due - 0.1 / SOURCE_FPS:
+            continue
+        next_due = result.timestamp + 1 / args.fps
+        frame = quantize(result)
+        data = delta.encode(frame)
+        if data is None:
+            continue
+        # A fresh encoder's first message is always a key frame
+        sizes["key frames"] += len(FrameEncoder().encode(frame))
+        sizes["delta"] += len(data)
+        sizes["json"] += naive_json(result)
+        sent += 1
+
+    if not sent:
+        print("No frames")
+        return
+    seconds = max(end - start, 1e-6)
+    print(f"{sent} frames over {seconds:.1f}s at up to {args.fps:g} FPS, {delta.key_frames} key frames "
+          f"({delta.key_frames / sent:.0%}; at least 1 in {KEYFRAME_EVERY})")
+    print(f"{'encoding':>12} {'bytes/frame':>12} {'bytes/s':>10} {'vs json':>8}")
+    for name, total in sizes.items():
+        print(f"{name:>12} {total / sent:>12.1f} {total / seconds:>10.0f} {total / sizes['json']:>8.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Spotify proxy payload size and parse time: verbatim vs. projected, compressed.
+
+Run from ``backend/``:
+
+    python -m benchmarks.bench_payloads
+    python -m benchmarks.bench_payloads --results 50 --tracks 100
+
+Builds Spotify-shaped responses (a search with ``--results`` items per type
+and a ``--tracks`` playlist page, with the markets lists, three image sizes
+and full album / artist objects the real API returns) and compares them as
+returned verbatim and as the UI now asks for them (``slim_search()``, and the
+playlist page under the frontend's ``fields`` projection, applied here by
+hand). Reports bytes raw / gzip / brotli (if installed) through the same
+encoders as app/compression.py, and ``json.loads`` time as a stand-in for
+the browser's parse.
+"""
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict, List
+
+from app.compression import _Brotli, _Gzip, brotli
+from app.services.spotify import slim_search
+
+MARKETS = ["AD", "AE", "AG", "AL", "AM", "AO", "AR", "AT", "AU", "AZ", "BA", "BB", "BD", "BE", "BF", "BG"] * 11
+
+
+def _images(kind: str, i: int) -> List[Dict[str, Any]]:
+    return [
+        {"url": f"https://i.scdn.co/image/ab67616d0000b273{kind}{i:024d}", "height": size, "width": size}
+        for size in (640, 300, 64)
+    ]
+
+
+def _artist(i: int) -> Dict[str, Any]:
+    return {
+        "external_urls": {"spotify": f"https://open.spotify.com/artist/{i:022d}"},
+        "href": f"https://api.spotify.com/v1/artists/{i:022d}",
+        "id": f"{i:022d}",
+        "name": f"Artist {i}",
+        "type": "artist",
+        "uri": f"spotify:artist:{i:022d}",
+    }
+
+
+def _album(i: int) -> Dict[str, Any]:
+    return {
+        "album_type": "album",
+        "artists": [_artist(i), _artist(i + 1)],
+        "available_markets": MARKETS,
+        "external_urls": {"spotify": f"https://open.spotify.com/album/{i:022d}"},
+        "href": f"https://api.spotify.com/v1/albums/{i:022d}",
+        "id": f"{i:022d}",
+        "images": _images("al", i),
+        "name": f"Album {i}",
+        "release_date": "2021-05-14",
+        "release_date_precision": "day",
+        "total_tracks": 12,
+        "type": "album",
+        "uri": f"spotify:album:{i:022d}",
+    }
+
+
+def _track(i: int) -> Dict[str, Any]:
+    return {
+        "album": _album(i),
+        "artists": [_artist(i), _artist(i + 1)],
+        "available_markets": MARKETS,
+        "disc_number": 1,
+        "duration_ms": 200000 + i,
+        "explicit": False,
+        "external_ids": {"isrc": f"USRC1{i:07d}"},
+        "external_urls": {"spotify": f"https://open.spotify.com/track/{i:022d}"},
+        "href": f"https://api.spotify.com/v1/tracks/{i:022d}",
+        "id": f"{i:022d}",
+        "is_local": False,
+        "name": f"Track {i}",
+        "popularity": 50,
+        "preview_url": None,
+        "track_number": 3,
+        "type": "track",
+        "uri": f"spotify:track:{i:022d}",
+    }
+
+
+def _playlist(i: int) -> Dict[str, Any]:
+    return {
+        "collaborative": False,
+        "description": "A playlist description that goes on for a while " * 2,
+        "external_urls": {"spotify": f"https://open.spotify.com/playlist/{i:022d}"},
+        "href": f"https://api.spotify.com/v1/playlists/{i:022d}",
+        "id": f"{i:022d}",
+        "images": _images("pl", i),
+        "name": f"Playlist {i}",
+        "owner": {"display_name": "owner", "id": "owner", "type": "user", "uri": "spotify:user:owner"},
+        "public": True,
+        "snapshot_id": "MTAsZDhkNmI4YjQ3YzE3ZTM0ZjA5NmVmNmIzYzk0YjM5M2Q",
+        "tracks": {"href": f"https://api.spotify.com/v1/playlists/{i:022d}/tracks", "total": 40},
+        "type": "playlist",
+        "uri": f"spotify:playlist:{i:022d}",
+    }
+
+
+def _section(make: Callable[[int], Dict[str, Any]], n: int) -> Dict[str, Any]:
+    return {"href": "https://api.spotify.com/v1/search", "items": [make(i) for i in range(n)], "limit": n, "offset": 0, "total": 1000}
+
+
+def search_response(n: int) -> Dict[str, Any]:
+    artist = lambda i: {**_artist(i), "genres": ["pop", "dance pop"], "images": _images("ar", i), "popularity": 60}  # noqa: E731
+    return {
+        "tracks": _section(_track, n),
+        "playlists": _section(_playlist, n),
+        "albums": _section(_album, n),
+        "artists": _section(artist, n),
+    }
+
+
+def tracks_page(n: int) -> Dict[str, Any]:
+    items = [{"added_at": "2023-01-01T00:00:00Z", "added_by": {"id": "owner"}, "is_local": False, "track": _track(i)} for i in range(n)]
+    return {"href": "", "items": items, "limit": 100, "next": None, "offset": 0, "previous": None, "total": n}
+
+
+def tracks_page_projected(page: Dict[str, Any]) -> Dict[str, Any]:
+    # What Spotify returns for the frontend's TRACK_FIELDS plus the paging fields
+    keep = ("id", "name", "uri", "duration_ms")
+    items = [
+        {"track": {**{k: it["track"][k] for k in keep}, "artists": [{"name": a["name"]} for a in it["track"]["artists"]]}}
+        for it in page["items"]
+    ]
+    return {"items": items, "limit": page["limit"], "offset": page["offset"], "total": page["total"]}
+
+
+def measure(data: Dict[str, Any], repeat: int) -> Dict[str, float]:
+    raw = json.dumps(data, separators=(",", ":")).encode()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        json.loads(raw)
+    parse_ms = (time.perf_counter() - started) / repeat * 1000
+    sizes = {"raw": len(raw), "gzip": len(_Gzip(6).compress(raw, False))}
+    if brotli is not None:
+        sizes["brotli"] = len(_Brotli(5).compress(raw, False))
+    return {**sizes, "parse_ms": parse_ms}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--results", type=int, default=20, help="search results per type")
+    parser.add_argument("--tracks", type=int, default=100, help="playlist page size")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    search = search_response(args.results)
+    page = tracks_page(args.tracks)
+    cases = [
+        ("search", search),
+        ("search slim", slim_search(search)),
+        ("tracks page", page),
+        ("tracks fields", tracks_page_projected(page)),
+    ]
+    print(f"{'payload':>14} {'raw KB':>8} {'gzip KB':>8} {'br KB':>8} {'parse ms':>9}")
+    for name, data in cases:
+        r = measure(data, args.repeat)
+        br = f"{r['brotli'] / 1024:>8.1f}" if "brotli" in r else f"{'-':>8}"
+        print(f"{name:>14} {r['raw'] / 1024:>8.1f} {r['gzip'] / 1024:>8.1f} {br} {r['parse_ms']:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""End-to-end replay of a recording through FramePipeline and GestureLoop.
+
+Run from ``backend/``:
+
+    python -m benchmarks.bench_replay sample.mp4
+    python -m benchmarks.bench_replay frames/ --record sample.gstrec
+    python -m benchmarks.bench_replay sample.gstrec --min-fps 500
+
+The source is anything ``GESTURE_SOURCE`` accepts except a camera: a video
+file, a directory of images, or a ``.gstrec`` landmark recording (which
+skips inference). Frames are replayed as fast as possible, none are dropped, and
+gesture hold and cooldown timers follow the recording's own timestamps, so the emitted events
+are deterministic.
+
+Reports sustained FPS, per-stage latency (read/decode, inference, thread
+hand-off, gesture logic) and the emitted events. ``--min-fps`` makes it exit
+non-zero below a throughput floor, for CI.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from app.services.frame_pipeline import FramePipeline
+from app.services.frame_sources import CameraSource, open_source
+from app.services.gesture_loop import GestureLoop
+from app.services.landmark_recording import LandmarkRecorder
+
+
+class _RecordingSink:
+    client_count = 1
+
+    def __init__(self) -> None:
+        self.events: List[Dict[str, Any]] = []
+        self.timestamp = 0.0
+
+    async def broadcast(self, event) -> None:
+        # Events are reused by GestureLoop, so keep a copy
+        self.events.append({"t": round(self.timestamp, 3), **event})
+
+    async def wait_for_subscribers(self, timeout=None) -> bool:
+        return True
+
+
+def percentiles(values: List[float]) -> str:
+    if not values:
+        return f"{'-':>8} {'-':>8} {'-':>8}"
+    ms = np.asarray(values) * 1000
+    return f"{np.percentile(ms, 50):8.2f} {np.percentile(ms, 95):8.2f} {ms.max():8.2f}"
+
+
+async def run(args) -> Dict[str, Any]:
+    source = open_source(args.source)
+    if isinstance(source, CameraSource):
+        raise SystemExit("bench_replay needs a recording, not a camera")
+    sink = _RecordingSink()
+    loop = GestureLoop(mapping_path=args.mapping, sink=sink)
+    loop.load_mapping()
+    if source.provides_landmarks:
+        loop.compile_gestures()
+    else:
+        loop.build_detector()
+    pipeline = FramePipeline(loop.detector, asyncio.get_running_loop(), source=source, paced=False, record_stages=True)
+    if args.record:
+        loop.recorder = LandmarkRecorder(args.record, loop.detector.maxHands if loop.detector else 2)
+    handoff: List[float] = []
+    gesture: List[float] = []
+    frames = 0
+
+    started = time.perf_counter()
+    pipeline.start()
+    try:
+        while args.max_frames <= 0 or frames < args.max_frames:
+            result = await pipeline.get(timeout=0.5)
+            if result is None:
+                if pipeline.finished and not pipeline.pending:
+                    break
+                continue
+            received = time.monotonic()
+            handoff.append(received - result.processed_at)
+            sink.timestamp = result.timestamp
+            try:
+                await loop._handle_frame(result)
+            finally:
+                pipeline.release(result)
+            gesture.append(time.monotonic() - received)
+            frames += 1
+        wall = time.perf_counter() - started
+    finally:
+        await asyncio.to_thread(pipeline.stop)
+        if loop.recorder:
+            loop.recorder.close()
+    return {
+        "frames": frames,
+        "wall_s": wall,
+        "fps": frames / wall if wall else 0.0,
+        "stages": {
+            "read": pipeline.stage_times["read"],
+            "inference": pipeline.stage_times["inference"],
+            "handoff": handoff,
+            "gesture": gesture,
+        },
+        "events": sink.events,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", help="video file, image directory or .gstrec landmark recording")
+    parser.add_argument("--mapping", default="gestures.json")
+    parser.add_argument("--max-frames", type=int, default=0, help="stop after this many frames (0 = all)")
+    parser.add_argument("--record", help="also save the landmarks as a .gstrec recording for later replays")
+    parser.add_argument("--min-fps", type=float, default=0.0, help="exit non-zero below this sustained FPS")
+    parser.add_argument("--quiet", action="store_true", help="print event counts instead of every event")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print(f"frames={report['frames']} wall_s={report['wall_s']:.2f} fps={report['fps']:.1f}")
+    print(f"{'stage':>10} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for name, values in report["stages"].items():
+        print(f"{name:>10} {percentiles(values)}")
+    counts: Dict[str, int] = {}
+    for event in report["events"]:
+        counts[event["action"]] = counts.get(event["action"], 0) + 1
+        if not args.quiet:
+            print(event)
+    print("events:", counts or "none")
+    if report["fps"] < args.min_fps:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""CPU cost per frame of hand detection at different capture resolutions.
+
+Run from ``backend/``:
+
+    python -m benchmarks.bench_resolution --video sample.mp4
+    python -m benchmarks.bench_resolution --frames 200 --resolutions 1280x720,640x360
+
+Without ``--video`` a synthetic noise frame is used, which measures the
+palm-detector cost of the "no hand in view" case.
+"""
+import argparse
+import time
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+from app.services.hand_tracking import HandDetector
+
+
+def load_frames(video: str | None, count: int) -> List[np.ndarray]:
+    if not video:
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 255, (720, 1280, 3), dtype=np.uint8)] * count
+    cap = cv2.VideoCapture(video)
+    frames = []
+    while len(frames) < count:
+        ok, img = cap.read()
+        if not ok:
+            break
+        frames.append(img)
+    cap.release()
+    if not frames:
+        raise SystemExit(f"Could not read frames from {video}")
+    return frames
+
+
+def parse_resolutions(value: str) -> List[Tuple[int, int]]:
+    out = []
+    for item in value.split(","):
+        w, h = item.lower().split("x")
+        out.append((int(w), int(h)))
+    return out
+
+
+def run(frames: List[np.ndarray], width: int, height: int, roi: bool) -> dict:
+    detector = HandDetector(detectionCon=0.7, roi=roi)
+    scaled = [cv2.resize(f, (width, height), interpolation=cv2.INTER_AREA) for f in frames]
+    # Warm up the graph so model loading isn't counted
+    for img in scaled[:5]:
+        detector.findHands(img, draw=False)
+    hands_seen = 0
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    for img in scaled:
+        detector.findHands(img, draw=False)
+        hands_seen += len(detector.findLandmarks(img)) > 0
+    wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+    n = len(scaled)
+    return {
+        "resolution": f"{width}x{height}",
+        "wall_ms": 1000 * wall / n,
+        "cpu_ms": 1000 * cpu / n,
+        "fps": n / wall,
+        "hand_rate": hands_seen / n,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--video", help="video file to replay (default: synthetic frames)")
+    parser.add_argument("--frames", type=int, default=150)
+    parser.add_argument("--resolutions", default="1280x720,960x540,640x360,320x240", type=parse_resolutions)
+    parser.add_argument("--roi", action="store_true", help="enable HandDetector ROI tracking")
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames)
+    print(f"{'resolution':>11} {'wall ms':>8} {'cpu ms':>8} {'fps':>7} {'hands':>6}")
+    for width, height in args.resolutions:
+        r = run(frames, width, height, args.roi)
+        print(f"{r['resolution']:>11} {r['wall_ms']:8.2f} {r['cpu_ms']:8.2f} {r['fps']:7.1f} {r['hand_rate']:6.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Spotify proxy request latency: a client per request vs. the shared pooled one.
+
+Run from ``backend/``:
+
+    python -m benchmarks.bench_spotify_client
+    python -m benchmarks.bench_spotify_client --requests 500 --concurrency 1,8 --handshake-ms 60
+
+Starts a local mock of api.spotify.com (plain HTTP/1.1 with keep-alive; each
+new connection first waits ``--handshake-ms`` to stand in for the TCP + TLS
+round trips to the real API, every request ``--rtt-ms``) and fetches a
+playlist through it two ways: a new ``httpx.AsyncClient`` per call, as the
+services did before, and ``spotify.get_playlist_detail()`` on the shared
+client from services/http_client.py. Every shared call asks for a different
+playlist id, so each one really goes upstream instead of being answered by
+the response cache or joining an identical request in flight. Reports
+per-request p50 / p95 latency, requests per second and how many connections
+the mock server accepted.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+import numpy as np
+
+from app.services import http_client, spotify
+
+PLAYLIST = json.dumps(
+    {
+        "id": "bench",
+        "name": "Bench playlist",
+        "images": [{"url": f"https://i.scdn.co/image/{i}", "height": 640, "width": 640} for i in range(3)],
+        "tracks": {"total": 100, "items": [{"track": {"id": str(i), "name": f"Track {i}"}} for i in range(100)]},
+    }
+).encode()
+
+
+class MockSpotify:
+    """Minimal keep-alive HTTP/1.1 server answering every GET with PLAYLIST."""
+
+    def __init__(self, handshake_s: float, rtt_s: float) -> None:
+        self.handshake_s = handshake_s
+        self.rtt_s = rtt_s
+        self.connections = 0
+        self.server = None
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}/v1"
+
+    async def stop(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        await asyncio.sleep(self.handshake_s)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                await asyncio.sleep(self.rtt_s)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: %d\r\n\r\n%s" % (len(PLAYLIST), PLAYLIST)
+                )
+                await writer.drain()
+                if b"connection: close" in head.lower():
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def per_request_client(api: str) -> None:
+    async with httpx.AsyncClient(headers={"Authorization": "Bearer bench"}) as client:
+        resp = await client.get(f"{api}/playlists/bench")
+        resp.raise_for_status()
+        resp.json()
+
+
+_playlist_ids = itertools.count()
+
+
+async def shared_client(api: str) -> None:
+    await spotify.get_playlist_detail(f"bench{next(_playlist_ids)}", token_override="bench")
+
+
+async def run(fetch: Callable[[str], Awaitable[None]], api: str, mock: MockSpotify, requests: int, concurrency: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    remaining = iter(range(requests))
+
+    async def worker() -> None:
+        for _ in remaining:
+            started = time.perf_counter()
+            await fetch(api)
+            latencies.append(time.perf_counter() - started)
+
+    mock.connections = 0
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    ms = np.asarray(latencies) * 1000
+    return {
+        "p50": float(np.percentile(ms, 50)),
+        "p95": float(np.percentile(ms, 95)),
+        "rps": requests / elapsed,
+        "connections": mock.connections,
+    }
+
+
+async def main_async(args) -> None:
+    mock = MockSpotify(args.handshake_ms / 1000, args.rtt_ms / 1000)
+    api = await mock.start()
+    spotify.SPOTIFY_API = api
+    await http_client.start()
+    try:
+        print(f"mock api.spotify.com: {args.handshake_ms:g} ms per new connection, {args.rtt_ms:g} ms per request")
+        print(f"{'client':>12} {'concurrency':>12} {'p50 ms':>8} {'p95 ms':>8} {'req/s':>8} {'connections':>12}")
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            for name, fetch in (("per request", per_request_client), ("shared", shared_client)):
+                # One untimed request so the shared pool starts warm, like a running server
+                await fetch(api)
+                r = await run(fetch, api, mock, args.requests, concurrency)
+                print(
+                    f"{name:>12} {concurrency:>12d} {r['p50']:>8.2f} {r['p95']:>8.2f} {r['rps']:>8.0f} {r['connections']:>12d}"
+                )
+    finally:
+        await http_client.close()
+        await mock.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", default="1,8", help="comma-separated numbers of concurrent callers")
+    parser.add_argument("--handshake-ms", type=float, default=30.0, help="simulated TCP + TLS setup per connection")
+    parser.add_argument("--rtt-ms", type=float, default=10.0, help="simulated round trip per request")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Volume messages and lag with and without smoothing / dead-band / rate limit.
+
+Run from ``backend/``:
+
+    python -m benchmarks.bench_volume
+    python -m benchmarks.bench_volume --noise 3 --seconds 300
+
+Drives the volume range gesture from gestures.json with a synthetic thumb-index
+distance (holds at random levels joined by ~1 s moves) plus Gaussian landmark
+jitter, through GesturePlan exactly as GestureLoop does, once as configured and
+once with filtering disabled (every frame emitted, the previous behaviour).
+
+Reports messages per second, the mean error of the last emitted value against
+the noise-free target, and how long after a move ends the emitted value takes
+to settle within 3 of its target (p50 / p95).
+"""
+import argparse
+import copy
+from typing import Any, Dict, List
+
+import numpy as np
+
+from app.services import landmarks as lmk
+from app.services.gesture_engine import RANGE, GesturePlan, parse_gestures
+from app.services.gesture_loop import GestureLoop
+
+WIDTH, HEIGHT = 1280, 720
+SETTLE = 3.0
+
+
+def signal(seconds: float, fps: float, rng: np.random.Generator):
+    """Noise-free 0-1 position per frame and the frames where a move ends."""
+    frames = int(seconds * fps)
+    parts: List[np.ndarray] = []
+    ends: List[int] = []
+    level, i = 0.5, 0
+    while i < frames:
+        hold = int(rng.uniform(1.5, 4.0) * fps)
+        nxt = rng.uniform(0.05, 0.95)
+        move = int(rng.uniform(0.5, 1.5) * fps)
+        parts += [np.full(hold, level), np.linspace(level, nxt, move, endpoint=False)]
+        i += hold + move
+        ends.append(i)
+        level = nxt
+    return np.concatenate(parts)[:frames], np.array([e for e in ends if e < frames])
+
+
+def hands(position: float, lo: float, span: float, jitter: np.ndarray) -> np.ndarray:
+    """Left hand with the thumb-index distance at ``position``, Right index up."""
+    left = np.zeros((lmk.NUM_LANDMARKS, 3), dtype=np.float32)
+    left[:, 0] = np.linspace(300, 700, lmk.NUM_LANDMARKS)
+    left[:, 1] = np.linspace(250, 550, lmk.NUM_LANDMARKS)
+    left[4, :2] = (350, 400)
+    left[8, :2] = (350 + (lo + position * span) * WIDTH, 400)
+    left[[4, 8], :2] += jitter
+    right = np.zeros((lmk.NUM_LANDMARKS, 3), dtype=np.float32)
+    right[:, 0] = np.linspace(900, 1000, lmk.NUM_LANDMARKS)
+    right[:, 1] = np.linspace(300, 500, lmk.NUM_LANDMARKS)
+    right[8, 1] = 200
+    return np.stack([left, right])
+
+
+def run(config: Dict[str, Any], target: np.ndarray, ends: np.ndarray, fps: float, noise: float, seed: int) -> Dict[str, float]:
+    plan = GesturePlan(parse_gestures(config))
+    g = int(np.flatnonzero(plan.is_range)[0])
+    lo, span = float(plan.range_lo[g]), float(plan.range_span[g])
+    jitter = np.random.default_rng(seed).normal(0.0, noise, (len(target), 2, 2)).astype(np.float32)
+    shown = np.empty(len(target))
+    messages, value = 0, np.nan
+    for k, position in enumerate(target):
+        emit = plan.evaluate(hands(position, lo, span, jitter[k]), ["Left", "Right"], WIDTH, HEIGHT, k / fps)
+        if emit[g]:
+            messages += 1
+            value = int(plan.values[g])
+        shown[k] = value
+    expected = np.clip(target, 0, 1) * 100
+    error = np.abs(shown - expected)
+    settle = []
+    for end in ends:
+        after = np.flatnonzero(error[end:] <= SETTLE)
+        settle.append(after[0] / fps if len(after) else np.nan)
+    settle = np.array(settle) * 1000
+    return {
+        "messages": messages,
+        "per_s": messages * fps / len(target),
+        "error": float(np.nanmean(error)),
+        "settle_p50": float(np.nanpercentile(settle, 50)),
+        "settle_p95": float(np.nanpercentile(settle, 95)),
+    }
+
+
+def unfiltered(config: Dict[str, Any]) -> Dict[str, Any]:
+    config = copy.deepcopy(config)
+    for gesture in config["gestures"]:
+        if gesture.get("type") == RANGE:
+            gesture.update({"smoothing": None, "dead_band": 0, "max_rate": 0})
+    return config
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mapping", default="gestures.json")
+    parser.add_argument("--seconds", type=float, default=120.0)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--noise", type=float, default=1.5, help="landmark jitter, pixels (std dev)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    loop = GestureLoop(mapping_path=args.mapping)
+    loop.load_mapping()
+    config = loop.mapping
+    if not any(g.get("type") == RANGE for g in config.get("gestures", [])):
+        raise SystemExit(f"{args.mapping} has no declarative range gesture")
+    target, ends = signal(args.seconds, args.fps, np.random.default_rng(args.seed))
+
+    print(f"frames={len(target)} moves={len(ends)} noise_px={args.noise}")
+    print(f"{'config':>12} {'messages':>9} {'msg/s':>7} {'error':>7} {'settle p50 ms':>14} {'settle p95 ms':>14}")
+    for label, variant in (("unfiltered", unfiltered(config)), ("configured", config)):
+        r = run(variant, target, ends, args.fps, args.noise, args.seed)
+        print(
+            f"{label:>12} {r['messages']:>9d} {r['per_s']:>7.1f} {r['error']:>7.2f} "
+            f"{r['settle_p50']:>14.0f} {r['settle_p95']:>14.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
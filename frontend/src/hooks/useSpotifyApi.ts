@@ -1,5 +1,9 @@
 const BACKEND = 'http://localhost:8000'
 
+// Spotify `fields` projections: only what the UI reads (the backend adds paging fields)
+const TRACK_FIELDS = 'items(track(id,name,uri,duration_ms,artists(name)))'
+const PLAYLIST_FIELDS = 'id,name,images,tracks.total'
+
 export type Playlist = {
   id: string
   name: string
@@ -22,11 +26,7 @@ export async function fetchPlaylists(): Promise<Playlist[]> {
   return items.map((p: any) => ({ id: p.id, name: p.name, images: p.images, tracksTotal: p.tracks?.total }))
 }
 
-export async function fetchPlaylistTracks(playlistId: string): Promise<Track[]> {
-  const res = await fetch(`${BACKEND}/api/playlists/${playlistId}/tracks`)
-  if (!res.ok) throw new Error(`Failed to load tracks: ${res.status}`)
-  const json = await res.json()
-  const items = Array.isArray(json.items) ? json.items : []
+function toTracks(items: any[]): Track[] {
   return items
     .map((it: any) => it?.track)
     .filter(Boolean)
@@ -38,6 +38,36 @@ export async function fetchPlaylistTracks(playlistId: string): Promise<Track[]>
     }))
 }
 
+// Every track of the playlist. The backend streams them as NDJSON (one playlist
+// item per line, in order) while it fetches the pages; onProgress gets the tracks
+// loaded so far after each chunk so a list can render before the last page lands.
+export async function fetchPlaylistTracks(
+  playlistId: string,
+  onProgress?: (tracks: Track[]) => void,
+): Promise<Track[]> {
+  const params = new URLSearchParams({ all: 'true', fields: TRACK_FIELDS })
+  const res = await fetch(`${BACKEND}/api/playlists/${playlistId}/tracks?${params}`)
+  if (!res.ok || !res.body) throw new Error(`Failed to load tracks: ${res.status}`)
+  const reader = res.body.getReader()
+  const decoder = new TextDecoder()
+  const tracks: Track[] = []
+  let rest = ''
+  for (;;) {
+    const { done, value } = await reader.read()
+    rest += decoder.decode(value, { stream: !done })
+    const lines = rest.split('\n')
+    rest = done ? '' : lines.pop() ?? ''
+    const items = lines.filter((line) => line.trim()).map((line) => JSON.parse(line))
+    const failed = items.find((it) => it?.error)
+    if (failed) throw new Error(`Failed to load tracks: ${failed.error}`)
+    if (items.length) {
+      tracks.push(...toTracks(items))
+      onProgress?.(tracks.slice())
+    }
+    if (done) return tracks
+  }
+}
+
 export type SearchResults = {
   tracks: { id: string; title: string; artist: string; uri: string; albumArt?: string }[]
   playlists: { id: string; name: string; cover?: string; tracksTotal?: number }[]
@@ -50,7 +80,7 @@ export type SearchResults = {
 
 export async function searchAll(query: string): Promise<SearchResults> {
   try { console.log('[searchAll] fetching', query) } catch {}
-  const res = await fetch(`${BACKEND}/api/search?q=${encodeURIComponent(query)}`)
+  const res = await fetch(`${BACKEND}/api/search?q=${encodeURIComponent(query)}&slim=true`)
   if (!res.ok) throw new Error(`Search failed: ${res.status}`)
   const json = await res.json()
   // Support both raw Spotify shape (tracks.items/playlists.items)
@@ -105,7 +135,7 @@ export async function searchAll(query: string): Promise<SearchResults> {
 }
 
 export async function fetchPlaylistDetail(playlistId: string): Promise<Playlist> {
-  const res = await fetch(`${BACKEND}/api/playlists/${playlistId}`)
+  const res = await fetch(`${BACKEND}/api/playlists/${playlistId}?fields=${encodeURIComponent(PLAYLIST_FIELDS)}`)
   if (!res.ok) throw new Error(`Failed to load playlist: ${res.status}`)
   const p = await res.json()
   return { id: p.id, name: p.name, images: p.images, tracksTotal: p.tracks?.total }
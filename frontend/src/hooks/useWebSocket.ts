@@ -6,6 +6,31 @@ type GestureEvent =
   | { action: 'previous_track' }
   | { action: 'volume_control'; value: number }
 
+// Binary wire protocol (backend/app/services/wire_protocol.py); JSON text frames
+// are still handled for servers without it and for actions it has no id for
+const BINARY_SUBPROTOCOL = 'gestify.v1.bin'
+const WIRE_ACTIONS = ['toggle_play', 'next_track', 'previous_track', 'volume_control'] as const
+const HEADER_BYTES = 4
+const RECORD_BYTES = 8
+
+function decodeFrame(buf: ArrayBuffer): GestureEvent[] {
+  const view = new DataView(buf)
+  if (view.byteLength < HEADER_BYTES || view.getUint8(0) !== 1 || view.getUint8(1) !== 1) return []
+  const count = Math.min(view.getUint16(2, true), (view.byteLength - HEADER_BYTES) / RECORD_BYTES)
+  const events: GestureEvent[] = []
+  for (let i = 0; i < count; i++) {
+    const at = HEADER_BYTES + i * RECORD_BYTES
+    const action = WIRE_ACTIONS[view.getUint8(at)]
+    if (!action) continue
+    events.push(
+      action === 'volume_control'
+        ? { action, value: view.getInt16(at + 2, true) }
+        : ({ action } as GestureEvent)
+    )
+  }
+  return events
+}
+
 type Handlers = {
   onTogglePlay: () => void
   onNext: () => void
@@ -13,11 +38,12 @@ type Handlers = {
   onVolume: (value: number) => void
 }
 
-export function useWebSocket(url: string, handlers: Handlers, options?: { enabled?: boolean }) {
+export function useWebSocket(url: string, handlers: Handlers, options?: { enabled?: boolean; binary?: boolean }) {
   const socketRef = useRef<WebSocket | null>(null)
   const reconnectRef = useRef<number>(0)
   const handlersRef = useRef<Handlers>(handlers)
   const enabled = options?.enabled ?? true
+  const binary = options?.binary ?? true
 
   // Keep latest handlers without recreating the connection
   useEffect(() => {
@@ -32,48 +58,44 @@ export function useWebSocket(url: string, handlers: Handlers, options?: { enable
       return
     }
     let isMounted = true
-    const lastActionAt: Record<string, number> = {}
-    let lastVolumeTs = 0
-
-    function callWithCooldown(action: string, fn: () => void, cooldownMs = 500) {
-      const now = Date.now()
-      if ((lastActionAt[action] ?? 0) + cooldownMs > now) return
-      lastActionAt[action] = now
-      fn()
-    }
 
     function connect() {
       if (!isMounted) return
-      const ws = new WebSocket(url)
+      const ws = binary ? new WebSocket(url, BINARY_SUBPROTOCOL) : new WebSocket(url)
+      ws.binaryType = 'arraybuffer'
       socketRef.current = ws
 
       ws.onopen = () => {
         reconnectRef.current = 0
       }
 
+      function handle(data: GestureEvent) {
+        const h = handlersRef.current
+        // Discrete actions arrive once per physical gesture (edge-triggered on the server)
+        switch (data.action) {
+          case 'toggle_play':
+            h.onTogglePlay()
+            break
+          case 'next_track':
+            h.onNext()
+            break
+          case 'previous_track':
+            h.onPrevious()
+            break
+          case 'volume_control':
+            // Already smoothed, change-only and rate limited by the server
+            h.onVolume(Number((data as any).value ?? 0))
+            break
+        }
+      }
+
       ws.onmessage = (ev: MessageEvent) => {
         try {
-          const data = JSON.parse(ev.data) as GestureEvent
-          const h = handlersRef.current
-          switch (data.action) {
-            case 'toggle_play':
-              callWithCooldown('toggle_play', () => h.onTogglePlay())
-              break
-            case 'next_track':
-              callWithCooldown('next_track', () => h.onNext())
-              break
-            case 'previous_track':
-              callWithCooldown('previous_track', () => h.onPrevious())
-              break
-            case 'volume_control': {
-              const v = Number((data as any).value ?? 0)
-              const now = Date.now()
-              if (now - lastVolumeTs > 150) {
-                lastVolumeTs = now
-                h.onVolume(v)
-              }
-              break
-            }
+          if (ev.data instanceof ArrayBuffer) {
+            // One frame carries every event from a server tick
+            decodeFrame(ev.data).forEach(handle)
+          } else {
+            handle(JSON.parse(ev.data) as GestureEvent)
           }
         } catch {}
       }
@@ -95,7 +117,7 @@ export function useWebSocket(url: string, handlers: Handlers, options?: { enable
       try { socketRef.current?.close() } catch {}
       socketRef.current = null
     }
-  }, [url, enabled])
+  }, [url, enabled, binary])
 }
 
 